@@ -2,7 +2,8 @@
 from tzlocal import get_localzone
 from pytz import timezone
 from datetime import datetime
-from inspect import signature
+from inspect import signature, iscoroutinefunction
+from contextvars import ContextVar
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from pyrogram import Client as tgClient, enums, utils as pyroutils
 from pymongo import MongoClient
@@ -17,6 +18,7 @@ from qbittorrentapi import Client as qbClient
 from socket import setdefaulttimeout
 from logging import getLogger, Formatter, FileHandler, StreamHandler, INFO, ERROR, basicConfig, error as log_error, info as log_info, warning as log_warning
 from uvloop import install
+from .helper.ext_utils.task_registry import TaskDict
 
 #from faulthandler import enable as faulthandler_enable
 #faulthandler_enable()
@@ -71,7 +73,7 @@ status_reply_dict_lock = Lock()
 queue_dict_lock = Lock()
 qb_listener_lock = Lock()
 status_reply_dict = {}
-download_dict = {}
+download_dict = TaskDict()
 rss_dict = {}
 
 BOT_TOKEN = environ.get('BOT_TOKEN', '')
@@ -215,10 +217,35 @@ EXCEP_CHATS = environ.get('EXCEP_CHATS', '')
 if len(EXCEP_CHATS) == 0:
     EXCEP_CHATS = ''
 
+# name of the handler an update is being processed by, inherited by the tasks and db calls it starts
+handler_name = ContextVar('handler_name', default='other')
+
+
+class wzClient(tgClient):
+    def add_handler(self, handler, group=0):
+        callback = handler.callback
+        if iscoroutinefunction(callback):
+            async def tagged(client, *args):
+                token = handler_name.set(callback.__name__)
+                try:
+                    return await callback(client, *args)
+                finally:
+                    handler_name.reset(token)
+        else:
+            def tagged(client, *args):
+                token = handler_name.set(callback.__name__)
+                try:
+                    return callback(client, *args)
+                finally:
+                    handler_name.reset(token)
+        handler.callback = tagged
+        return super().add_handler(handler, group)
+
+
 def wztgClient(*args, **kwargs):
     if 'max_concurrent_transmissions' in signature(tgClient.__init__).parameters:
         kwargs['max_concurrent_transmissions'] = 1000
-    return tgClient(*args, **kwargs)
+    return wzClient(*args, **kwargs)
 
 IS_PREMIUM_USER = False
 user = ''
@@ -233,6 +260,17 @@ if len(USER_SESSION_STRING) != 0:
         log_error(f"Failed making client from USER_SESSION_STRING : {e}")
         user = ''
 
+leech_bots = []
+LEECH_BOT_TOKENS = environ.get('LEECH_BOT_TOKENS', '')
+if len(LEECH_BOT_TOKENS) != 0:
+    log_info("Creating clients from LEECH_BOT_TOKENS")
+    for index, token in enumerate(LEECH_BOT_TOKENS.split(), start=1):
+        try:
+            leech_bots.append(wztgClient(f'leech{index}', TELEGRAM_API, TELEGRAM_HASH, bot_token=token,
+                                         parse_mode=enums.ParseMode.HTML, no_updates=True).start())
+        except Exception as e:
+            log_error(f"Failed making client from LEECH_BOT_TOKENS [{index}] : {e}")
+
 MEGA_EMAIL = environ.get('MEGA_EMAIL', '')
 MEGA_PASSWORD = environ.get('MEGA_PASSWORD', '')
 if len(MEGA_EMAIL) == 0 or len(MEGA_PASSWORD) == 0:
@@ -312,6 +350,9 @@ if str(LEECH_SPLIT_SIZE) in ["4194304000", "2097152000"] or len(LEECH_SPLIT_SIZE
 else:
     LEECH_SPLIT_SIZE = int(LEECH_SPLIT_SIZE)
 
+LEECH_UPLOAD_WIDTH = environ.get('LEECH_UPLOAD_WIDTH', '')
+LEECH_UPLOAD_WIDTH = 3 if len(LEECH_UPLOAD_WIDTH) == 0 else int(LEECH_UPLOAD_WIDTH)
+
 BOT_MAX_TASKS = environ.get('BOT_MAX_TASKS', '')
 BOT_MAX_TASKS = int(BOT_MAX_TASKS) if BOT_MAX_TASKS.isdigit() else ''
 
@@ -359,6 +400,18 @@ QUEUE_DOWNLOAD = '' if len(QUEUE_DOWNLOAD) == 0 else int(QUEUE_DOWNLOAD)
 QUEUE_UPLOAD = environ.get('QUEUE_UPLOAD', '')
 QUEUE_UPLOAD = '' if len(QUEUE_UPLOAD) == 0 else int(QUEUE_UPLOAD)
 
+QUEUE_SJF_SIZE = environ.get('QUEUE_SJF_SIZE', '')
+QUEUE_SJF_SIZE = '' if len(QUEUE_SJF_SIZE) == 0 else float(QUEUE_SJF_SIZE)
+
+QUEUE_DOWNLOAD_MAX = environ.get('QUEUE_DOWNLOAD_MAX', '')
+QUEUE_DOWNLOAD_MAX = '' if len(QUEUE_DOWNLOAD_MAX) == 0 else int(QUEUE_DOWNLOAD_MAX)
+
+QUEUE_LINK_SPEED = environ.get('QUEUE_LINK_SPEED', '')
+QUEUE_LINK_SPEED = '' if len(QUEUE_LINK_SPEED) == 0 else float(QUEUE_LINK_SPEED)
+
+QUEUE_UPLINK_SPEED = environ.get('QUEUE_UPLINK_SPEED', '')
+QUEUE_UPLINK_SPEED = '' if len(QUEUE_UPLINK_SPEED) == 0 else float(QUEUE_UPLINK_SPEED)
+
 INCOMPLETE_TASK_NOTIFIER = environ.get('INCOMPLETE_TASK_NOTIFIER', '')
 INCOMPLETE_TASK_NOTIFIER = INCOMPLETE_TASK_NOTIFIER.lower() == 'true'
 
@@ -668,6 +721,8 @@ config_dict = {'ANIME_TEMPLATE': ANIME_TEMPLATE,
                'MIRROR_FILENAME_SUFFIX': MIRROR_FILENAME_SUFFIX,
                'MIRROR_FILENAME_REMNAME': MIRROR_FILENAME_REMNAME,
                'LEECH_SPLIT_SIZE': LEECH_SPLIT_SIZE,
+               'LEECH_BOT_TOKENS': LEECH_BOT_TOKENS,
+               'LEECH_UPLOAD_WIDTH': LEECH_UPLOAD_WIDTH,
                'LOGIN_PASS': LOGIN_PASS,
                'TOKEN_TIMEOUT': TOKEN_TIMEOUT,
                'MDL_TEMPLATE': MDL_TEMPLATE,
@@ -678,6 +733,10 @@ config_dict = {'ANIME_TEMPLATE': ANIME_TEMPLATE,
                'QUEUE_ALL': QUEUE_ALL,
                'QUEUE_DOWNLOAD': QUEUE_DOWNLOAD,
                'QUEUE_UPLOAD': QUEUE_UPLOAD,
+               'QUEUE_SJF_SIZE': QUEUE_SJF_SIZE,
+               'QUEUE_DOWNLOAD_MAX': QUEUE_DOWNLOAD_MAX,
+               'QUEUE_LINK_SPEED': QUEUE_LINK_SPEED,
+               'QUEUE_UPLINK_SPEED': QUEUE_UPLINK_SPEED,
                'RCLONE_FLAGS': RCLONE_FLAGS,
                'RCLONE_PATH': RCLONE_PATH,
                'RCLONE_SERVE_URL': RCLONE_SERVE_URL,
@@ -2,7 +2,8 @@ from time import time, monotonic
 from datetime import datetime
 from sys import executable
 from os import execl as osexecl
-from asyncio import create_subprocess_exec, gather, run as asyrun
+from asyncio import create_subprocess_exec, gather, current_task, CancelledError, run as asyrun
+from contextlib import suppress
 from uuid import uuid4
 from base64 import b64decode
 from importlib import import_module, reload
@@ -10,20 +11,25 @@ from importlib import import_module, reload
 from requests import get as rget
 from pytz import timezone
 from bs4 import BeautifulSoup
-from signal import signal, SIGINT
+from signal import SIGINT, SIGTERM, SIGABRT
 from aiofiles.os import path as aiopath, remove as aioremove
 from aiofiles import open as aiopen
-from pyrogram import idle
+from aioshutil import rmtree as aiormtree
 from pyrogram.enums import ChatMemberStatus, ChatType
 from pyrogram.handlers import MessageHandler, CallbackQueryHandler
 from pyrogram.filters import command, private, regex
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-from bot import bot, user, bot_name, config_dict, user_data, botStartTime, LOGGER, Interval, DATABASE_URL, QbInterval, INCOMPLETE_TASK_NOTIFIER, scheduler
+from bot import bot, user, leech_bots, bot_name, config_dict, user_data, botStartTime, LOGGER, Interval, DATABASE_URL, QbInterval, INCOMPLETE_TASK_NOTIFIER, scheduler
 from bot.version import get_version
 from .helper.ext_utils.fs_utils import start_cleanup, clean_all, exit_clean_up
-from .helper.ext_utils.bot_utils import get_readable_time, cmd_exec, sync_to_async, new_task, set_commands, update_user_ldata, get_stats
-from .helper.ext_utils.db_handler import DbManger
+from .helper.ext_utils.bot_utils import get_readable_time, cmd_exec, sync_to_async, new_task, set_commands, update_user_ldata, get_stats, setInterval, engine_tick
+from .helper.ext_utils.engine_snapshot import TICK_INTERVAL as ENGINE_TICK_INTERVAL
+from .helper.ext_utils.task_manager import adjust_admission
+from .helper.ext_utils.user_data_writer import user_data_writer, FLUSH_INTERVAL as USER_DATA_FLUSH_INTERVAL
+from .helper.ext_utils.db_handler import DbManger, close_db_client
+from .helper.ext_utils.sys_metrics import sys_metrics
+from .helper.ext_utils.screenshot_engine import CACHE_DIR as SS_CACHE_DIR
 from .helper.telegram_helper.bot_commands import BotCommands
 from .helper.telegram_helper.message_utils import sendMessage, editMessage, editReplyMarkup, sendFile, deleteMessage, delete_all_messages
 from .helper.telegram_helper.filters import CustomFilters
@@ -34,6 +40,10 @@ from .modules import authorize, clone, gd_count, gd_delete, gd_list, cancel_mirr
                      rss, shell, eval, users_settings, bot_settings, speedtest, save_msg, images, imdb, anilist, mediainfo, mydramalist, gen_pyro_sess, \
                      gd_clean, broadcast, category_select
 
+AdmissionInterval = []
+UserDataInterval = []
+EngineInterval = []
+
 async def stats(client, message):
     msg, btns = await get_stats(message)
     await sendMessage(message, msg, btns, photo='IMAGES')
@@ -79,6 +89,7 @@ async def token_callback(_, query):
         return await query.answer('Already Used, Generate New One', show_alert=True)
     update_user_ldata(user_id, 'token', str(uuid4()))
     update_user_ldata(user_id, 'time', time())
+    await user_data_writer.update(user_id)
     await query.answer('Activated Temporary Token!', show_alert=True)
     kb = query.message.reply_markup.inline_keyboard[1:]
     kb.insert(0, [InlineKeyboardButton(BotTheme('ACTIVATED'), callback_data='pass activated')])
@@ -96,6 +107,7 @@ async def login(_, message):
         if input_pass != config_dict['LOGIN_PASS']:
             return await sendMessage(message, BotTheme('INVALID_PASS'))
         update_user_ldata(user_id, 'token', config_dict['LOGIN_PASS'])
+        await user_data_writer.update(user_id)
         return await sendMessage(message, BotTheme('PASS_LOGGED'))
     else:
         await sendMessage(message, BotTheme('LOGIN_USED'))
@@ -106,9 +118,12 @@ async def restart(client, message):
     if scheduler.running:
         scheduler.shutdown(wait=False)
     await delete_all_messages()
-    for interval in [QbInterval, Interval]:
+    for interval in [QbInterval, Interval, AdmissionInterval, UserDataInterval, EngineInterval]:
         if interval:
             interval[0].cancel()
+    await user_data_writer.flush()
+    close_db_client()
+    sys_metrics.stop()
     await sync_to_async(clean_all)
     proc1 = await create_subprocess_exec('pkill', '-9', '-f', 'gunicorn|aria2c|qbittorrent-nox|ffmpeg|rclone')
     proc2 = await create_subprocess_exec('python3', 'update.py')
@@ -242,8 +257,13 @@ async def log_check():
     
 
 async def main():
-    await gather(start_cleanup(), torrent_search.initiate_search_tools(), restart_notification(), search_images(), set_commands(bot), log_check())
+    # cached frames are only indexed in memory, so the ones left by the last run are dropped with the downloads
+    await gather(start_cleanup(), aiormtree(SS_CACHE_DIR, ignore_errors=True), torrent_search.initiate_search_tools(), restart_notification(), search_images(), set_commands(bot), log_check())
     await sync_to_async(start_aria2_listener, wait=False)
+    sys_metrics.start()
+    EngineInterval.append(setInterval(ENGINE_TICK_INTERVAL, engine_tick))
+    AdmissionInterval.append(setInterval(10, adjust_admission))
+    UserDataInterval.append(setInterval(USER_DATA_FLUSH_INTERVAL, user_data_writer.flush))
     
     bot.add_handler(MessageHandler(
         start, filters=command(BotCommands.StartCommand) & private))
@@ -264,16 +284,29 @@ async def main():
     LOGGER.info(f"WZML-X Bot [@{bot_name}] Started!")
     if user:
         LOGGER.info(f"WZ's User [@{user.me.username}] Ready!")
-    signal(SIGINT, exit_clean_up)
+    for client in leech_bots:
+        LOGGER.info(f"WZ's Leech Bot [@{client.me.username}] Ready!")
+
+
+async def serve():
+    serving = current_task()
+    # handlers run as loop callbacks, SIGINT cleans up before the clients are stopped and the others stop right away
+    bot.loop.add_signal_handler(SIGINT, exit_clean_up, serving)
+    for sig in (SIGTERM, SIGABRT):
+        bot.loop.add_signal_handler(sig, serving.cancel)
+    with suppress(CancelledError):
+        await bot.loop.create_future()
 
 async def stop_signals():
+    await user_data_writer.flush()
+    close_db_client()
+    clients = [bot, *leech_bots]
     if user:
-        await gather(bot.stop(), user.stop())
-    else:
-        await bot.stop()
+        clients.append(user)
+    await gather(*(client.stop() for client in clients))
 
 
 bot_run = bot.loop.run_until_complete
 bot_run(main())
-bot_run(idle())
+bot_run(serve())
 bot_run(stop_signals())
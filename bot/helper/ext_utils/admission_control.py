@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+from bot import config_dict, queued_dl, non_queued_dl, LOGGER
+
+UNDERUSED_RATIO = 0.7
+SATURATED_RATIO = 0.9
+DISK_BUSY_LIMIT = 90
+PEAK_DECAY = 0.99
+
+
+class AdmissionController:
+    def __init__(self):
+        self.__limit = None
+        self.__peak_speed = 0
+
+    @staticmethod
+    def __band():
+        dl_min = config_dict['QUEUE_DOWNLOAD']
+        dl_max = config_dict['QUEUE_DOWNLOAD_MAX']
+        if not dl_min or not dl_max or dl_max <= dl_min:
+            return None
+        return dl_min, dl_max
+
+    def dl_limit(self):
+        if (band := self.__band()) is None:
+            self.__limit = None
+            return config_dict['QUEUE_DOWNLOAD']
+        if self.__limit is None:
+            self.__limit = band[0]
+        self.__limit = min(max(self.__limit, band[0]), band[1])
+        return self.__limit
+
+    def __capacity(self, dl_speed):
+        if link_speed := config_dict['QUEUE_LINK_SPEED']:
+            return float(link_speed) * 1024**2
+        self.__peak_speed = max(dl_speed, self.__peak_speed * PEAK_DECAY)
+        return self.__peak_speed
+
+    @staticmethod
+    def __up_capacity():
+        # finished downloads go on to upload or seed, so a full uplink can't take on more of them
+        if link_speed := config_dict['QUEUE_UPLINK_SPEED'] or config_dict['QUEUE_LINK_SPEED']:
+            return float(link_speed) * 1024**2
+        return 0
+
+    def adjust(self, dl_speed, up_speed, metrics):
+        if (band := self.__band()) is None:
+            return False
+        limit = self.dl_limit()
+        capacity = self.__capacity(dl_speed)
+        # seeds and uploads outside the tasks' own counters still take the uplink
+        up_speed = max(up_speed, metrics.net_up_rate)
+        up_capacity = self.__up_capacity()
+        # a learned peak is always reached by the current speed, so only a configured link speed can be saturated
+        saturated = metrics.disk_busy >= DISK_BUSY_LIMIT or config_dict['QUEUE_LINK_SPEED'] and dl_speed >= capacity * SATURATED_RATIO \
+            or up_capacity and up_speed >= up_capacity * SATURATED_RATIO
+        if saturated and limit > band[0]:
+            self.__limit = limit - 1
+            LOGGER.info(f'Admission: download limit lowered to {self.__limit} (speed: {dl_speed:.0f}B/s, upload: {up_speed:.0f}B/s, disk busy: {metrics.disk_busy:.0f}%)')
+        elif not saturated and capacity and dl_speed < capacity * UNDERUSED_RATIO and queued_dl and len(non_queued_dl) >= limit and limit < band[1]:
+            self.__limit = limit + 1
+            LOGGER.info(f'Admission: download limit raised to {self.__limit} (speed: {dl_speed:.0f}B/s)')
+            return True
+        return False
+
+
+admission_controller = AdmissionController()
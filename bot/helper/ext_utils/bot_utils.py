@@ -1,36 +1,39 @@
 #!/usr/bin/env python3
 import platform
 from base64 import b64encode
-from datetime import datetime
 from os import path as ospath
 from pkg_resources import get_distribution, DistributionNotFound
 from aiofiles import open as aiopen
 from aiofiles.os import remove as aioremove, path as aiopath, mkdir
-from re import match as re_match
+from re import match as re_match, findall as re_findall, I
 from time import time
 from html import escape
 from uuid import uuid4
 from subprocess import run as srun
-from psutil import disk_usage, disk_io_counters, Process, cpu_percent, swap_memory, cpu_count, cpu_freq, getloadavg, virtual_memory, net_io_counters, boot_time
 from asyncio import create_subprocess_exec, create_subprocess_shell, run_coroutine_threadsafe, sleep
 from asyncio.subprocess import PIPE
 from functools import partial, wraps
 from concurrent.futures import ThreadPoolExecutor
 
 from aiohttp import ClientSession as aioClientSession
-from psutil import virtual_memory, cpu_percent, disk_usage
 from requests import get as rget
 from mega import MegaApi
 from pyrogram.enums import ChatType
 from pyrogram.types import BotCommand
 from pyrogram.errors import PeerIdInvalid
 
-from bot.helper.ext_utils.db_handler import DbManger
-from bot.helper.themes import BotTheme
+from bot.helper.ext_utils.engine_snapshot import engine_snapshot
+from bot.helper.ext_utils.task_registry import task_registry
+from bot.helper.ext_utils.sys_metrics import sys_metrics
+from bot.helper.ext_utils.storage_ledger import storage_ledger
+from bot.helper.themes import BotTheme, BotThemeBlock
 from bot.version import get_version
 from bot import OWNER_ID, bot_name, bot_cache, DATABASE_URL, LOGGER, get_client, aria2, download_dict, download_dict_lock, botStartTime, user_data, config_dict, bot_loop, extra_buttons, user
+from bot.helper.ext_utils.db_handler import db_round_trips
 from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.status_scheduler import status_scheduler
+from bot.helper.telegram_helper.rate_limiter import tg_limiter
 from bot.helper.ext_utils.telegraph_helper import telegraph
 from bot.helper.ext_utils.shortners import short_url
 
@@ -38,9 +41,6 @@ THREADPOOL   = ThreadPoolExecutor(max_workers=1000)
 MAGNET_REGEX = r'magnet:\?xt=urn:(btih|btmh):[a-zA-Z0-9]*\s*'
 URL_REGEX    = r'^(?!\/)(rtmps?:\/\/|mms:\/\/|rtsp:\/\/|https?:\/\/|ftp:\/\/)?([^\/:]+:[^\/@]+@)?(www\.)?(?=[^\/:\s]+\.[^\/:\s]+)([^\/:\s]+\.[^\/:\s]+)(:\d+)?(\/[^#\s]*[\s\S]*)?(\?[^#\s]*)?(#.*)?$'
 SIZE_UNITS   = ['B', 'KB', 'MB', 'GB', 'TB', 'PB', 'EB']
-STATUS_START = 0
-PAGES        = 1
-PAGE_NO      = 1
 
 
 class MirrorStatus:
@@ -84,24 +84,20 @@ def get_readable_file_size(size_in_bytes):
 
 async def getDownloadByGid(gid):
     async with download_dict_lock:
-        return next((dl for dl in download_dict.values() if dl.gid() == gid), None)
+        if (uid := task_registry.uid_by_gid(gid)) is not None:
+            return download_dict.get(uid)
 
 
 async def getAllDownload(req_status, user_id=None):
-    dls = []
     async with download_dict_lock:
-        for dl in list(download_dict.values()):
-            if user_id and user_id != dl.message.from_user.id:
-                continue
-            status = dl.status()
-            if req_status in ['all', status]:
-                dls.append(dl)
-    return dls
+        uids = task_registry.user_uids(user_id) if user_id else set(download_dict)
+        if req_status != 'all':
+            uids &= task_registry.status_uids(req_status)
+        return [dl for uid in uids if (dl := download_dict.get(uid)) is not None]
 
 
 async def get_user_tasks(user_id, maxtask):
-    if tasks := await getAllDownload('all', user_id):
-        return len(tasks) >= maxtask
+    return task_registry.user_count(user_id) >= maxtask
 
 
 def bt_selection_buttons(id_):
@@ -204,86 +200,92 @@ class EngineStatus:
         self.STATUS_RCLONE = f"<b>RClone📂 {version_cache['rclone']}</b>"
 
 
-def get_readable_message():
+def refresh_task_registry():
+    if not engine_snapshot.refresh():
+        return
+    for uid, download in list(download_dict.items()):
+        tstatus = download.status()
+        task_registry.update_task(uid, download.gid(), tstatus)
+        dl_speed = download.speed_raw() if tstatus == MirrorStatus.STATUS_DOWNLOADING else 0
+        up_speed = download.upload_speed_raw()
+        if tstatus == MirrorStatus.STATUS_UPLOADING:
+            up_speed += download.speed_raw()
+        task_registry.update_speed(uid, dl_speed, up_speed)
+
+
+async def engine_tick():
+    # statuses are read once per tick off the batched snapshot, renders only read the totals kept from it
+    if download_dict:
+        await sync_to_async(refresh_task_registry)
+
+
+PROGRESS_BLOCK = ('STATUS_NAME', 'BAR', 'PROCESSED', 'STATUS', 'ETA', 'SPEED', 'ELAPSED', 'ENGINE', 'STA_MODE')
+PEERS_BLOCK = ('SEEDERS', 'LEECHERS')
+SEEDING_BLOCK = ('STATUS_NAME', 'STATUS', 'SEED_SIZE', 'SEED_SPEED', 'UPLOADED', 'RATIO', 'TIME', 'SEED_ENGINE')
+USER_BLOCK = ('USER', 'ID')
+
+
+def get_status_tasks(user_id=None):
+    if user_id:
+        uids = task_registry.user_uids(user_id)
+        return [dl for uid, dl in list(download_dict.items()) if uid in uids]
+    return list(download_dict.values())
+
+
+def get_status_pages(user_id=None):
+    STATUS_LIMIT = config_dict['STATUS_LIMIT']
+    tasks = task_registry.user_count(user_id) if user_id else len(download_dict)
+    return max((tasks + STATUS_LIMIT - 1) // STATUS_LIMIT, 1)
+
+
+def get_readable_message(page_no=1, user_id=None):
     msg = ""
     button = None
     STATUS_LIMIT = config_dict['STATUS_LIMIT']
-    tasks = len(download_dict)
-    globals()['PAGES'] = (tasks + STATUS_LIMIT - 1) // STATUS_LIMIT
-    if PAGE_NO > PAGES and PAGES != 0:
-        globals()['STATUS_START'] = STATUS_LIMIT * (PAGES - 1)
-        globals()['PAGE_NO'] = PAGES
-    for download in list(download_dict.values())[STATUS_START:STATUS_LIMIT+STATUS_START]:
+    all_tasks = get_status_tasks(user_id)
+    tasks = len(all_tasks)
+    PAGES = max((tasks + STATUS_LIMIT - 1) // STATUS_LIMIT, 1)
+    PAGE_NO = min(page_no, PAGES)
+    STATUS_START = STATUS_LIMIT * (PAGE_NO - 1)
+    for download in all_tasks[STATUS_START:STATUS_LIMIT+STATUS_START]:
         msg_link = download.message.link if download.message.chat.type in [
             ChatType.SUPERGROUP, ChatType.CHANNEL] and not config_dict['DELETE_LINKS'] else ''
         elapsed = time() - download.message.date.timestamp()
-        msg += BotTheme('STATUS_NAME', Name="Task is being Processed!" if config_dict['SAFE_MODE'] and elapsed >= config_dict['STATUS_UPDATE_INTERVAL'] else escape(f'{download.name()}'))
-        if download.status() not in [MirrorStatus.STATUS_SPLITTING, MirrorStatus.STATUS_SEEDING]:
-            msg += BotTheme('BAR', Bar=f"{get_progress_bar_string(download.progress())} {download.progress()}")
-            msg += BotTheme('PROCESSED', Processed=f"{download.processed_bytes()} of {download.size()}")
-            msg += BotTheme('STATUS', Status=download.status(), Url=msg_link)
-            msg += BotTheme('ETA', Eta=download.eta())
-            msg += BotTheme('SPEED', Speed=download.speed())
-            msg += BotTheme('ELAPSED', Elapsed=get_readable_time(elapsed))
-            msg += BotTheme('ENGINE', Engine=download.eng())
-            msg += BotTheme('STA_MODE', Mode=download.upload_details['mode'])
+        status = download.status()
+        eng = download.eng()
+        format_vars = {'Name': "Task is being Processed!" if config_dict['SAFE_MODE'] and elapsed >= config_dict['STATUS_UPDATE_INTERVAL'] else escape(f'{download.name()}'),
+                       'Status': status, 'Url': msg_link, 'Engine': eng,
+                       'User': download.message.from_user.mention(style="html"),
+                       'Id': download.message.from_user.id,
+                       'Cancel': f"/{BotCommands.CancelMirror}_{download.gid()}"}
+        if status != MirrorStatus.STATUS_SEEDING:
+            var_names = PROGRESS_BLOCK
+            progress = download.progress()
+            format_vars.update(Bar=f"{get_progress_bar_string(progress)} {progress}",
+                               Processed=f"{download.processed_bytes()} of {download.size()}",
+                               Eta=download.eta(), Speed=download.speed(),
+                               Elapsed=get_readable_time(elapsed),
+                               Mode=download.upload_details['mode'])
             if hasattr(download, 'seeders_num'):
                 try:
-                    msg += BotTheme('SEEDERS', Seeders=download.seeders_num())
-                    msg += BotTheme('LEECHERS', Leechers=download.leechers_num())
+                    format_vars.update(Seeders=download.seeders_num(), Leechers=download.leechers_num())
+                    var_names += PEERS_BLOCK
                 except Exception:
                     pass
-        elif download.status() == MirrorStatus.STATUS_SEEDING:
-            msg += BotTheme('STATUS', Status=download.status(), Url=msg_link)
-            msg += BotTheme('SEED_SIZE', Size=download.size())
-            msg += BotTheme('SEED_SPEED', Speed=download.upload_speed())
-            msg += BotTheme('UPLOADED', Upload=download.uploaded_bytes())
-            msg += BotTheme('RATIO', Ratio=download.ratio())
-            msg += BotTheme('TIME', Time=download.seeding_time())
-            msg += BotTheme('SEED_ENGINE', Engine=download.eng())
         else:
-            msg += BotTheme('STATUS', Status=download.status(), Url=msg_link)
-            msg += BotTheme('STATUS_SIZE', Size=download.size())
-            msg += BotTheme('NON_ENGINE', Engine=download.eng())
-
-        msg += BotTheme('USER',
-                        User=download.message.from_user.mention(style="html"))
-        msg += BotTheme('ID', Id=download.message.from_user.id)
-        if (download.eng()).startswith("qBit"):
-            msg += BotTheme('BTSEL', Btsel=f"/{BotCommands.BtSelectCommand}_{download.gid()}")
-        msg += BotTheme('CANCEL', Cancel=f"/{BotCommands.CancelMirror}_{download.gid()}")
+            var_names = SEEDING_BLOCK
+            format_vars.update(Size=download.size(), Speed=download.upload_speed(),
+                               Upload=download.uploaded_bytes(), Ratio=download.ratio(),
+                               Time=download.seeding_time())
+        var_names += USER_BLOCK
+        if eng.startswith("qBit"):
+            var_names += ('BTSEL',)
+            format_vars['Btsel'] = f"/{BotCommands.BtSelectCommand}_{download.gid()}"
+        msg += BotThemeBlock(var_names + ('CANCEL',), **format_vars)
 
     if len(msg) == 0:
         return None, None
 
-    dl_speed = 0
-
-    def convert_speed_to_bytes_per_second(spd):
-        if 'K' in spd:
-            return float(spd.split('K')[0]) * 1024
-        elif 'M' in spd:
-            return float(spd.split('M')[0]) * 1048576
-        elif 'G' in spd:
-            return float(spd.split('G')[0]) * 1073741824
-        elif 'T' in spd:
-            return float(spd.split('T')[0]) * 1099511627776
-        else:
-            return 0
-
-    dl_speed = 0
-    up_speed = 0
-    for download in download_dict.values():
-        tstatus = download.status()
-        spd = download.speed() if tstatus != MirrorStatus.STATUS_SEEDING else download.upload_speed()
-        speed_in_bytes_per_second = convert_speed_to_bytes_per_second(spd)
-        if tstatus == MirrorStatus.STATUS_DOWNLOADING:
-            dl_speed += speed_in_bytes_per_second
-        elif tstatus in [
-            MirrorStatus.STATUS_UPLOADING,
-            MirrorStatus.STATUS_SEEDING,
-        ]:
-            up_speed += speed_in_bytes_per_second
-
     msg += BotTheme('FOOTER')
     buttons = ButtonMaker()
     buttons.ibutton(BotTheme('REFRESH', Page=f"{PAGE_NO}/{PAGES}"), "status ref")
@@ -297,33 +299,24 @@ def get_readable_message():
         buttons.ibutton(BotTheme('REFRESH', Page=f"{PAGE_NO}/{PAGES}"), "status ref")
         buttons.ibutton(BotTheme('NEXT'), "status nex")
     button = buttons.build_menu(3)
-    msg += BotTheme('Cpu', cpu=cpu_percent())
-    msg += BotTheme('FREE', free=get_readable_file_size(disk_usage(config_dict['DOWNLOAD_DIR']).free), free_p=round(100-disk_usage(config_dict['DOWNLOAD_DIR']).percent, 1))
-    msg += BotTheme('Ram', ram=virtual_memory().percent)
+    metrics = sys_metrics.snapshot
+    msg += BotTheme('Cpu', cpu=metrics.cpu)
+    msg += BotTheme('FREE', free=get_readable_file_size(metrics.dl_disk.free), free_p=round(100-metrics.dl_disk.percent, 1))
+    msg += BotTheme('Ram', ram=metrics.memory.percent)
     msg += BotTheme('uptime', uptime=get_readable_time(time() - botStartTime))
-    msg += BotTheme('DL', DL=get_readable_file_size(dl_speed))
-    msg += BotTheme('UL', UL=get_readable_file_size(up_speed))
+    msg += BotTheme('DL', DL=get_readable_file_size(max(task_registry.dl_speed, 0)))
+    msg += BotTheme('UL', UL=get_readable_file_size(max(task_registry.up_speed, 0)))
     return msg, button
 
 
-async def turn_page(data):
-    STATUS_LIMIT = config_dict['STATUS_LIMIT']
-    global STATUS_START, PAGE_NO
-    async with download_dict_lock:
-        if data[1] == "nex":
-            if PAGE_NO == PAGES:
-                STATUS_START = 0
-                PAGE_NO = 1
-            else:
-                STATUS_START += STATUS_LIMIT
-                PAGE_NO += 1
-        elif data[1] == "pre":
-            if PAGE_NO == 1:
-                STATUS_START = STATUS_LIMIT * (PAGES - 1)
-                PAGE_NO = PAGES
-            else:
-                STATUS_START -= STATUS_LIMIT
-                PAGE_NO -= 1
+def turn_page(data, page_no, user_id=None):
+    PAGES = get_status_pages(user_id)
+    page_no = min(page_no, PAGES)
+    if data[1] == "nex":
+        return 1 if page_no == PAGES else page_no + 1
+    elif data[1] == "pre":
+        return PAGES if page_no == 1 else page_no - 1
+    return page_no
 
 
 def get_readable_time(seconds):
@@ -336,6 +329,18 @@ def get_readable_time(seconds):
     return result
 
 
+def text_size_to_bytes(size_text):
+    if not (match := re_match(r'([\d.]+)\s*([KMGTPE]?)i?B', size_text.strip(), I)):
+        return 0
+    size, unit = match.groups()
+    return float(size) * 1024 ** SIZE_UNITS.index(f'{unit.upper()}B')
+
+
+def text_time_to_seconds(time_text):
+    periods = {'w': 604800, 'd': 86400, 'h': 3600, 'm': 60, 's': 1}
+    return sum(int(value) * periods[unit] for value, unit in re_findall(r'(\d+)([wdhms])', time_text))
+
+
 def is_magnet(url):
     return bool(re_match(MAGNET_REGEX, url))
 
@@ -514,10 +519,11 @@ async def get_stats(event, key="home"):
         btns.ibutton('Bot Limits', f'wzmlx {user_id} stats botlimits')
         msg = "⌬ <b><i>Bot & OS Statistics!</i></b>"
     elif key == "stbot":
-        total, used, free, disk = disk_usage('/')
-        swap = swap_memory()
-        memory = virtual_memory()
-        disk_io = disk_io_counters()
+        metrics = sys_metrics.snapshot
+        total, used, free, disk = metrics.disk
+        swap = metrics.swap
+        memory = metrics.memory
+        disk_io = metrics.disk_io
         msg = BotTheme(
             'BOT_STATS',
             bot_uptime=get_readable_time(time() - botStartTime),
@@ -543,25 +549,36 @@ async def get_stats(event, key="home"):
             disk_u=get_readable_file_size(used),
             disk_f=get_readable_file_size(free),
         )
+        reserved, written, outstanding = storage_ledger.usage()
+        msg += f"\n\n<b>Storage Reservations</b>\n┠ <b>Reserved:</b> {get_readable_file_size(reserved)} | <b>Written:</b> {get_readable_file_size(written)}\n┖ <b>Outstanding:</b> {get_readable_file_size(outstanding)} | <b>Free after:</b> {get_readable_file_size(max(metrics.dl_disk.free - outstanding, 0))}"
+        if status_intervals := status_scheduler.intervals():
+            msg += "\n\n<b>Status Edit Intervals</b>\n"
+            msg += "\n".join(f"┠ <code>{chat_id}</code>: {get_readable_time(interval)} | FloodWaits: {floods}" for chat_id, (interval, floods) in status_intervals.items())
+        limiter = tg_limiter.stats()
+        msg += f"\n\n<b>Telegram Rate Limiter</b>\n┠ <b>Calls:</b> {limiter['calls']} | <b>Waited:</b> {limiter['waits']} ({get_readable_time(limiter['waited']) or '0s'})\n┖ <b>FloodWaits:</b> {limiter['floods']}"
+        if DATABASE_URL and (round_trips := db_round_trips.counts()):
+            msg += f"\n\n<b>DB Round Trips:</b> {db_round_trips.total()}\n"
+            msg += "\n".join(f"┠ <b>{name}:</b> {count}" for name, count in sorted(round_trips.items(), key=lambda x: -x[1]))
     elif key == "stsys":
-        cpuUsage = cpu_percent(interval=0.5)
+        metrics = sys_metrics.snapshot
+        net_io = metrics.net_io
         msg = BotTheme('SYS_STATS',
-            os_uptime=get_readable_time(time() - boot_time()),
+            os_uptime=get_readable_time(time() - sys_metrics.boot_time),
             os_version=platform.version(),
             os_arch=platform.platform(),
-            up_data=get_readable_file_size(net_io_counters().bytes_sent),
-            dl_data=get_readable_file_size(net_io_counters().bytes_recv),
-            pkt_sent=str(net_io_counters().packets_sent)[:-3],
-            pkt_recv=str(net_io_counters().packets_recv)[:-3],
-            tl_data=get_readable_file_size(net_io_counters().bytes_recv + net_io_counters().bytes_sent),
-            cpu=cpuUsage,
-            cpu_bar=get_progress_bar_string(cpuUsage),
-            cpu_freq=f"{cpu_freq(percpu=False).current / 1000:.2f} GHz" if cpu_freq() else "Access Denied",
-            sys_load="%, ".join(str(round((x / cpu_count() * 100), 2)) for x in getloadavg()) + "%, (1m, 5m, 15m)",
-            p_core=cpu_count(logical=False),
-            v_core=cpu_count(logical=True) - cpu_count(logical=False),
-            total_core=cpu_count(logical=True),
-            cpu_use=len(Process().cpu_affinity()),
+            up_data=f"{get_readable_file_size(net_io.bytes_sent)} ({get_readable_file_size(metrics.net_up_rate)}/s)",
+            dl_data=f"{get_readable_file_size(net_io.bytes_recv)} ({get_readable_file_size(metrics.net_dl_rate)}/s)",
+            pkt_sent=str(net_io.packets_sent)[:-3],
+            pkt_recv=str(net_io.packets_recv)[:-3],
+            tl_data=get_readable_file_size(net_io.bytes_recv + net_io.bytes_sent),
+            cpu=metrics.cpu,
+            cpu_bar=get_progress_bar_string(metrics.cpu),
+            cpu_freq=f"{metrics.cpu_freq / 1000:.2f} GHz" if metrics.cpu_freq else "Access Denied",
+            sys_load="%, ".join(str(round((x / sys_metrics.total_core * 100), 2)) for x in metrics.load_avg) + "%, (1m, 5m, 15m)",
+            p_core=sys_metrics.p_core,
+            v_core=sys_metrics.total_core - sys_metrics.p_core,
+            total_core=sys_metrics.total_core,
+            cpu_use=sys_metrics.cpu_use,
         )
     elif key == "strepo":
         last_commit, changelog = 'No Data', 'N/A'
@@ -595,41 +612,6 @@ async def get_stats(event, key="home"):
     return msg, btns.build_menu(2)
 
 
-async def getdailytasks(user_id, increase_task=False, upleech=0, upmirror=0, check_mirror=False, check_leech=False):
-    task, lsize, msize = 0, 0, 0
-    if user_id in user_data and user_data[user_id].get('dly_tasks'):
-        userdate, task, lsize, msize = user_data[user_id]['dly_tasks']
-        nowdate = datetime.now()
-        if userdate.year <= nowdate.year and userdate.month <= nowdate.month and userdate.day < nowdate.day:
-            task, lsize, msize = 0, 0, 0
-            if increase_task:
-                task = 1
-            elif upleech != 0:
-                lsize += upleech
-            elif upmirror != 0:
-                msize += upmirror
-        elif increase_task:
-            task += 1
-        elif upleech != 0:
-            lsize += upleech
-        elif upmirror != 0:
-            msize += upmirror
-    elif increase_task:
-        task += 1
-    elif upleech != 0:
-        lsize += upleech
-    elif upmirror != 0:
-        msize += upmirror
-    update_user_ldata(user_id, 'dly_tasks', [datetime.now(), task, lsize, msize])
-    if DATABASE_URL:
-        await DbManger().update_user_data(user_id)
-    if check_leech:
-        return lsize
-    elif check_mirror:
-        return msize
-    return task
-
-
 async def fetch_user_tds(user_id, force=False):
     user_dict = user_data.get(user_id, {})
     if config_dict['USER_TD_MODE'] and user_dict.get('td_mode', False) or force:
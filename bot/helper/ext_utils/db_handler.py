@@ -1,11 +1,63 @@
 #!/usr/bin/env python3
-from aiofiles.os import path as aiopath, makedirs
+from aiofiles.os import path as aiopath
 from aiofiles import open as aiopen
+from threading import Lock
+from collections import Counter
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 from pymongo.errors import PyMongoError
+from pymongo.monitoring import CommandListener
 from dotenv import dotenv_values
 
-from bot import DATABASE_URL, user_data, rss_dict, LOGGER, bot_id, config_dict, aria2_options, qbit_options, bot_loop
+from bot import DATABASE_URL, user_data, rss_dict, LOGGER, bot_id, config_dict, aria2_options, qbit_options, bot_loop, handler_name
+
+
+DB_MAX_POOL = 20
+DB_MIN_POOL = 2
+
+
+class DbRoundTrips(CommandListener):
+    # motor runs commands on its executor with a copy of the caller's context, so the handler name follows them
+    def __init__(self):
+        self.__lock = Lock()
+        self.__counts = Counter()
+
+    def started(self, event):
+        with self.__lock:
+            self.__counts[handler_name.get()] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def counts(self):
+        with self.__lock:
+            return dict(self.__counts)
+
+    def total(self):
+        with self.__lock:
+            return sum(self.__counts.values())
+
+
+db_round_trips = DbRoundTrips()
+db_client = None
+
+
+def get_db_client():
+    global db_client
+    if db_client is None:
+        db_client = AsyncIOMotorClient(DATABASE_URL, maxPoolSize=DB_MAX_POOL, minPoolSize=DB_MIN_POOL,
+                                       event_listeners=[db_round_trips])
+    return db_client
+
+
+def close_db_client():
+    global db_client
+    if db_client is not None:
+        db_client.close()
+        db_client = None
 
 
 class DbManger:
@@ -17,7 +69,7 @@ class DbManger:
 
     def __connect(self):
         try:
-            self.__conn = AsyncIOMotorClient(DATABASE_URL)
+            self.__conn = get_db_client()
             self.__db = self.__conn.wzmlx # New Section for not conflicting with mltb section !!
         except PyMongoError as e:
             LOGGER.error(f"Error in DB connection: {e}")
@@ -36,27 +88,20 @@ class DbManger:
             await self.__db.settings.qbittorrent.update_one({'_id': bot_id}, {'$set': qbit_options}, upsert=True)
         # User Data
         if await self.__db.users[bot_id].find_one():
-            rows = self.__db.users[bot_id].find({})
-            # return a dict ==> {_id, is_sudo, is_auth, as_doc, thumb, yt_opt, media_group, equal_splits, split_size, rclone}
+            # blobs are written to disk on first use by user_doc_cache, only mark their local paths here
+            rows = self.__db.users[bot_id].find({}, {'thumb': 0, 'rclone': 0})
+            # return a dict ==> {_id, is_sudo, is_auth, as_doc, yt_opt, media_group, equal_splits, split_size}
             async for row in rows:
                 uid = row['_id']
                 del row['_id']
-                thumb_path = f'Thumbnails/{uid}.jpg'
-                rclone_path = f'rclone/{uid}.conf'
-                if row.get('thumb'):
-                    if not await aiopath.exists('Thumbnails'):
-                        await makedirs('Thumbnails')
-                    async with aiopen(thumb_path, 'wb+') as f:
-                        await f.write(row['thumb'])
-                    row['thumb'] = thumb_path
-                if row.get('rclone'):
-                    if not await aiopath.exists('rclone'):
-                        await makedirs('rclone')
-                    async with aiopen(rclone_path, 'wb+') as f:
-                        await f.write(row['rclone'])
-                    row['rclone'] = rclone_path
                 user_data[uid] = row
+            for key, path in (('thumb', 'Thumbnails/{}.jpg'), ('rclone', 'rclone/{}.conf')):
+                async for row in self.__db.users[bot_id].find({key: {'$nin': ['', None]}}, {'_id': 1}):
+                    if (uid := row['_id']) in user_data:
+                        user_data[uid][key] = path.format(uid)
             LOGGER.info("Users data has been imported from Database")
+        # Broadcast Data
+        await self.__db.broadcast_msgs[bot_id].create_index('bc_id')
         # Rss Data
         if await self.__db.rss[bot_id].find_one():
             # return a dict ==> {_id, title: {link, last_feed, last_name, inf, exf, command, paused}
@@ -66,32 +111,27 @@ class DbManger:
                 del row['_id']
                 rss_dict[user_id] = row
             LOGGER.info("Rss data has been imported from Database.")
-        self.__conn.close
 
     async def update_deploy_config(self):
         if self.__err:
             return
         current_config = dict(dotenv_values('config.env'))
         await self.__db.settings.deployConfig.replace_one({'_id': bot_id}, current_config, upsert=True)
-        self.__conn.close
 
     async def update_config(self, dict_):
         if self.__err:
             return
         await self.__db.settings.config.update_one({'_id': bot_id}, {'$set': dict_}, upsert=True)
-        self.__conn.close
 
     async def update_aria2(self, key, value):
         if self.__err:
             return
         await self.__db.settings.aria2c.update_one({'_id': bot_id}, {'$set': {key: value}}, upsert=True)
-        self.__conn.close
 
     async def update_qbittorrent(self, key, value):
         if self.__err:
             return
         await self.__db.settings.qbittorrent.update_one({'_id': bot_id}, {'$set': {key: value}}, upsert=True)
-        self.__conn.close
 
     async def update_private_file(self, path):
         if self.__err:
@@ -105,19 +145,12 @@ class DbManger:
         await self.__db.settings.files.update_one({'_id': bot_id}, {'$set': {path: pf_bin}}, upsert=True)
         if path == 'config.env':
             await self.update_deploy_config()
-        else:
-            self.__conn.close
 
-    async def update_user_data(self, user_id):
+    async def update_users(self, updates):
         if self.__err:
             return
-        data = user_data[user_id]
-        if data.get('thumb'):
-            del data['thumb']
-        if data.get('rclone'):
-            del data['rclone']
-        await self.__db.users[bot_id].replace_one({'_id': user_id}, data, upsert=True)
-        self.__conn.close
+        await self.__db.users[bot_id].bulk_write([UpdateOne({'_id': user_id}, update, upsert=True)
+                                                  for user_id, update in updates.items()], ordered=False)
 
     async def update_user_doc(self, user_id, key, path=''):
         if self.__err:
@@ -128,7 +161,12 @@ class DbManger:
         else:
             doc_bin = ''
         await self.__db.users[bot_id].update_one({'_id': user_id}, {'$set': {key: doc_bin}}, upsert=True)
-        self.__conn.close
+
+    async def get_user_doc(self, user_id, key):
+        if self.__err:
+            return
+        row = await self.__db.users[bot_id].find_one({'_id': user_id}, {key: 1})
+        return row.get(key) if row else None
 
     async def get_pm_uids(self):
         if self.__err:
@@ -141,44 +179,74 @@ class DbManger:
         if not bool(await self.__db.pm_users[bot_id].find_one({'_id': user_id})):
             await self.__db.pm_users[bot_id].insert_one({'_id': user_id})
             LOGGER.info(f'New PM User Added : {user_id}')
-        self.__conn.close
         
     async def rm_pm_user(self, user_id):
         if self.__err:
             return
         await self.__db.pm_users[bot_id].delete_one({'_id': user_id})
-        self.__conn.close
+
+    async def iter_pm_uids(self):
+        if self.__err:
+            return
+        async for doc in self.__db.pm_users[bot_id].find({}, {'_id': 1}):
+            yield doc['_id']
+
+    async def pm_users_count(self):
+        if self.__err:
+            return 0
+        return await self.__db.pm_users[bot_id].estimated_document_count()
+
+    async def update_broadcast(self, bc_id, data):
+        if self.__err:
+            return
+        await self.__db.broadcasts[bot_id].update_one({'_id': bc_id}, {'$set': data}, upsert=True)
+
+    async def get_broadcast(self, bc_id):
+        if self.__err:
+            return
+        return await self.__db.broadcasts[bot_id].find_one({'_id': bc_id})
+
+    async def add_broadcast_msgs(self, bc_id, msgs):
+        if self.__err:
+            return
+        await self.__db.broadcast_msgs[bot_id].insert_many([{'bc_id': bc_id, 'uid': uid, 'msg_id': msg_id} for uid, msg_id in msgs], ordered=False)
+
+    async def iter_broadcast_msgs(self, bc_id):
+        if self.__err:
+            return
+        async for doc in self.__db.broadcast_msgs[bot_id].find({'bc_id': bc_id}, {'_id': 0, 'uid': 1, 'msg_id': 1}):
+            yield doc['uid'], doc['msg_id']
+
+    async def rm_broadcast_msgs(self, bc_id, uids):
+        if self.__err:
+            return
+        await self.__db.broadcast_msgs[bot_id].delete_many({'bc_id': bc_id, 'uid': {'$in': uids}})
         
     async def rss_update_all(self):
         if self.__err:
             return
         for user_id in list(rss_dict.keys()):
             await self.__db.rss[bot_id].replace_one({'_id': user_id}, rss_dict[user_id], upsert=True)
-        self.__conn.close
 
     async def rss_update(self, user_id):
         if self.__err:
             return
         await self.__db.rss[bot_id].replace_one({'_id': user_id}, rss_dict[user_id], upsert=True)
-        self.__conn.close
 
     async def rss_delete(self, user_id):
         if self.__err:
             return
         await self.__db.rss[bot_id].delete_one({'_id': user_id})
-        self.__conn.close
 
     async def add_incomplete_task(self, cid, link, tag, msg_link, msg):
         if self.__err:
             return
         await self.__db.tasks[bot_id].insert_one({'_id': link, 'cid': cid, 'tag': tag, 'source': msg_link, 'org_msg': msg})
-        self.__conn.close
 
     async def rm_complete_task(self, link):
         if self.__err:
             return
         await self.__db.tasks[bot_id].delete_one({'_id': link})
-        self.__conn.close
 
     async def get_incomplete_tasks(self):
         notifier_dict = {}
@@ -196,14 +264,12 @@ class DbManger:
                 else:
                     notifier_dict[row['cid']] = {row['tag']: [{row['_id']: row['source']}]}
         await self.__db.tasks[bot_id].drop()
-        self.__conn.close
         return notifier_dict  # return a dict ==> {cid: {tag: [{_id: source}, {_id, source}, ...]}}
 
     async def trunc_table(self, name):
         if self.__err:
             return
         await self.__db[name][bot_id].drop()
-        self.__conn.close
 
 if DATABASE_URL:
     bot_loop.run_until_complete(DbManger().db_load())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+from time import time
+from threading import Lock
+from aria2p import Download
+
+from bot import aria2, get_client, config_dict, QbTorrents, LOGGER
+
+# well under the usual STATUS_UPDATE_INTERVAL, so statuses are served from the snapshot between ticks
+TICK_INTERVAL = 2
+
+
+class EngineSnapshot:
+    def __init__(self):
+        self.__lock = Lock()
+        self.__qb_client = None
+        self.__torrents = {}
+        self.__downloads = {}
+        self.__updated = 0
+
+    def __fetch_torrents(self):
+        if not QbTorrents:
+            return {}
+        try:
+            if self.__qb_client is None:
+                self.__qb_client = get_client()
+            return {tor.tags: tor for tor in self.__qb_client.torrents_info()}
+        except Exception as e:
+            LOGGER.error(f'{e}: Qbittorrent, while taking engine snapshot')
+            self.__qb_client = None
+            return {}
+
+    def __fetch_downloads(self):
+        try:
+            active, waiting = aria2.client.multicall2([(aria2.client.TELL_ACTIVE, []),
+                                                       (aria2.client.TELL_WAITING, [0, 1000])])
+            return {struct['gid']: Download(aria2, struct) for struct in active[0] + waiting[0]}
+        except Exception as e:
+            LOGGER.error(f'{e}: Aria2c, while taking engine snapshot')
+            return {}
+
+    def refresh(self, force=False):
+        with self.__lock:
+            if not force and time() - self.__updated < 1:
+                return False
+            self.__torrents = self.__fetch_torrents()
+            self.__downloads = self.__fetch_downloads()
+            self.__updated = time()
+            return True
+
+    def __is_fresh(self):
+        return time() - self.__updated < config_dict['STATUS_UPDATE_INTERVAL']
+
+    def torrent(self, tag):
+        return self.__torrents.get(tag) if self.__is_fresh() else None
+
+    def download(self, gid):
+        return self.__downloads.get(gid) if self.__is_fresh() else None
+
+
+engine_snapshot = EngineSnapshot()
@@ -4,23 +4,29 @@ from aiofiles.os import remove as aioremove, path as aiopath, listdir, rmdir, ma
 from aioshutil import rmtree as aiormtree
 from shutil import rmtree, disk_usage
 from magic import Magic
-from re import split as re_split, I, search as re_search
-from subprocess import run as srun
+from re import split as re_split, I, search as re_search, sub as re_sub, fullmatch as re_fullmatch
 from sys import exit as sexit
 
 from .exceptions import NotSupportedExtractionArchive
-from bot import aria2, LOGGER, DOWNLOAD_DIR, get_client, GLOBAL_EXTENSION_FILTER
+from bot import aria2, LOGGER, DOWNLOAD_DIR, get_client, GLOBAL_EXTENSION_FILTER, bot_loop
 from bot.helper.ext_utils.bot_utils import sync_to_async, cmd_exec
+from bot.helper.ext_utils.storage_ledger import storage_ledger
+from bot.helper.ext_utils.media_probe import media_probe
+from bot.helper.ext_utils.user_data_writer import user_data_writer
 
 ARCH_EXT = [".tar.bz2", ".tar.gz", ".bz2", ".gz", ".tar.xz", ".tar", ".tbz2", ".tgz", ".lzma2",
             ".zip", ".7z", ".z", ".rar", ".iso", ".wim", ".cab", ".apm", ".arj", ".chm",
             ".cpio", ".cramfs", ".deb", ".dmg", ".fat", ".hfs", ".lzh", ".lzma", ".mbr",
             ".msi", ".mslz", ".nsis", ".ntfs", ".rpm", ".squashfs", ".udf", ".vhd", ".xar"]
 
+exit_task = None
+
 FIRST_SPLIT_REGEX = r'(\.|_)part0*1\.rar$|(\.|_)7z\.0*1$|(\.|_)zip\.0*1$|^(?!.*(\.|_)part\d+\.rar$).*\.rar$'
 
 SPLIT_REGEX = r'\.r\d+$|\.7z\.\d+$|\.z\d+$|\.zip\.\d+$'
 
+VOLUME_REGEX = r'(\.|_)part\d+\.rar|\.rar|\.r\d+|(\.|_)7z\.\d+|(\.|_)zip\.\d+|\.zip|\.z\d+'
+
 
 def is_first_archive_split(file):
     return bool(re_search(FIRST_SPLIT_REGEX, file))
@@ -34,6 +40,14 @@ def is_archive_split(file):
     return bool(re_search(SPLIT_REGEX, file))
 
 
+def get_split_volumes(file, files):
+    # 7z reads every volume of a set when it is given the first one
+    if not is_first_archive_split(file):
+        return [file]
+    stem = re_sub(r'((\.|_)part0*1\.rar|(\.|_)7z\.0*1|(\.|_)zip\.0*1|\.rar)$', '', file)
+    return [f for f in files if f.startswith(stem) and re_fullmatch(VOLUME_REGEX, f[len(stem):])]
+
+
 async def clean_target(path):
     if await aiopath.exists(path):
         LOGGER.info(f"Cleaning Target: {path}")
@@ -50,6 +64,7 @@ async def clean_target(path):
 
 
 async def clean_download(path):
+    media_probe.forget(path)
     if await aiopath.exists(path):
         LOGGER.info(f"Cleaning Download: {path}")
         try:
@@ -76,16 +91,25 @@ def clean_all():
         pass
 
 
-def exit_clean_up(signal, frame):
+async def clean_up_and_exit(serving):
+    LOGGER.info(
+        "Please wait, while we clean up and stop the running downloads")
     try:
-        LOGGER.info(
-            "Please wait, while we clean up and stop the running downloads")
-        clean_all()
-        srun(['pkill', '-9', '-f', 'gunicorn|aria2c|qbittorrent-nox|ffmpeg'])
-        sexit(0)
-    except KeyboardInterrupt:
+        # user settings and quota charges still waiting for the periodic flush would be lost
+        await user_data_writer.flush()
+        await sync_to_async(clean_all)
+        await cmd_exec(['pkill', '-9', '-f', 'gunicorn|aria2c|qbittorrent-nox|ffmpeg'])
+    finally:
+        # the serving task returns and the clients are stopped before the loop closes
+        serving.cancel()
+
+
+def exit_clean_up(serving):
+    global exit_task
+    if exit_task is not None:
         LOGGER.warning("Force Exiting before the cleanup finishes!")
         sexit(1)
+    exit_task = bot_loop.create_task(clean_up_and_exit(serving))
 
 
 async def clean_unwanted(path):
@@ -142,16 +166,19 @@ def get_mime_type(file_path):
     return mime_type
 
 
-def check_storage_threshold(size, threshold, arch=False, alloc=False):
-    free = disk_usage(DOWNLOAD_DIR).free
-    if not alloc:
-        if (not arch and free - size < threshold or arch and free - (size * 2) < threshold):
-            return False
-    elif not arch:
-        if free < threshold:
+def check_storage_threshold(size, threshold, arch=False, alloc=False, uid=None):
+    with storage_ledger.admission_lock:
+        free = disk_usage(DOWNLOAD_DIR).free - storage_ledger.outstanding(exclude=uid)
+        if not alloc:
+            if (not arch and free - size < threshold or arch and free - (size * 2) < threshold):
+                return False
+        elif not arch:
+            if free < threshold:
+                return False
+        elif free - size < threshold:
             return False
-    elif free - size < threshold:
-        return False
+        if uid is not None:
+            storage_ledger.reserve(uid, size * 2 if arch else size)
     return True
 
 
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+from hashlib import new as hash_new
+from collections import OrderedDict
+from asyncio import Semaphore
+from aiofiles.os import stat as aiostat
+
+from bot import LOGGER, bot_loop, config_dict, user_data
+from bot.helper.ext_utils.bot_utils import sync_to_async
+
+HASH_ALGOS = ('md5', 'sha1', 'sha256')
+HASH_BUFFER = 8 * 1024 * 1024
+HASH_WORKERS = 2
+MAX_CACHED = 1024
+
+
+def caption_algos(user_id):
+    lcaption = config_dict['LEECH_FILENAME_CAPTION'] if (val := user_data.get(user_id, {}).get('lcaption', '')) == '' else val
+    caption = lcaption.split('|')[0].lower()
+    return [algo for algo in HASH_ALGOS if f'{{{algo}_hash}}' in caption]
+
+
+class FileHasher:
+    def __init__(self, algos):
+        self.__hashers = {algo: hash_new(algo) for algo in algos}
+        self.__view = memoryview(bytearray(HASH_BUFFER))
+        self.offset = 0
+
+    def read(self, path, end=None):
+        with open(path, 'rb', buffering=0) as f:
+            f.seek(self.offset)
+            while end is None or self.offset < end:
+                view = self.__view if end is None else self.__view[:min(HASH_BUFFER, end - self.offset)]
+                if not (size := f.readinto(view)):
+                    break
+                for hasher in self.__hashers.values():
+                    hasher.update(view[:size])
+                self.offset += size
+        return self
+
+    def digests(self):
+        return {algo: hasher.hexdigest() for algo, hasher in self.__hashers.items()}
+
+
+class HashFollower:
+    # hashes a file that is being written sequentially, so its digests are ready when the download ends
+    def __init__(self, path, algos):
+        self.__path = path
+        self.__hasher = FileHasher(algos)
+        self.__end = 0
+        self.__task = None
+
+    async def __catch_up(self):
+        while self.__hasher.offset < self.__end:
+            offset = self.__hasher.offset
+            try:
+                await sync_to_async(self.__hasher.read, self.__path, self.__end)
+            except OSError:
+                return
+            if self.__hasher.offset == offset:
+                return
+
+    def update(self, end):
+        self.__end = end
+        if self.__task is None or self.__task.done():
+            self.__task = bot_loop.create_task(self.__catch_up())
+
+    async def finish(self, path):
+        if self.__task is not None:
+            await self.__task
+        await sync_to_async(self.__hasher.read, path)
+        return self.__hasher.digests()
+
+
+class HashService:
+    def __init__(self):
+        self.__cache = OrderedDict()
+        self.__pending = {}
+        self.__slots = Semaphore(HASH_WORKERS)
+
+    @staticmethod
+    async def __identity(path, offset=0, length=None):
+        # renames keep the inode and mtime, so a digest survives the upload renaming the file
+        st = await aiostat(path)
+        return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, offset, length
+
+    def __store(self, key, digests):
+        self.__cache.setdefault(key, {}).update(digests)
+        self.__cache.move_to_end(key)
+        while len(self.__cache) > MAX_CACHED:
+            self.__cache.popitem(last=False)
+
+    async def digest(self, path, algos=('md5',), offset=0, length=None):
+        key = await self.__identity(path, offset, length)
+        while True:
+            cached = self.__cache.get(key, {})
+            if all(algo in cached for algo in algos):
+                return {algo: cached[algo] for algo in algos}
+            if (pending := self.__pending.get(key)) is not None:
+                await pending
+                continue
+            self.__pending[key] = future = bot_loop.create_future()
+            try:
+                async with self.__slots:
+                    hasher = FileHasher([algo for algo in algos if algo not in cached])
+                    hasher.offset = offset
+                    await sync_to_async(hasher.read, path, None if length is None else offset + length)
+                self.__store(key, hasher.digests())
+            finally:
+                del self.__pending[key]
+                future.set_result(None)
+
+    async def known(self, path):
+        # digests of the whole file that are already cached, nothing is hashed for this
+        try:
+            key = await self.__identity(path)
+        except OSError:
+            return {}
+        return dict(self.__cache.get(key, {}))
+
+    async def __prefetch(self, path, algos, offset, length):
+        try:
+            await self.digest(path, algos, offset, length)
+        except Exception as e:
+            LOGGER.debug(f'Hash Service: {e} for {path}')
+
+    def prefetch(self, path, algos, offset=0, length=None):
+        bot_loop.create_task(self.__prefetch(path, algos, offset, length))
+
+    def follow(self, path, algos):
+        return HashFollower(path, algos)
+
+    async def __complete(self, path, follower):
+        try:
+            key = await self.__identity(path)
+        except OSError:
+            return
+        if key in self.__pending:
+            return
+        self.__pending[key] = future = bot_loop.create_future()
+        try:
+            self.__store(key, await follower.finish(path))
+        except Exception as e:
+            LOGGER.debug(f'Hash Service: {e} for {path}')
+        finally:
+            del self.__pending[key]
+            future.set_result(None)
+
+    def complete(self, path, follower):
+        bot_loop.create_task(self.__complete(path, follower))
+
+
+hash_service = HashService()
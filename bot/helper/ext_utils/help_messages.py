@@ -353,7 +353,7 @@ f'''⌬ <b><i>Users Commands!</i></b>
 ┖ /login: Login to Bot to Access Bot without Temp Pass System (Private)
 
 <b>Bot Stats:</b>
-┠ /{BotCommands.StatusCommand[0]} or /{BotCommands.StatusCommand[1]}: Shows a status page of all active tasks.
+┠ /{BotCommands.StatusCommand[0]} or /{BotCommands.StatusCommand[1]}: Shows a status page of all active tasks. Add <code>me</code> to only show your own tasks.
 ┠ /{BotCommands.StatsCommand[0]} or /{BotCommands.StatsCommand[1]}: Show Server detailed stats.
 ┖ /{BotCommands.PingCommand[0]} or /{BotCommands.PingCommand[1]}: Check how long it takes to Ping the Bot.
 
@@ -495,6 +495,8 @@ default_desp = {'AS_DOCUMENT': 'Default type of Telegram file upload. Default is
                 'DEBRID_LINK_API': 'Set debrid-link.com API for 172 Supported Hosters Leeching Support. Str',
                 'REAL_DEBRID_API': 'Set real-debrid.com API for Torrent Cache & Few Supported Hosters (VPN Maybe). Str',
                 'LEECH_SPLIT_SIZE': 'Size of split in bytes. Default is 2GB. Default is 4GB if your account is premium.',
+                'LEECH_UPLOAD_WIDTH': 'Number of files/parts of one leech task uploaded to Telegram at the same time. Messages are still sent in order. Default is 3. Int',
+                'LEECH_BOT_TOKENS': 'Extra bot tokens used beside the bot and the premium user session to upload leech files in parallel. The bots must be admins in LEECH_LOG_ID or member of the superGroup. Separate them by space. Str',
                 'MEDIA_GROUP': 'View Uploaded splitted file parts in media group. Default is False.',
                 'MEGA_EMAIL': 'E-Mail used to sign-in on mega.nz for using premium account. Str',
                 'MEGA_PASSWORD': 'Password for mega.nz account. Str',
@@ -502,6 +504,10 @@ default_desp = {'AS_DOCUMENT': 'Default type of Telegram file upload. Default is
                 'QUEUE_ALL': 'Number of parallel tasks of downloads and uploads. For example if 20 task added and QUEUE_ALL is 8, then the summation of uploading and downloading tasks are 8 and the rest in queue. Int. NOTE: if you want to fill QUEUE_DOWNLOAD or QUEUE_UPLOAD, then QUEUE_ALL value must be greater than or equal to the greatest one and less than or equal to summation of QUEUE_UPLOAD and QUEUE_DOWNLOAD',
                 'QUEUE_DOWNLOAD': 'Number of all parallel downloading tasks. Int',
                 'QUEUE_UPLOAD': 'Number of all parallel uploading tasks. Int',
+                'QUEUE_SJF_SIZE': 'Queued tasks at or below this size start before bigger ones of the same priority. Queues are otherwise shared round-robin between users and sudo/owner tasks go first. the default unit is GB. Float',
+                'QUEUE_DOWNLOAD_MAX': 'Upper bound of parallel downloads when the link is underused. QUEUE_DOWNLOAD is used as the lower bound and both must be set. Int',
+                'QUEUE_LINK_SPEED': 'Download link capacity used by QUEUE_DOWNLOAD_MAX to detect a saturated link. Learned from peak speed if empty. the default unit is MB/s. Float',
+                'QUEUE_UPLINK_SPEED': 'Upload link capacity used by QUEUE_DOWNLOAD_MAX to hold back new downloads while uploads and seeds fill the uplink. QUEUE_LINK_SPEED is used if empty. the default unit is MB/s. Float',
                 'RCLONE_FLAGS': 'key:value|key|key|key:value . Check here all RcloneFlags.',
                 'RCLONE_PATH': "Default rclone path to which you want to upload all the mirrors using rclone.",
                 'RCLONE_SERVE_URL': 'Valid URL where the bot is deployed to use rclone serve. Format of URL should be http://myip, where myip is the IP/Domain(public) of your bot or if you have chosen port other than 80 so write it in this format http://myip:port (http and not https)',
@@ -1,36 +1,32 @@
-from hashlib import md5
-from time import strftime, gmtime, time
+from time import time
+from math import floor
 from re import sub as re_sub, search as re_search
 from shlex import split as ssplit
-from natsort import natsorted
-from os import path as ospath
-from aiofiles.os import remove as aioremove, path as aiopath, mkdir, makedirs, listdir
-from aioshutil import rmtree as aiormtree
+from csv import reader as csv_reader
+from os import path as ospath, close as osclose, SEEK_SET, SEEK_CUR, SEEK_END
+from tempfile import mkstemp
+from io import RawIOBase
+from aiofiles import open as aiopen
+from aiofiles.os import remove as aioremove, path as aiopath, mkdir
 from contextlib import suppress
-from asyncio import create_subprocess_exec, create_task, gather, Semaphore
+from asyncio import create_subprocess_exec, create_task, gather, wait_for, Event, TimeoutError
 from asyncio.subprocess import PIPE
-from telegraph import upload_file
 from langcodes import Language
 
 from bot import LOGGER, MAX_SPLIT_SIZE, config_dict, user_data
 from bot.modules.mediainfo import parseinfo
 from bot.helper.ext_utils.bot_utils import cmd_exec, sync_to_async, get_readable_file_size, get_readable_time
 from bot.helper.ext_utils.fs_utils import ARCH_EXT, get_mime_type
+from bot.helper.ext_utils.media_probe import media_probe
+from bot.helper.ext_utils.hash_service import hash_service, HASH_ALGOS
+from bot.helper.ext_utils.screenshot_engine import ss_engine
 from bot.helper.ext_utils.telegraph_helper import telegraph
 
 
 async def is_multi_streams(path):
-    try:
-        result = await cmd_exec(["ffprobe", "-hide_banner", "-loglevel", "error", "-print_format",
-                                 "json", "-show_streams", path])
-        if res := result[1]:
-            LOGGER.warning(f'Get Video Streams: {res}')
-    except Exception as e:
-        LOGGER.error(f'Get Video Streams: {e}. Mostly File not found!')
-        return False
-    fields = eval(result[0]).get('streams')
+    fields = await media_probe.streams(path)
     if fields is None:
-        LOGGER.error(f"get_video_streams: {result}")
+        LOGGER.error(f"get_video_streams: no streams found for {path}")
         return False
     videos = 0
     audios = 0
@@ -43,18 +39,10 @@ async def is_multi_streams(path):
 
 
 async def get_media_info(path, metadata=False):
-    try:
-        result = await cmd_exec(["ffprobe", "-hide_banner", "-loglevel", "error", "-print_format",
-                                 "json", "-show_format", "-show_streams", path])
-        if res := result[1]:
-            LOGGER.warning(f'Media Info FF: {res}')
-    except Exception as e:
-        LOGGER.error(f'Media Info: {e}. Mostly File not found!')
-        return (0, "", "", "") if metadata else (0, None, None)
-    ffresult = eval(result[0])
+    ffresult = await media_probe.probe(path)
     fields = ffresult.get('format')
     if fields is None:
-        LOGGER.error(f"Media Info Sections: {result}")
+        LOGGER.error(f"Media Info Sections: no format found for {path}")
         return (0, "", "", "") if metadata else (0, None, None)
     duration = round(float(fields.get('duration', 0)))
     if metadata:
@@ -91,17 +79,9 @@ async def get_document_type(path):
         return False, False, True
     if not mime_type.startswith('video') and not mime_type.endswith('octet-stream'):
         return is_video, is_audio, is_image
-    try:
-        result = await cmd_exec(["ffprobe", "-hide_banner", "-loglevel", "error", "-print_format",
-                                 "json", "-show_streams", path])
-        if res := result[1]:
-            LOGGER.warning(f'Get Document Type: {res}')
-    except Exception as e:
-        LOGGER.error(f'Get Document Type: {e}. Mostly File not found!')
-        return is_video, is_audio, is_image
-    fields = eval(result[0]).get('streams')
+    fields = await media_probe.streams(path)
     if fields is None:
-        LOGGER.error(f"get_document_type: {result}")
+        LOGGER.error(f"get_document_type: no streams found for {path}")
         return is_video, is_audio, is_image
     for stream in fields:
         if stream.get('codec_type') == 'video':
@@ -127,40 +107,194 @@ async def get_audio_thumb(audio_file):
     return des_dir
 
 
-async def take_ss(video_file, duration=None, total=1, gen_ss=False):
-    des_dir = ospath.join('Thumbnails', f"{time()}")
-    await makedirs(des_dir, exist_ok=True)
-    if duration is None:
-        duration = (await get_media_info(video_file))[0]
-    if duration == 0:
-        duration = 3
-    duration = duration - (duration * 2 / 100)
-    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-ss", "",
-           "-i", video_file, "-vf", "thumbnail", "-frames:v", "1", des_dir]
-    tstamps = {}
-    thumb_sem = Semaphore(3)
-    
-    async def extract_ss(eq_thumb):
-        async with thumb_sem:
-            cmd[5] = str((duration // total) * eq_thumb)
-            tstamps[f"wz_thumb_{eq_thumb}.jpg"] = strftime("%H:%M:%S", gmtime(float(cmd[5])))
-            cmd[-1] = ospath.join(des_dir, f"wz_thumb_{eq_thumb}.jpg")
-            task = await create_subprocess_exec(*cmd, stderr=PIPE)
-            return (task, await task.wait(), eq_thumb)
-    
-    tasks = [extract_ss(eq_thumb) for eq_thumb in range(1, total+1)]
-    status = await gather(*tasks)
-    
-    for task, rtype, eq_thumb in status:
-        if rtype != 0 or not await aiopath.exists(ospath.join(des_dir, f"wz_thumb_{eq_thumb}.jpg")):
-            err = (await task.stderr.read()).decode().strip()
-            LOGGER.error(f'Error while extracting thumbnail no. {eq_thumb} from video. Name: {video_file} stderr: {err}')
-            await aiormtree(des_dir)
-            return None
-    return (des_dir, tstamps) if gen_ss else ospath.join(des_dir, "wz_thumb_1.jpg")
-
-
-async def split_file(path, size, file_, dirpath, split_size, listener, start_time=0, i=1, inLoop=False, multi_streams=True):
+async def take_ss(video_file, user_id, duration=None):
+    return await ss_engine.thumbnail(video_file, user_id, duration)
+
+
+class FileRange(RawIOBase):
+    def __init__(self, path, offset, length, name):
+        self.name = name
+        self.__file = open(path, 'rb')
+        self.__offset = offset
+        self.__length = length
+        self.__pos = 0
+        self.__file.seek(offset)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.__pos
+
+    def seek(self, pos, whence=SEEK_SET):
+        if whence == SEEK_CUR:
+            pos += self.__pos
+        elif whence == SEEK_END:
+            pos += self.__length
+        self.__pos = min(max(pos, 0), self.__length)
+        self.__file.seek(self.__offset + self.__pos)
+        return self.__pos
+
+    def read(self, size=-1):
+        remaining = self.__length - self.__pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        data = self.__file.read(size)
+        self.__pos += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self.__file.close()
+        super().close()
+
+
+def get_virtual_parts(file_, size, split_size):
+    return [[offset, min(split_size, size - offset), f"{file_}.{index:03}"]
+            for index, offset in enumerate(range(0, size, split_size), start=1)]
+
+
+async def get_cut_points(path, split_size, listener):
+    # keyframe byte offsets of the first video stream approximate the size of stream-copied parts
+    cmd = ["ffprobe", "-hide_banner", "-loglevel", "error", "-select_streams", "v:0",
+           "-show_entries", "packet=pts_time,pos,flags", "-of", "csv=p=0", path]
+    listener.suproc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
+    cut_points, last_cut, last_key, keys = [], 0, None, 0
+    async for line in listener.suproc.stdout:
+        try:
+            pts_time, pos, flags = line.decode().strip().split(',')[:3]
+            pts_time, pos = float(pts_time), int(pos)
+        except ValueError:
+            continue
+        if 'K' not in flags:
+            continue
+        keys += 1
+        if pos - last_cut > split_size and last_key is not None and last_key[1] > last_cut:
+            cut_points.append(last_key[0])
+            last_cut = last_key[1]
+        last_key = (pts_time, pos)
+    code = await listener.suproc.wait()
+    if code == -9:
+        return False
+    if code != 0 or keys < 2:
+        return None
+    return cut_points
+
+
+async def segment_split(path, file_, dirpath, split_size, listener, duration, multi_streams, on_part=None):
+    if listener.suproc == 'cancelled' or listener.suproc is not None and listener.suproc.returncode == -9:
+        return False
+    cut_points = await get_cut_points(path, split_size, listener)
+    if cut_points is False:
+        return False
+    if not cut_points:
+        return 0, 1
+    base_name, extension = ospath.splitext(file_)
+    out_pattern = ospath.join(dirpath, f"{base_name.replace('%', '%%')}.part%03d{extension}")
+    # ffmpeg adds a line to the segment list as each part is closed, stdout only carries the progress lines
+    fd, list_path = mkstemp(suffix='.csv')
+    osclose(fd)
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", path, "-map", "0", "-map_chapters", "-1",
+           "-strict", "-2", "-c", "copy", "-f", "segment", "-segment_start_number", "1", "-reset_timestamps", "1",
+           "-segment_times", ",".join(f"{floor(t * 1000) / 1000:.3f}" for t in cut_points),
+           "-segment_list", list_path, "-segment_list_type", "csv", "-progress", "pipe:1", "-nostats", out_pattern]
+    if not multi_streams:
+        del cmd[6]
+        del cmd[6]
+    if listener.suproc == 'cancelled' or listener.suproc is not None and listener.suproc.returncode == -9:
+        await aioremove(list_path)
+        return False
+    resume = {'start_time': 0, 'index': 1, 'stopped': None}
+    exited = Event()
+
+    async def on_segment(line):
+        if resume['stopped']:
+            return
+        try:
+            name, start, end = next(csv_reader([line]))
+            start, end = float(start), float(end)
+        except (ValueError, StopIteration):
+            return
+        out_path = ospath.join(dirpath, ospath.basename(name))
+        try:
+            if await aiopath.getsize(out_path) > MAX_SPLIT_SIZE:
+                resume['stopped'] = f"Segment split produced a part above {MAX_SPLIT_SIZE}"
+        except OSError as e:
+            resume['stopped'] = f"Segment split part is missing ({e})"
+        if resume['stopped']:
+            listener.suproc.terminate()
+            await listener.suproc.wait()
+            return
+        if on_part is not None:
+            await on_part(out_path, path, start, end - start, multi_streams)
+        resume['start_time'], resume['index'] = end, resume['index'] + 1
+
+    async def follow_list():
+        pending = ''
+        async with aiopen(list_path) as f:
+            while True:
+                finished = exited.is_set()
+                *lines, pending = (pending + await f.read()).split('\n')
+                for line in lines:
+                    await on_segment(line)
+                if finished:
+                    break
+                with suppress(TimeoutError):
+                    await wait_for(exited.wait(), 1)
+        if pending:
+            await on_segment(pending)
+
+    async def track():
+        try:
+            return await listener.progress_tracker.track_ffmpeg(listener.suproc, 0, duration)
+        finally:
+            exited.set()
+
+    try:
+        listener.suproc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
+        code, _ = await gather(track(), follow_list())
+    finally:
+        await aioremove(list_path)
+    if code == -9:
+        return False
+    if code == 0 and not resume['stopped']:
+        return True
+    if resume['stopped']:
+        LOGGER.warning(f"{resume['stopped']}, splitting the rest by seeking. Path: {path}")
+    else:
+        err = (await listener.suproc.stderr.read()).decode().strip()
+        LOGGER.warning(f"{err}. Segment split failed, splitting the rest by seeking. Path: {path}")
+    for index in range(resume['index'], len(cut_points) + 2):
+        with suppress(Exception):
+            await aioremove(ospath.join(dirpath, f"{base_name}.part{index:03}{extension}"))
+    return resume['start_time'], resume['index']
+
+
+async def resplit_segment(out_path, source, start_time, duration, listener, multi_streams=True):
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-ss", str(start_time), "-i", source, "-t", str(duration),
+           "-map", "0", "-map_chapters", "-1", "-async", "1", "-strict", "-2", "-c", "copy", "-y", out_path]
+    if not multi_streams:
+        del cmd[10]
+        del cmd[10]
+    if listener.suproc == 'cancelled' or listener.suproc is not None and listener.suproc.returncode == -9:
+        return False
+    listener.suproc = await create_subprocess_exec(*cmd, stderr=PIPE)
+    _, stderr = await listener.suproc.communicate()
+    if listener.suproc.returncode != 0:
+        LOGGER.error(f"{stderr.decode().strip()}. Unable to split this part again. Path: {out_path}")
+        return False
+    return True
+
+
+async def split_file(path, size, file_, dirpath, split_size, listener, start_time=0, i=1, inLoop=False, multi_streams=True, on_part=None):
     if listener.suproc == 'cancelled' or listener.suproc is not None and listener.suproc.returncode == -9:
         return False
     if listener.seed and not listener.newDir:
@@ -180,19 +314,24 @@ async def split_file(path, size, file_, dirpath, split_size, listener, start_tim
         duration = (await get_media_info(path))[0]
         base_name, extension = ospath.splitext(file_)
         split_size -= 5000000
+        if not inLoop:
+            res = await segment_split(path, file_, dirpath, split_size, listener, duration, multi_streams, on_part)
+            if not isinstance(res, tuple):
+                return res
+            start_time, i = res
         while i <= parts or start_time < duration - 4:
             parted_name = f"{base_name}.part{i:03}{extension}"
             out_path = ospath.join(dirpath, parted_name)
             cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-ss", str(start_time), "-i", path,
                    "-fs", str(split_size), "-map", "0", "-map_chapters", "-1", "-async", "1", "-strict",
-                   "-2", "-c", "copy", out_path]
+                   "-2", "-c", "copy", "-progress", "pipe:1", "-nostats", out_path]
             if not multi_streams:
                 del cmd[10]
                 del cmd[10]
             if listener.suproc == 'cancelled' or listener.suproc is not None and listener.suproc.returncode == -9:
                 return False
-            listener.suproc = await create_subprocess_exec(*cmd, stderr=PIPE)
-            code = await listener.suproc.wait()
+            listener.suproc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
+            code = await listener.progress_tracker.track_ffmpeg(listener.suproc, start_time, duration)
             if code == -9:
                 return False
             elif code != 0:
@@ -204,7 +343,7 @@ async def split_file(path, size, file_, dirpath, split_size, listener, start_tim
                 if multi_streams:
                     LOGGER.warning(
                         f"{err}. Retrying without map, -map 0 not working in all situations. Path: {path}")
-                    return await split_file(path, size, file_, dirpath, split_size, listener, start_time, i, True, False)
+                    return await split_file(path, size, file_, dirpath, split_size, listener, start_time, i, True, False, on_part)
                 else:
                     LOGGER.warning(
                         f"{err}. Unable to split this video, if it's size less than {MAX_SPLIT_SIZE} will be uploaded as it is. Path: {path}")
@@ -214,8 +353,13 @@ async def split_file(path, size, file_, dirpath, split_size, listener, start_tim
                 dif = out_size - MAX_SPLIT_SIZE
                 split_size -= dif + 5000000
                 await aioremove(out_path)
-                return await split_file(path, size, file_, dirpath, split_size, listener, start_time, i, True, )
+                return await split_file(path, size, file_, dirpath, split_size, listener, start_time, i, True, multi_streams, on_part)
             lpd = (await get_media_info(out_path))[0]
+            if lpd <= 3 and lpd != 0 and duration != lpd:
+                await aioremove(out_path)
+                break
+            if on_part is not None:
+                await on_part(out_path, path, start_time, lpd, multi_streams)
             if lpd == 0:
                 LOGGER.error(
                     f'Something went wrong while splitting, mostly file is corrupted. Path: {path}')
@@ -224,24 +368,15 @@ async def split_file(path, size, file_, dirpath, split_size, listener, start_tim
                 LOGGER.warning(
                     f"This file has been splitted with default stream and audio, so you will only see one part with less size from orginal one because it doesn't have all streams and audios. This happens mostly with MKV videos. Path: {path}")
                 break
-            elif lpd <= 3:
-                await aioremove(out_path)
-                break
             start_time += lpd - 3
             i += 1
     else:
-        out_path = ospath.join(dirpath, f"{file_}.")
-        listener.suproc = await create_subprocess_exec("split", "--numeric-suffixes=1", "--suffix-length=3",
-                                                       f"--bytes={split_size}", path, out_path, stderr=PIPE)
-        code = await listener.suproc.wait()
-        if code == -9:
-            return False
-        elif code != 0:
-            err = (await listener.suproc.stderr.read()).decode().strip()
-            LOGGER.error(err)
+        # parts are read straight from the original file by the uploader through FileRange
+        listener.virtual_parts[path] = split_size
+        return "virtual"
     return True
 
-async def format_filename(file_, user_id, dirpath=None, isMirror=False):
+async def format_filename(file_, user_id, dirpath=None, isMirror=False, up_range=None):
     user_dict = user_data.get(user_id, {})
     ftag, ctag = ('m', 'MIRROR') if isMirror else ('l', 'LEECH')
     prefix = config_dict[f'{ctag}_FILENAME_PREFIX'] if (val:=user_dict.get(f'{ftag}prefix', '')) == '' else val
@@ -304,16 +439,22 @@ async def format_filename(file_, user_id, dirpath=None, isMirror=False):
         lcaption = lcaption.replace('\|', '%%').replace('\{', '&%&').replace('\}', '$%$').replace('\s', ' ')
         slit = lcaption.split("|")
         slit[0] = re_sub(r'\{([^}]+)\}', lowerVars, slit[0])
-        up_path = ospath.join(dirpath, prefile_)
+        # a virtual part is a byte range of the original file, which keeps its own name on disk
+        up_path, offset, length = up_range if up_range is not None else (ospath.join(dirpath, prefile_), 0, None)
         dur, qual, lang, subs = await get_media_info(up_path, True)
+        hashes = {}
+        if algos := [algo for algo in HASH_ALGOS if f'{{{algo}_hash}}' in slit[0]]:
+            hashes = await hash_service.digest(up_path, algos, offset, length)
         cap_mono = slit[0].format(
             filename = nfile_,
-            size = get_readable_file_size(await aiopath.getsize(up_path)),
+            size = get_readable_file_size(length if length is not None else await aiopath.getsize(up_path)),
             duration = get_readable_time(dur),
             quality = qual,
             languages = lang,
             subtitles = subs,
-            md5_hash = get_md5_hash(up_path)
+            md5_hash = hashes.get('md5', ''),
+            sha1_hash = hashes.get('sha1', ''),
+            sha256_hash = hashes.get('sha256', '')
         )
         if len(slit) > 1:
             for rep in range(1, len(slit)):
@@ -328,18 +469,10 @@ async def format_filename(file_, user_id, dirpath=None, isMirror=False):
     return file_, cap_mono
 
 
-async def get_ss(up_path, ss_no):
-    thumbs_path, tstamps = await take_ss(up_path, total=min(ss_no, 250), gen_ss=True)
+async def get_ss(up_path, ss_no, user_id):
+    shots = await ss_engine.screenshots(up_path, min(ss_no, 250), user_id)
     th_html = f"📌 <h4>{ospath.basename(up_path)}</h4><br>📇 <b>Total Screenshots:</b> {ss_no}<br><br>"
-    up_sem = Semaphore(25)
-    async def telefile(thumb):
-        async with up_sem:
-            tele_id = await sync_to_async(upload_file, ospath.join(thumbs_path, thumb))
-            return tele_id[0], tstamps[thumb]
-    tasks = [telefile(thumb) for thumb in natsorted(await listdir(thumbs_path))]
-    results = await gather(*tasks)
-    th_html += ''.join(f'<img src="https://graph.org{tele_id}"><br><pre>Screenshot at {stamp}</pre>' for tele_id, stamp in results)
-    await aiormtree(thumbs_path)
+    th_html += ''.join(f'<img src="https://graph.org{src}"><br><pre>Screenshot at {stamp}</pre>' for src, stamp in shots)
     link_id = (await telegraph.create_page(title="ScreenShots X", content=th_html))["path"]
     return f"https://graph.org/{link_id}"
 
@@ -352,10 +485,3 @@ async def get_mediainfo_link(up_path):
     link_id = (await telegraph.create_page(title="MediaInfo X", content=tc))["path"]
     return f"https://graph.org/{link_id}"
 
-
-def get_md5_hash(up_path):
-    md5_hash = md5()
-    with open(up_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            md5_hash.update(byte_block)
-        return md5_hash.hexdigest()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+from json import loads as jloads, JSONDecodeError
+from collections import OrderedDict
+from asyncio import Future, shield
+from aiofiles.os import stat as aiostat
+
+from bot import LOGGER
+from bot.helper.ext_utils.bot_utils import cmd_exec
+
+MAX_CACHED = 512
+
+
+class MediaProbe:
+    def __init__(self):
+        self.__cache = OrderedDict()
+        self.__pending = {}
+
+    @staticmethod
+    async def __identity(path):
+        st = await aiostat(path)
+        return path, st.st_size, st.st_mtime_ns
+
+    @staticmethod
+    async def __run(path):
+        result = await cmd_exec(["ffprobe", "-hide_banner", "-loglevel", "error", "-print_format",
+                                 "json", "-show_format", "-show_streams", path])
+        if res := result[1]:
+            LOGGER.warning(f'Media Probe: {res}')
+        try:
+            return jloads(result[0] or '{}')
+        except JSONDecodeError as e:
+            LOGGER.error(f'Media Probe: {e} for {path}')
+            return {}
+
+    async def probe(self, path):
+        try:
+            key = await self.__identity(path)
+        except Exception as e:
+            LOGGER.error(f'Media Probe: {e}. Mostly File not found!')
+            return {}
+        while True:
+            if (info := self.__cache.get(key)) is not None:
+                self.__cache.move_to_end(key)
+                return info
+            if (pending := self.__pending.get(key)) is None:
+                break
+            # a cancelled waiter must not cancel the shared future, and a cancelled prober leaves it to the next waiter
+            await shield(pending)
+        self.__pending[key] = future = Future()
+        try:
+            try:
+                info = await self.__run(path)
+            except Exception as e:
+                LOGGER.error(f'Media Probe: {e}. Mostly File not found!')
+                info = {}
+            self.__cache[key] = info
+            while len(self.__cache) > MAX_CACHED:
+                self.__cache.popitem(last=False)
+            return info
+        finally:
+            del self.__pending[key]
+            future.set_result(None)
+
+    async def streams(self, path):
+        return (await self.probe(path)).get('streams')
+
+    async def format(self, path):
+        return (await self.probe(path)).get('format')
+
+    def forget(self, dirpath):
+        prefix = dirpath.rstrip('/') + '/'
+        for key in [key for key in self.__cache if key[0].startswith(prefix)]:
+            del self.__cache[key]
+
+
+media_probe = MediaProbe()
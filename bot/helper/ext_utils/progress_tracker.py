@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+from re import compile as re_compile
+
+PERCENT_REGEX = re_compile(r'^(\d{1,3})%')
+OUT_TIME_REGEX = re_compile(r'out_time_us=(\d+)')
+
+
+class ProgressTracker:
+    def __init__(self):
+        self.processed = 0
+        self.__done = 0
+        self.__step = 0
+
+    def start_step(self, size):
+        self.__done += self.__step
+        self.__step = size
+        self.processed = self.__done
+
+    def set_step_bytes(self, processed):
+        self.processed = self.__done + min(max(processed, 0), self.__step)
+
+    def set_step_fraction(self, fraction):
+        self.set_step_bytes(self.__step * fraction)
+
+    async def __read_lines(self, stream, separators=b'\r\b\n'):
+        buffer = b''
+        while chunk := await stream.read(4096):
+            buffer += chunk
+            for sep in separators[1:]:
+                buffer = buffer.replace(bytes([sep]), separators[:1])
+            *lines, buffer = buffer.split(separators[:1])
+            for line in lines:
+                if line := line.decode(errors='ignore').strip():
+                    yield line
+        if line := buffer.decode(errors='ignore').strip():
+            yield line
+
+    async def track_7z(self, proc):
+        # 7z -bsp1 progress lines start with the overall percent of the current command
+        async for line in self.__read_lines(proc.stdout):
+            if match := PERCENT_REGEX.match(line):
+                self.set_step_fraction(int(match.group(1)) / 100)
+        return await proc.wait()
+
+    async def track_ffmpeg(self, proc, start_time, duration):
+        async for line in self.__read_lines(proc.stdout):
+            if duration and (match := OUT_TIME_REGEX.match(line)):
+                self.set_step_fraction((start_time + int(match.group(1)) / 1000000) / duration)
+        return await proc.wait()
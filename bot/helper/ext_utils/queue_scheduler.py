@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+from time import time
+
+from bot import OWNER_ID, config_dict, user_data, download_dict, queued_dl, queued_up, non_queued_dl, non_queued_up
+from bot.helper.ext_utils.task_registry import task_registry
+
+
+class QueueScheduler:
+    def __init__(self):
+        self.__positions = {}
+        self.__updated = 0
+
+    @staticmethod
+    def __task_info(uid):
+        if (task := download_dict.get(uid)) is None:
+            return None, 0
+        try:
+            return task.message.from_user.id, task.size_raw()
+        except Exception:
+            return None, 0
+
+    @staticmethod
+    def __is_sudo(user_id):
+        return user_id == OWNER_ID or user_id in user_data and user_data[user_id].get('is_sudo')
+
+    @staticmethod
+    def __sjf_size():
+        try:
+            return float(config_dict['QUEUE_SJF_SIZE']) * 1024**3
+        except (KeyError, TypeError, ValueError):
+            return 0
+
+    def order(self, queued):
+        sjf_size = self.__sjf_size()
+        active = non_queued_dl | non_queued_up
+        users, running, keys = {}, {}, {}
+        for arrival, uid in enumerate(list(queued)):
+            user_id, size = self.__task_info(uid)
+            if user_id not in users:
+                users[user_id] = [arrival, 0]
+                running[user_id] = len(task_registry.user_uids(user_id) & active) if user_id else 0
+            first_arrival, turn = users[user_id]
+            users[user_id][1] += 1
+            keys[uid] = (0 if self.__is_sudo(user_id) else 1,
+                         0 if sjf_size and 0 < size <= sjf_size else 1,
+                         running[user_id] + turn, first_arrival, arrival)
+        return sorted(keys, key=keys.get)
+
+    def __refresh(self):
+        if time() - self.__updated < 1:
+            return
+        positions = {}
+        for queued, active in ((queued_dl, non_queued_dl), (queued_up, non_queued_up)):
+            etas = []
+            for uid in list(active):
+                if (task := download_dict.get(uid)) is not None and (eta := task.eta_raw()) is not None:
+                    etas.append(eta)
+            etas.sort()
+            for index, uid in enumerate(self.order(queued)):
+                positions[uid] = (index + 1, etas[index] if index < len(etas) else None)
+        self.__positions = positions
+        self.__updated = time()
+
+    def position(self, uid):
+        self.__refresh()
+        return self.__positions.get(uid, (None, None))
+
+
+queue_scheduler = QueueScheduler()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+from datetime import datetime
+from pytz import timezone
+
+from bot import config_dict, user_data, LOGGER
+from bot.helper.ext_utils.user_data_writer import user_data_writer
+
+
+class QuotaEngine:
+    @staticmethod
+    def __today():
+        return datetime.now(timezone(config_dict['TIMEZONE'])).date()
+
+    def __counters(self, user_id):
+        if not (dly_tasks := user_data.get(user_id, {}).get('dly_tasks')):
+            return 0, 0, 0
+        userdate, task, lsize, msize = dly_tasks
+        if userdate.astimezone(timezone(config_dict['TIMEZONE'])).date() < self.__today():
+            return 0, 0, 0
+        return task, lsize, msize
+
+    def usage(self, user_id):
+        task, lsize, msize = self.__counters(user_id)
+        return {'tasks': task, 'leech': lsize, 'mirror': msize}
+
+    def charge(self, user_id, size=0, isLeech=False):
+        task, lsize, msize = self.__counters(user_id)
+        if (limit := config_dict['DAILY_TASK_LIMIT']) and limit <= task:
+            return 'tasks'
+        if isLeech and (limit := config_dict['DAILY_LEECH_LIMIT']):
+            limit *= 1024**3
+            if size >= limit - lsize or limit <= lsize:
+                return 'leech'
+        elif not isLeech and (limit := config_dict['DAILY_MIRROR_LIMIT']):
+            limit *= 1024**3
+            if size >= limit - msize or limit <= msize:
+                return 'mirror'
+        task += 1
+        if isLeech and config_dict['DAILY_LEECH_LIMIT']:
+            lsize += size
+        elif not isLeech and config_dict['DAILY_MIRROR_LIMIT']:
+            msize += size
+        user_data.setdefault(user_id, {})['dly_tasks'] = [datetime.now(), task, lsize, msize]
+        user_data_writer.mark(user_id)
+        LOGGER.info(f"User: {user_id} | Daily Tasks: {task} | Daily Leech: {lsize} | Daily Mirror: {msize}")
+
+
+quota_engine = QuotaEngine()
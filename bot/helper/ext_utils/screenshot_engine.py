@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+from hashlib import md5
+from time import strftime, gmtime, time
+from os import path as ospath, cpu_count
+from collections import OrderedDict
+from asyncio import Semaphore, gather
+from aiofiles.os import makedirs, path as aiopath
+from aioshutil import copy, rmtree as aiormtree
+
+from bot import LOGGER
+from bot.helper.ext_utils.bot_utils import cmd_exec, sync_to_async
+from bot.helper.ext_utils.media_probe import media_probe
+from bot.helper.ext_utils.hash_service import hash_service, HASH_ALGOS
+from bot.helper.ext_utils.telegraph_helper import telegraph
+
+CACHE_DIR = 'Thumbnails/cache'
+# every ffmpeg run seeks its inputs to keyframes, so a handful of frames per run keeps the open inputs cheap
+FRAMES_PER_RUN = 8
+FFMPEG_WORKERS = cpu_count() or 1
+UPLOAD_WORKERS = 10
+SAMPLE_SIZE = 65536
+MAX_CACHED = 256
+
+
+class ScreenshotEngine:
+    def __init__(self):
+        self.__slots = Semaphore(FFMPEG_WORKERS)
+        self.__up_slots = Semaphore(UPLOAD_WORKERS)
+        self.__thumbs = OrderedDict()
+        self.__uploads = OrderedDict()
+
+    @staticmethod
+    def __sample(path):
+        # a re-leeched file lands on a new inode, so its identity comes from the size and a few sampled blocks
+        size = ospath.getsize(path)
+        digest = md5()
+        with open(path, 'rb') as f:
+            for offset in sorted({0, max(size // 2 - SAMPLE_SIZE // 2, 0), max(size - SAMPLE_SIZE, 0)}):
+                f.seek(offset)
+                digest.update(f.read(SAMPLE_SIZE))
+        return f'{size:x}_{digest.hexdigest()}'
+
+    async def __key(self, path, user_id):
+        # cached frames are only handed back to the user they were made for, a known full digest rules out sample collisions
+        digests = await hash_service.known(path)
+        digest = next((digests[algo] for algo in reversed(HASH_ALGOS) if algo in digests), '')
+        return f'{user_id}_{await sync_to_async(self.__sample, path)}_{digest}'
+
+    @staticmethod
+    async def __remember(cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > MAX_CACHED:
+            _, old = cache.popitem(last=False)
+            if isinstance(old, str):
+                await aiormtree(ospath.dirname(old), ignore_errors=True)
+
+    @staticmethod
+    async def __duration(path, duration=None):
+        if duration is None:
+            duration = float((await media_probe.probe(path)).get('format', {}).get('duration', 0))
+        return (duration or 3) * 0.98
+
+    async def __grab(self, video_file, frames):
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+        for stamp, _ in frames:
+            cmd += ["-noaccurate_seek", "-ss", f"{stamp:.3f}", "-i", video_file]
+        for index, (_, out_path) in enumerate(frames):
+            cmd += ["-map", f"{index}:V:0", "-frames:v", "1", "-y", out_path]
+        async with self.__slots:
+            _, stderr, code = await cmd_exec(cmd)
+        for _, out_path in frames:
+            if code != 0 or not await aiopath.exists(out_path):
+                LOGGER.error(f'Error while extracting screenshots from video. Name: {video_file} stderr: {stderr}')
+                return False
+        return True
+
+    async def frames(self, video_file, total, duration=None):
+        des_dir = ospath.join('Thumbnails', f"{time()}")
+        await makedirs(des_dir, exist_ok=True)
+        duration = await self.__duration(video_file, duration)
+        frames = [((duration // total) * index, ospath.join(des_dir, f"wz_thumb_{index}.jpg"))
+                  for index in range(1, total + 1)]
+        results = await gather(*(self.__grab(video_file, frames[index:index + FRAMES_PER_RUN])
+                                 for index in range(0, total, FRAMES_PER_RUN)))
+        if not all(results):
+            await aiormtree(des_dir)
+            return None
+        return des_dir, frames
+
+    async def thumbnail(self, video_file, user_id, duration=None):
+        try:
+            key = await self.__key(video_file, user_id)
+        except OSError as e:
+            LOGGER.error(f'Screenshot Engine: {e} for {video_file}')
+            return None
+        if (cached := self.__thumbs.get(key)) is None or not await aiopath.exists(cached):
+            if (res := await self.frames(video_file, 1, duration)) is None:
+                return None
+            des_dir, frames = res
+            cached = ospath.join(CACHE_DIR, key, 'thumb.jpg')
+            await makedirs(ospath.dirname(cached), exist_ok=True)
+            await copy(frames[0][1], cached)
+            await aiormtree(des_dir)
+            await self.__remember(self.__thumbs, key, cached)
+        # the uploader removes the thumb it was given, so it gets its own copy
+        des_dir = ospath.join('Thumbnails', f"{time()}")
+        await makedirs(des_dir, exist_ok=True)
+        return await copy(cached, ospath.join(des_dir, 'wz_thumb_1.jpg'))
+
+    async def __upload(self, path):
+        async with self.__up_slots:
+            return await telegraph.upload_file(path)
+
+    async def screenshots(self, video_file, total, user_id):
+        key = (await self.__key(video_file, user_id), total)
+        if (cached := self.__uploads.get(key)) is not None:
+            self.__uploads.move_to_end(key)
+            return cached
+        if (res := await self.frames(video_file, total)) is None:
+            raise Exception('Screenshots extraction failed')
+        des_dir, frames = res
+        try:
+            srcs = await gather(*(self.__upload(out_path) for _, out_path in frames))
+        finally:
+            await aiormtree(des_dir)
+        shots = [(src, strftime("%H:%M:%S", gmtime(stamp))) for src, (stamp, _) in zip(srcs, frames)]
+        await self.__remember(self.__uploads, key, shots)
+        return shots
+
+
+ss_engine = ScreenshotEngine()
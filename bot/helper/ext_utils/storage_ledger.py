@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+from threading import Lock
+
+from bot import download_dict
+
+
+class StorageLedger:
+    def __init__(self):
+        self.__lock = Lock()
+        self.__reserved = {}
+        self.admission_lock = Lock()
+
+    def reserve(self, uid, size):
+        with self.__lock:
+            if (entry := self.__reserved.get(uid)) is not None:
+                entry['size'] = size
+            else:
+                self.__reserved[uid] = {'size': size, 'base': 0, 'stage': 0}
+
+    def next_stage(self, uid, written):
+        with self.__lock:
+            if (entry := self.__reserved.get(uid)) is not None:
+                entry['base'] += written
+                entry['stage'] = 0
+
+    def complete(self, uid):
+        with self.__lock:
+            if (entry := self.__reserved.get(uid)) is not None:
+                entry['base'] = entry['size']
+                entry['stage'] = 0
+
+    def release(self, uid):
+        with self.__lock:
+            self.__reserved.pop(uid, None)
+
+    @staticmethod
+    def __processed(uid):
+        if (task := download_dict.get(uid)) is None:
+            return 0
+        try:
+            return task.processed_raw() or 0
+        except Exception:
+            return 0
+
+    def usage(self, exclude=None):
+        with self.__lock:
+            reservations = [(uid, entry) for uid, entry in self.__reserved.items() if uid != exclude]
+        reserved = written = 0
+        for uid, entry in reservations:
+            if entry['base'] < entry['size']:
+                entry['stage'] = max(entry['stage'], self.__processed(uid))
+            reserved += entry['size']
+            written += min(entry['base'] + entry['stage'], entry['size'])
+        return reserved, written, reserved - written
+
+    def outstanding(self, exclude=None):
+        return self.usage(exclude)[2]
+
+
+storage_ledger = StorageLedger()
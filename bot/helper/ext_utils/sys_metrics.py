@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+from time import time
+from types import SimpleNamespace
+from collections import deque
+from asyncio import sleep
+from psutil import disk_usage, disk_io_counters, Process, cpu_percent, swap_memory, cpu_count, cpu_freq, getloadavg, virtual_memory, net_io_counters, boot_time
+
+from bot import bot_loop, config_dict, LOGGER
+
+SAMPLE_INTERVAL = 2
+RATE_WINDOW = 10
+
+
+class SystemMetrics:
+    def __init__(self):
+        self.__task = None
+        self.__net_samples = deque(maxlen=RATE_WINDOW // SAMPLE_INTERVAL + 1)
+        self.__disk_busy = None
+        self.boot_time = boot_time()
+        self.p_core = cpu_count(logical=False)
+        self.total_core = cpu_count(logical=True)
+        try:
+            self.cpu_use = len(Process().cpu_affinity())
+        except Exception:
+            self.cpu_use = self.total_core
+        self.snapshot = None
+        self.sample()
+
+    def __net_rates(self, now, net_io):
+        self.__net_samples.append((now, net_io.bytes_sent, net_io.bytes_recv))
+        old_time, old_sent, old_recv = self.__net_samples[0]
+        if (elapsed := now - old_time) <= 0:
+            return 0, 0
+        return (net_io.bytes_sent - old_sent) / elapsed, (net_io.bytes_recv - old_recv) / elapsed
+
+    def __disk_busy_percent(self, now, disk_io):
+        if disk_io is None or not hasattr(disk_io, 'busy_time'):
+            return 0
+        old, self.__disk_busy = self.__disk_busy, (now, disk_io.busy_time)
+        if old is None or (elapsed := now - old[0]) <= 0:
+            return 0
+        return min((disk_io.busy_time - old[1]) / (elapsed * 10), 100)
+
+    def sample(self):
+        now = time()
+        net_io = net_io_counters()
+        disk_io = disk_io_counters()
+        up_rate, dl_rate = self.__net_rates(now, net_io)
+        freq = cpu_freq()
+        self.snapshot = SimpleNamespace(
+            time=now,
+            cpu=cpu_percent(),
+            cpu_freq=freq.current if freq else None,
+            load_avg=getloadavg(),
+            memory=virtual_memory(),
+            swap=swap_memory(),
+            disk=disk_usage('/'),
+            dl_disk=disk_usage(config_dict['DOWNLOAD_DIR']),
+            disk_io=disk_io,
+            disk_busy=self.__disk_busy_percent(now, disk_io),
+            net_io=net_io,
+            net_up_rate=up_rate,
+            net_dl_rate=dl_rate,
+        )
+
+    async def __sampler(self):
+        while True:
+            await sleep(SAMPLE_INTERVAL)
+            try:
+                await bot_loop.run_in_executor(None, self.sample)
+            except Exception as e:
+                LOGGER.error(f'{e}: while sampling system metrics')
+
+    def start(self):
+        if self.__task is None or self.__task.done():
+            self.__task = bot_loop.create_task(self.__sampler())
+
+    def stop(self):
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+
+
+sys_metrics = SystemMetrics()
@@ -5,7 +5,13 @@ from asyncio import Event
 from bot import bot_cache, config_dict, queued_dl, queued_up, non_queued_up, non_queued_dl, queue_dict_lock, LOGGER, user_data, download_dict
 from bot.helper.mirror_utils.upload_utils.gdriveTools import GoogleDriveHelper
 from bot.helper.ext_utils.fs_utils import get_base_name, check_storage_threshold
-from bot.helper.ext_utils.bot_utils import get_user_tasks, getdailytasks, sync_to_async, get_telegraph_list, get_readable_file_size, checking_access, get_readable_time
+from bot.helper.ext_utils.queue_scheduler import queue_scheduler
+from bot.helper.ext_utils.admission_control import admission_controller
+from bot.helper.ext_utils.task_registry import task_registry
+from bot.helper.ext_utils.sys_metrics import sys_metrics
+from bot.helper.ext_utils.storage_ledger import storage_ledger
+from bot.helper.ext_utils.quota_engine import quota_engine
+from bot.helper.ext_utils.bot_utils import get_user_tasks, sync_to_async, get_telegraph_list, get_readable_file_size, checking_access, get_readable_time
 from bot.helper.telegram_helper.message_utils import forcesub, check_botpm
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.themes import BotTheme
@@ -46,7 +52,7 @@ async def timeval_check(user_id):
 
 async def is_queued(uid):
     all_limit = config_dict['QUEUE_ALL']
-    dl_limit = config_dict['QUEUE_DOWNLOAD']
+    dl_limit = admission_controller.dl_limit()
     event = None
     added_to_queue = False
     if all_limit or dl_limit:
@@ -72,7 +78,7 @@ def start_up_from_queued(uid):
 
 async def start_from_queued():
     if all_limit := config_dict['QUEUE_ALL']:
-        dl_limit = config_dict['QUEUE_DOWNLOAD']
+        dl_limit = admission_controller.dl_limit()
         up_limit = config_dict['QUEUE_UPLOAD']
         async with queue_dict_lock:
             dl = len(non_queued_dl)
@@ -81,14 +87,14 @@ async def start_from_queued():
             if all_ < all_limit:
                 f_tasks = all_limit - all_
                 if queued_up and (not up_limit or up < up_limit):
-                    for index, uid in enumerate(list(queued_up.keys()), start=1):
+                    for index, uid in enumerate(queue_scheduler.order(queued_up), start=1):
                         f_tasks = all_limit - all_
                         start_up_from_queued(uid)
                         f_tasks -= 1
                         if f_tasks == 0 or (up_limit and index >= up_limit - up):
                             break
                 if queued_dl and (not dl_limit or dl < dl_limit) and f_tasks != 0:
-                    for index, uid in enumerate(list(queued_dl.keys()), start=1):
+                    for index, uid in enumerate(queue_scheduler.order(queued_dl), start=1):
                         start_dl_from_queued(uid)
                         if (dl_limit and index >= dl_limit - dl) or index == f_tasks:
                             break
@@ -99,7 +105,7 @@ async def start_from_queued():
             up = len(non_queued_up)
             if queued_up and up < up_limit:
                 f_tasks = up_limit - up
-                for index, uid in enumerate(list(queued_up.keys()), start=1):
+                for index, uid in enumerate(queue_scheduler.order(queued_up), start=1):
                     start_up_from_queued(uid)
                     if index == f_tasks:
                         break
@@ -109,12 +115,12 @@ async def start_from_queued():
                 for uid in list(queued_up.keys()):
                     start_up_from_queued(uid)
 
-    if dl_limit := config_dict['QUEUE_DOWNLOAD']:
+    if dl_limit := admission_controller.dl_limit():
         async with queue_dict_lock:
             dl = len(non_queued_dl)
             if queued_dl and dl < dl_limit:
                 f_tasks = dl_limit - dl
-                for index, uid in enumerate(list(queued_dl.keys()), start=1):
+                for index, uid in enumerate(queue_scheduler.order(queued_dl), start=1):
                     start_dl_from_queued(uid)
                     if index == f_tasks:
                         break
@@ -125,10 +131,19 @@ async def start_from_queued():
                     start_dl_from_queued(uid)
 
 
+async def adjust_admission():
+    if not queued_dl:
+        return
+    if admission_controller.adjust(max(task_registry.dl_speed, 0), max(task_registry.up_speed, 0), sys_metrics.snapshot):
+        await start_from_queued()
+
+
 async def limit_checker(size, listener, isTorrent=False, isMega=False, isDriveLink=False, isYtdlp=False, isPlayList=None):
     LOGGER.info('Checking Size Limit of link/file/folder/tasks...')
     user_id = listener.message.from_user.id 
     if await CustomFilters.sudo('', listener.message):
+        if not listener.isClone:
+            storage_ledger.reserve(listener.uid, size * 2 if any([listener.compress, listener.extract]) else size)
         return
     limit_exceeded = ''
     if listener.isClone:
@@ -173,34 +188,25 @@ async def limit_checker(size, listener, isTorrent=False, isMega=False, isDriveLi
         if (STORAGE_THRESHOLD := config_dict['STORAGE_THRESHOLD']) and not listener.isClone:
             arch = any([listener.compress, listener.extract])
             limit = STORAGE_THRESHOLD * 1024**3
-            acpt = await sync_to_async(check_storage_threshold, size, limit, arch)
+            acpt = await sync_to_async(check_storage_threshold, size, limit, arch, uid=listener.uid)
             if not acpt:
                 limit_exceeded = f'You must leave {get_readable_file_size(limit)} free storage.'
 
-        if config_dict['DAILY_TASK_LIMIT'] and config_dict['DAILY_TASK_LIMIT'] <= await getdailytasks(user_id):
-            limit_exceeded = f"Daily Total Task Limit: {config_dict['DAILY_TASK_LIMIT']}\nYou have exhausted all your Daily Task Limits."
-        else:
-            ttask = await getdailytasks(user_id, increase_task=True)
-            LOGGER.info(f"User: {user_id} | Daily Tasks: {ttask}")
-        if (DAILY_MIRROR_LIMIT := config_dict['DAILY_MIRROR_LIMIT']) and not listener.isLeech:
-            limit = DAILY_MIRROR_LIMIT * 1024**3
-            if (size >= (limit - await getdailytasks(user_id, check_mirror=True)) or limit <= await getdailytasks(user_id, check_mirror=True)):
-                limit_exceeded = f'Daily Mirror Limit is {get_readable_file_size(limit)}\nYou have exhausted all your Daily Mirror Limit.'
-            elif not listener.isLeech:
-                msize = await getdailytasks(user_id, upmirror=size, check_mirror=True)
-                LOGGER.info(f"User : {user_id} | Daily Mirror Size : {get_readable_file_size(msize)}")
-        if (DAILY_LEECH_LIMIT := config_dict['DAILY_LEECH_LIMIT']) and listener.isLeech:
-            limit = DAILY_LEECH_LIMIT * 1024**3
-            if (size >= (limit - await getdailytasks(user_id, check_leech=True)) or limit <= await getdailytasks(user_id, check_leech=True)):
-                limit_exceeded = f'Daily Leech Limit is {get_readable_file_size(limit)}\nYou have exhausted all your Daily Leech Limit.'
-            elif listener.isLeech:
-                lsize = await getdailytasks(user_id, upleech=size, check_leech=True)
-                LOGGER.info(f"User : {user_id} | Daily Leech Size : {get_readable_file_size(lsize)}")
+        if not limit_exceeded and (quota := quota_engine.charge(user_id, size, listener.isLeech)):
+            if quota == 'tasks':
+                limit_exceeded = f"Daily Total Task Limit: {config_dict['DAILY_TASK_LIMIT']}\nYou have exhausted all your Daily Task Limits."
+            elif quota == 'mirror':
+                limit_exceeded = f"Daily Mirror Limit is {get_readable_file_size(config_dict['DAILY_MIRROR_LIMIT'] * 1024**3)}\nYou have exhausted all your Daily Mirror Limit."
+            else:
+                limit_exceeded = f"Daily Leech Limit is {get_readable_file_size(config_dict['DAILY_LEECH_LIMIT'] * 1024**3)}\nYou have exhausted all your Daily Leech Limit."
     if limit_exceeded:
+        storage_ledger.release(listener.uid)
         if size:
             return f"{limit_exceeded}.\nYour List/File/Folder size is {get_readable_file_size(size)}."
         elif isPlayList != 0:
             return f"{limit_exceeded}.\nYour playlist has {isPlayList} files."
+    elif not listener.isClone:
+        storage_ledger.reserve(listener.uid, size * 2 if any([listener.compress, listener.extract]) else size)
 
 
 async def task_utils(message):
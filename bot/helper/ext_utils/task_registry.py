@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+from threading import Lock
+
+# positions of a task's keys, gids map to a single task while the other indexes group tasks
+GID, USER, STATUS, ENGINE = range(4)
+
+
+class TaskRegistry:
+    def __init__(self):
+        self.__lock = Lock()
+        self.__speeds = {}
+        self.__keys = {}
+        self.__gids = {}
+        self.__users = {}
+        self.__statuses = {}
+        self.__engines = {}
+        self.dl_speed = 0
+        self.up_speed = 0
+
+    @staticmethod
+    def __user_id(task):
+        try:
+            return task.message.from_user.id
+        except Exception:
+            return None
+
+    @staticmethod
+    def __read(task, attr):
+        # a status whose engine can't answer yet is indexed on the next tick
+        try:
+            return getattr(task, attr)()
+        except Exception:
+            return None
+
+    @staticmethod
+    def __index_add(index, key, uid):
+        if key is not None:
+            index.setdefault(key, set()).add(uid)
+
+    @staticmethod
+    def __index_discard(index, key, uid):
+        if (uids := index.get(key)) is not None:
+            uids.discard(uid)
+            if not uids:
+                del index[key]
+
+    def __groups(self):
+        return ((USER, self.__users), (STATUS, self.__statuses), (ENGINE, self.__engines))
+
+    def __unindex(self, uid):
+        if (keys := self.__keys.pop(uid, None)) is None:
+            return
+        if self.__gids.get(keys[GID]) == uid:
+            del self.__gids[keys[GID]]
+        for pos, index in self.__groups():
+            self.__index_discard(index, keys[pos], uid)
+
+    def __index(self, uid, keys):
+        self.__unindex(uid)
+        self.__keys[uid] = keys
+        if keys[GID] is not None:
+            self.__gids[keys[GID]] = uid
+        for pos, index in self.__groups():
+            self.__index_add(index, keys[pos], uid)
+
+    def add_task(self, uid, task):
+        keys = (self.__read(task, 'gid'), self.__user_id(task), self.__read(task, 'status'), self.__read(task, 'eng'))
+        with self.__lock:
+            self.__index(uid, keys)
+
+    def remove_task(self, uid):
+        with self.__lock:
+            self.__unindex(uid)
+        self.discard_speed(uid)
+
+    def clear(self):
+        with self.__lock:
+            for uid in list(self.__keys):
+                self.__unindex(uid)
+        for uid in self.speed_uids():
+            self.discard_speed(uid)
+
+    def update_task(self, uid, gid, status):
+        with self.__lock:
+            if (keys := self.__keys.get(uid)) is not None and (keys[GID], keys[STATUS]) != (gid, status):
+                self.__index(uid, (gid, keys[USER], status, keys[ENGINE]))
+
+    def follow_gid(self, gid, new_gid):
+        # aria2 hands a torrent to a new gid once its metadata is in, events for it arrive before the next tick
+        with self.__lock:
+            if (uid := self.__gids.get(gid)) is not None:
+                keys = self.__keys[uid]
+                self.__index(uid, (new_gid, *keys[USER:]))
+
+    def uid_by_gid(self, gid):
+        with self.__lock:
+            return self.__gids.get(gid)
+
+    def user_uids(self, user_id):
+        with self.__lock:
+            return set(self.__users.get(user_id, ()))
+
+    def user_count(self, user_id):
+        with self.__lock:
+            return len(self.__users.get(user_id, ()))
+
+    def status_uids(self, status):
+        with self.__lock:
+            return set(self.__statuses.get(status, ()))
+
+    def status_count(self, status):
+        with self.__lock:
+            return len(self.__statuses.get(status, ()))
+
+    def status_counts(self):
+        with self.__lock:
+            return {status: len(uids) for status, uids in self.__statuses.items()}
+
+    def engine_uids(self, engine):
+        with self.__lock:
+            return set(self.__engines.get(engine, ()))
+
+    def engine_count(self, engine):
+        with self.__lock:
+            return len(self.__engines.get(engine, ()))
+
+    def update_speed(self, uid, dl_speed, up_speed):
+        with self.__lock:
+            old_dl, old_up = self.__speeds.get(uid, (0, 0))
+            self.dl_speed += dl_speed - old_dl
+            self.up_speed += up_speed - old_up
+            self.__speeds[uid] = (dl_speed, up_speed)
+
+    def discard_speed(self, uid):
+        with self.__lock:
+            dl_speed, up_speed = self.__speeds.pop(uid, (0, 0))
+            self.dl_speed -= dl_speed
+            self.up_speed -= up_speed
+
+    def speed_uids(self):
+        with self.__lock:
+            return set(self.__speeds)
+
+
+task_registry = TaskRegistry()
+
+
+class TaskDict(dict):
+    def __setitem__(self, uid, task):
+        super().__setitem__(uid, task)
+        task_registry.add_task(uid, task)
+
+    def __delitem__(self, uid):
+        super().__delitem__(uid)
+        task_registry.remove_task(uid)
+
+    def pop(self, uid, *default):
+        if uid in self:
+            task_registry.remove_task(uid)
+        return super().pop(uid, *default)
+
+    def clear(self):
+        super().clear()
+        task_registry.clear()
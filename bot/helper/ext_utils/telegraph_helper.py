@@ -38,6 +38,14 @@ class TelegraphHelper:
             await sleep(st.retry_after)
             return await self.create_page(title, content)
 
+    async def upload_file(self, path):
+        try:
+            return (await self.telegraph.upload_file(path))[0]['src']
+        except RetryAfterError as st:
+            LOGGER.warning(f'Telegraph Flood control exceeded. I will sleep for {st.retry_after} seconds.')
+            await sleep(st.retry_after)
+            return await self.upload_file(path)
+
     async def edit_page(self, path, title, content):
         try:
             return await self.telegraph.edit_page(
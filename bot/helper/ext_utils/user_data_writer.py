@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+from asyncio import Lock
+from copy import deepcopy
+
+from bot import DATABASE_URL, user_data, LOGGER
+from bot.helper.ext_utils.db_handler import DbManger
+
+FLUSH_INTERVAL = 5
+# blobs saved separately through update_user_doc, user_data only holds their local paths
+DOC_KEYS = ('thumb', 'rclone')
+SENSITIVE_KEYS = ('token', 'time', 'is_auth', 'is_sudo', 'is_blacklist', 'usess')
+
+
+class UserDataWriter:
+    def __init__(self):
+        self.__lock = Lock()
+        self.__dirty = set()
+        self.__persisted = {user_id: self.__fields(user_id) for user_id in list(user_data)}
+
+    @staticmethod
+    def __fields(user_id):
+        return deepcopy({key: value for key, value in user_data.get(user_id, {}).items() if key not in DOC_KEYS})
+
+    def __changes(self, user_id):
+        fields = self.__fields(user_id)
+        persisted = self.__persisted.get(user_id, {})
+        to_set = {key: value for key, value in fields.items() if key not in persisted or persisted[key] != value}
+        to_unset = {key: '' for key in persisted if key not in fields}
+        return fields, to_set, to_unset
+
+    def mark(self, user_id):
+        if DATABASE_URL:
+            self.__dirty.add(user_id)
+
+    async def update(self, user_id, immediate=False):
+        if not DATABASE_URL:
+            return
+        self.__dirty.add(user_id)
+        if not immediate:
+            _, to_set, to_unset = self.__changes(user_id)
+            immediate = any(key in SENSITIVE_KEYS for key in (*to_set, *to_unset))
+        if immediate:
+            await self.flush(user_id)
+
+    async def flush(self, user_id=None):
+        async with self.__lock:
+            if user_id is not None:
+                if user_id not in self.__dirty:
+                    return
+                dirty = {user_id}
+                self.__dirty.discard(user_id)
+            else:
+                dirty, self.__dirty = self.__dirty, set()
+            updates, snapshots = {}, {}
+            for uid in dirty:
+                fields, to_set, to_unset = self.__changes(uid)
+                update = {}
+                if to_set:
+                    update['$set'] = to_set
+                if to_unset:
+                    update['$unset'] = to_unset
+                if update:
+                    updates[uid] = update
+                    snapshots[uid] = fields
+            if not updates:
+                return
+            try:
+                await DbManger().update_users(updates)
+            except Exception as e:
+                LOGGER.error(f'{e}: while flushing user data')
+                self.__dirty |= dirty
+                return
+            self.__persisted.update(snapshots)
+
+
+user_data_writer = UserDataWriter()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+from asyncio import Lock
+from collections import OrderedDict
+from aiofiles import open as aiopen
+from aiofiles.os import path as aiopath, makedirs, remove as aioremove
+
+from bot import DATABASE_URL, user_data, LOGGER
+from bot.helper.ext_utils.db_handler import DbManger
+from bot.helper.ext_utils.task_registry import task_registry
+
+MAX_CACHED = 100
+DOC_PATHS = {'thumb': 'Thumbnails/{}.jpg', 'rclone': 'rclone/{}.conf'}
+
+
+class UserDocCache:
+    def __init__(self):
+        self.__lock = Lock()
+        self.__cached = OrderedDict()
+
+    @staticmethod
+    def path(user_id, key):
+        return DOC_PATHS[key].format(user_id)
+
+    def touch(self, user_id, key):
+        if DATABASE_URL:
+            self.__cached[(user_id, key)] = self.path(user_id, key)
+            self.__cached.move_to_end((user_id, key))
+
+    def discard(self, user_id, key):
+        self.__cached.pop((user_id, key), None)
+
+    async def ensure(self, user_id, key):
+        path = self.path(user_id, key)
+        if not DATABASE_URL or not user_data.get(user_id, {}).get(key):
+            return path
+        async with self.__lock:
+            if not await aiopath.exists(path):
+                try:
+                    doc_bin = await DbManger().get_user_doc(user_id, key)
+                except Exception as e:
+                    LOGGER.error(f'{e}: while loading {key} of {user_id}')
+                    return path
+                if not doc_bin:
+                    return path
+                await makedirs(path.rsplit('/', 1)[0], exist_ok=True)
+                async with aiopen(path, 'wb+') as f:
+                    await f.write(doc_bin)
+            self.touch(user_id, key)
+            await self.__evict()
+        return path
+
+    async def ensure_all(self, user_id):
+        for key in DOC_PATHS:
+            await self.ensure(user_id, key)
+
+    async def __evict(self):
+        for user_id, key in list(self.__cached):
+            if len(self.__cached) <= MAX_CACHED:
+                break
+            # a running task may still read the file, keep it until the user goes idle
+            if task_registry.user_count(user_id):
+                continue
+            path = self.__cached.pop((user_id, key))
+            if user_data.get(user_id, {}).get(key):
+                try:
+                    await aioremove(path)
+                except Exception:
+                    pass
+
+
+user_doc_cache = UserDocCache()
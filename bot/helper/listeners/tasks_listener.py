@@ -9,17 +9,23 @@ from requests import utils as rutils
 from aiofiles.os import path as aiopath, remove as aioremove, listdir, makedirs
 from os import walk, path as ospath
 from html import escape
+from traceback import format_exc
+from natsort import natsorted
 from aioshutil import move
-from asyncio import create_subprocess_exec, sleep, Event
+from asyncio import create_subprocess_exec, sleep, Event, Queue
+from asyncio.subprocess import PIPE
 from pyrogram.enums import ChatType
 
 from bot import OWNER_ID, Interval, aria2, DOWNLOAD_DIR, download_dict, download_dict_lock, LOGGER, bot_name, DATABASE_URL, \
     MAX_SPLIT_SIZE, config_dict, status_reply_dict_lock, user_data, non_queued_up, non_queued_dl, queued_up, \
-    queued_dl, queue_dict_lock, bot, GLOBAL_EXTENSION_FILTER
+    queued_dl, queue_dict_lock, bot, bot_loop, GLOBAL_EXTENSION_FILTER
 from bot.helper.ext_utils.bot_utils import extra_btns, sync_to_async, get_readable_file_size, get_readable_time, is_mega_link, is_gdrive_link
-from bot.helper.ext_utils.fs_utils import get_base_name, get_path_size, clean_download, clean_target, \
+from bot.helper.ext_utils.fs_utils import get_base_name, get_path_size, clean_download, clean_target, get_split_volumes, \
     is_first_archive_split, is_archive, is_archive_split, join_files
-from bot.helper.ext_utils.leech_utils import split_file, format_filename
+from bot.helper.ext_utils.leech_utils import split_file, format_filename, get_virtual_parts
+from bot.helper.ext_utils.hash_service import hash_service, caption_algos
+from bot.helper.ext_utils.progress_tracker import ProgressTracker
+from bot.helper.ext_utils.storage_ledger import storage_ledger
 from bot.helper.ext_utils.exceptions import NotSupportedExtractionArchive
 from bot.helper.ext_utils.task_manager import start_from_queued
 from bot.helper.mirror_utils.status_utils.extract_status import ExtractStatus
@@ -67,6 +73,10 @@ class MirrorLeechListener:
         self.user_dict = user_data.get(self.user_id, {})
         self.isPM = config_dict['BOT_PM'] or self.user_dict.get('bot_pm')
         self.suproc = None
+        self.progress_tracker = None
+        self.virtual_parts = {}
+        self.split_segments = {}
+        self.feed_error = None
         self.sameDir = sameDir
         self.rcFlags = rcFlags
         self.upPath = upPath
@@ -192,6 +202,7 @@ class MirrorLeechListener:
         dl_path = f"{self.dir}/{name}"
         up_path = ''
         size = await get_path_size(dl_path)
+        storage_ledger.next_stage(self.uid, size)
         async with queue_dict_lock:
             if self.uid in non_queued_dl:
                 non_queued_dl.remove(self.uid)
@@ -207,6 +218,7 @@ class MirrorLeechListener:
                 if await aiopath.isfile(dl_path):
                     up_path = get_base_name(dl_path)
                 LOGGER.info(f"Extracting: {name}")
+                self.progress_tracker = ProgressTracker()
                 async with download_dict_lock:
                     download_dict[self.uid] = ExtractStatus(
                         name, size, gid, self)
@@ -223,13 +235,15 @@ class MirrorLeechListener:
                                 t_path = dirpath.replace(
                                     self.dir, self.newDir) if self.seed else dirpath
                                 cmd = [
-                                    "7z", "x", f"-p{pswd}", f_path, f"-o{t_path}", "-aot", "-xr!@PaxHeader"]
+                                    "7z", "x", f"-p{pswd}", f_path, f"-o{t_path}", "-aot", "-xr!@PaxHeader", "-bso0", "-bsp1"]
                                 if not pswd:
                                     del cmd[2]
                                 if self.suproc == 'cancelled' or self.suproc is not None and self.suproc.returncode == -9:
                                     return
-                                self.suproc = await create_subprocess_exec(*cmd)
-                                code = await self.suproc.wait()
+                                self.progress_tracker.start_step(sum([await aiopath.getsize(ospath.join(dirpath, volume))
+                                                                      for volume in get_split_volumes(file_, files)]))
+                                self.suproc = await create_subprocess_exec(*cmd, stdout=PIPE)
+                                code = await self.progress_tracker.track_7z(self.suproc)
                                 if code == -9:
                                     return
                                 elif code != 0:
@@ -248,13 +262,14 @@ class MirrorLeechListener:
                         self.newDir = f"{self.dir}10000"
                         up_path = up_path.replace(self.dir, self.newDir)
                     cmd = ["7z", "x", f"-p{pswd}", dl_path,
-                           f"-o{up_path}", "-aot", "-xr!@PaxHeader"]
+                           f"-o{up_path}", "-aot", "-xr!@PaxHeader", "-bso0", "-bsp1"]
                     if not pswd:
                         del cmd[2]
                     if self.suproc == 'cancelled':
                         return
-                    self.suproc = await create_subprocess_exec(*cmd)
-                    code = await self.suproc.wait()
+                    self.progress_tracker.start_step(size)
+                    self.suproc = await create_subprocess_exec(*cmd, stdout=PIPE)
+                    code = await self.progress_tracker.track_7z(self.suproc)
                     if code == -9:
                         return
                     elif code == 0:
@@ -284,6 +299,8 @@ class MirrorLeechListener:
                 up_path = f"{self.newDir}/{name}.zip"
             else:
                 up_path = f"{dl_path}.zip"
+            self.progress_tracker = ProgressTracker()
+            self.progress_tracker.start_step(size)
             async with download_dict_lock:
                 download_dict[self.uid] = ZipStatus(name, size, gid, self)
             LEECH_SPLIT_SIZE = user_dict.get('split_size', False) or config_dict['LEECH_SPLIT_SIZE']
@@ -292,6 +309,7 @@ class MirrorLeechListener:
             for ext in GLOBAL_EXTENSION_FILTER:
                 ex_ext = f'-xr!*.{ext}'
                 cmd.append(ex_ext)
+            cmd.extend(["-bso0", "-bsp1"])
             if self.isLeech and int(size) > LEECH_SPLIT_SIZE:
                 if not pswd:
                     del cmd[4]
@@ -303,8 +321,8 @@ class MirrorLeechListener:
                 LOGGER.info(f'Zip: orig_path: {dl_path}, zip_path: {up_path}')
             if self.suproc == 'cancelled':
                 return
-            self.suproc = await create_subprocess_exec(*cmd)
-            code = await self.suproc.wait()
+            self.suproc = await create_subprocess_exec(*cmd, stdout=PIPE)
+            code = await self.progress_tracker.track_7z(self.suproc)
             if code == -9:
                 return
             elif not self.seed:
@@ -316,42 +334,11 @@ class MirrorLeechListener:
         up_dir, up_name = up_path.rsplit('/', 1)
         size = await get_path_size(up_dir)
         if self.isLeech:
-            m_size = []
-            o_files = []
-            if not self.compress:
-                checked = False
-                LEECH_SPLIT_SIZE = user_dict.get(
-                    'split_size', False) or config_dict['LEECH_SPLIT_SIZE']
-                for dirpath, _, files in await sync_to_async(walk, up_dir, topdown=False):
-                    for file_ in files:
-                        f_path = ospath.join(dirpath, file_)
-                        f_size = await aiopath.getsize(f_path)
-                        if f_size > LEECH_SPLIT_SIZE:
-                            if not checked:
-                                checked = True
-                                async with download_dict_lock:
-                                    download_dict[self.uid] = SplitStatus(
-                                        up_name, size, gid, self)
-                                LOGGER.info(f"Splitting: {up_name}")
-                            res = await split_file(f_path, f_size, file_, dirpath, LEECH_SPLIT_SIZE, self)
-                            if not res:
-                                return
-                            if res == "errored":
-                                if f_size <= MAX_SPLIT_SIZE:
-                                    continue
-                                try:
-                                    await aioremove(f_path)
-                                except:
-                                    return
-                            elif not self.seed or self.newDir:
-                                try:
-                                    await aioremove(f_path)
-                                except:
-                                    return
-                            else:
-                                m_size.append(f_size)
-                                o_files.append(file_)
+            # parts are uploaded while the next ones are still being split
+            leech_feed = Queue()
+            bot_loop.create_task(self.__feed_leech_files(up_dir, up_name, size, gid, user_dict, leech_feed))
 
+        storage_ledger.complete(self.uid)
         up_limit = config_dict['QUEUE_UPLOAD']
         all_limit = config_dict['QUEUE_ALL']
         added_to_queue = False
@@ -375,9 +362,9 @@ class MirrorLeechListener:
         async with queue_dict_lock:
             non_queued_up.add(self.uid)
         if self.isLeech:
-            size = await get_path_size(up_dir)
-            for s in m_size:
-                size = size - s
+            async with download_dict_lock:
+                if self.uid not in download_dict:
+                    return
             LOGGER.info(f"Leech Name: {up_name}")
             tg = TgUploader(up_name, up_dir, self)
             tg_upload_status = TelegramStatus(
@@ -385,7 +372,7 @@ class MirrorLeechListener:
             async with download_dict_lock:
                 download_dict[self.uid] = tg_upload_status
             await update_all_messages()
-            await tg.upload(o_files, m_size, size)
+            await tg.upload(size, leech_feed)
         elif self.upPath == 'gd':
             size = await get_path_size(up_path)
             LOGGER.info(f"Upload Name: {up_name}")
@@ -415,6 +402,58 @@ class MirrorLeechListener:
             await update_all_messages()
             await RCTransfer.upload(up_path, size)
 
+    async def __feed_leech_files(self, up_dir, up_name, size, gid, user_dict, feed):
+        try:
+            checked = False
+            LEECH_SPLIT_SIZE = user_dict.get('split_size', False) or config_dict['LEECH_SPLIT_SIZE']
+            self.progress_tracker = ProgressTracker()
+            # caption digests are computed ahead of the uploader, in feed order
+            algos = caption_algos(self.user_id)
+
+            async def put(dirpath, file_):
+                if algos:
+                    f_path = ospath.join(dirpath, file_)
+                    if split_size := self.virtual_parts.get(f_path):
+                        for offset, length, _ in get_virtual_parts(file_, await aiopath.getsize(f_path), split_size):
+                            hash_service.prefetch(f_path, algos, offset, length)
+                    else:
+                        hash_service.prefetch(f_path, algos)
+                await feed.put((dirpath, file_))
+
+            async def on_part(out_path, source, start_time, duration, multi_streams):
+                self.split_segments[out_path] = (source, start_time, duration, multi_streams)
+                await put(*out_path.rsplit('/', 1))
+
+            for dirpath, _, files in sorted(await sync_to_async(walk, up_dir)):
+                if dirpath.endswith('/yt-dlp-thumb'):
+                    continue
+                for file_ in natsorted(files):
+                    f_path = ospath.join(dirpath, file_)
+                    f_size = await aiopath.getsize(f_path)
+                    self.progress_tracker.start_step(f_size)
+                    if self.compress or f_size <= LEECH_SPLIT_SIZE:
+                        await put(dirpath, file_)
+                        continue
+                    if not checked:
+                        checked = True
+                        async with download_dict_lock:
+                            # a queued or already running upload keeps its own status while the feed splits
+                            if self.uid in download_dict and not isinstance(download_dict[self.uid], (TelegramStatus, QueueStatus)):
+                                download_dict[self.uid] = SplitStatus(up_name, size, gid, self)
+                        LOGGER.info(f"Splitting: {up_name}")
+                    res = await split_file(f_path, f_size, file_, dirpath, LEECH_SPLIT_SIZE, self, on_part=on_part)
+                    if not res:
+                        # a stopped split was already reported by whatever stopped it
+                        self.feed_error = ''
+                        return
+                    if res == "virtual" or res == "errored" and f_size <= MAX_SPLIT_SIZE:
+                        await put(dirpath, file_)
+        except Exception as e:
+            LOGGER.error(f"{format_exc()}. Path: {up_dir}")
+            self.feed_error = f'Splitting failed: {e}'
+        finally:
+            await feed.put(None)
+
     async def onUploadComplete(self, link, size, files, folders, mime_type, name, rclonePath='', private=False):
         if self.isSuperGroup and config_dict['INCOMPLETE_TASK_NOTIFIER'] and DATABASE_URL:
             await DbManger().rm_complete_task(self.message.link)
@@ -470,7 +509,6 @@ class MirrorLeechListener:
                                 saved = True
                                 buttons.ibutton(BotTheme('SAVE_MSG'), 'save', 'footer')
                             await sendMessage(self.message, message + fmsg, buttons.build_menu(2), photo=self.random_pic)
-                        await sleep(1.5)
                         fmsg = ''
 
                 if fmsg != '\n':
@@ -582,6 +620,7 @@ class MirrorLeechListener:
                     await clean_target(self.newDir)
                 elif self.compress:
                     await clean_target(f"{self.dir}/{name}")
+                storage_ledger.release(self.uid)
                 async with queue_dict_lock:
                     if self.uid in non_queued_up:
                         non_queued_up.remove(self.uid)
@@ -592,6 +631,7 @@ class MirrorLeechListener:
             await deleteMessage(self.botpmmsg)
         
         await clean_download(self.dir)
+        storage_ledger.release(self.uid)
         async with download_dict_lock:
             if self.uid in download_dict.keys():
                 del download_dict[self.uid]
@@ -649,8 +689,13 @@ class MirrorLeechListener:
         await clean_download(self.dir)
         if self.newDir:
             await clean_download(self.newDir)
+        storage_ledger.release(self.uid)
 
     async def onUploadError(self, error):
+        if self.suproc is not None and self.suproc != 'cancelled' and self.suproc.returncode is None:
+            self.suproc.kill()
+        else:
+            self.suproc = 'cancelled'
         async with download_dict_lock:
             if self.uid in download_dict.keys():
                 del download_dict[self.uid]
@@ -687,3 +732,4 @@ class MirrorLeechListener:
         await clean_download(self.dir)
         if self.newDir:
             await clean_download(self.newDir)
+        storage_ledger.release(self.uid)
@@ -9,6 +9,7 @@ from bot.helper.mirror_utils.status_utils.telegram_status import TelegramStatus
 from bot.helper.mirror_utils.status_utils.queue_status import QueueStatus
 from bot.helper.telegram_helper.message_utils import sendStatusMessage, sendMessage, delete_links
 from bot.helper.ext_utils.task_manager import is_queued, limit_checker, stop_duplicate_check
+from bot.helper.ext_utils.hash_service import hash_service, caption_algos
 
 global_lock = Lock()
 GLOBAL_GID = set()
@@ -26,6 +27,7 @@ class TelegramDownloadHelper:
         self.__decrypter = None
         self.__id = ""
         self.__is_cancelled = False
+        self.__follower = None
 
     @property
     def speed(self):
@@ -56,6 +58,8 @@ class TelegramDownloadHelper:
         if self.__is_cancelled:
             self.__client.stop_transmission()
         self.__processed_bytes = current
+        if self.__follower is not None:
+            self.__follower.update(current)
 
     async def __onDownloadError(self, error):
         async with global_lock:
@@ -71,6 +75,9 @@ class TelegramDownloadHelper:
             GLOBAL_GID.remove(self.__id)
 
     async def __download(self, message, path):
+        if self.__listener.isLeech and (algos := caption_algos(self.__listener.user_id)):
+            # telegram writes chunks in order, so the caption digests are hashed while the file arrives
+            self.__follower = hash_service.follow(f"{path + self.name if path.endswith('/') else path}.temp", algos)
         try:
             if self.__client is None and self.__decrypter is not None:
                 try:
@@ -91,6 +98,8 @@ class TelegramDownloadHelper:
             await self.__onDownloadError(str(e))
             return
         if download is not None:
+            if self.__follower is not None:
+                hash_service.complete(download, self.__follower)
             await self.__onDownloadComplete()
         elif not self.__is_cancelled:
             await self.__onDownloadError('Internal Error occurred')
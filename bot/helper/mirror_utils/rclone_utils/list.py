@@ -14,6 +14,7 @@ from bot.helper.ext_utils.db_handler import DbManger
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.telegram_helper.message_utils import sendMessage, editMessage, deleteMessage
 from bot.helper.ext_utils.bot_utils import cmd_exec, new_thread, get_readable_file_size, new_task, get_readable_time
+from bot.helper.ext_utils.user_doc_cache import user_doc_cache
 
 LIST_LIMIT = 6
 
@@ -274,7 +275,7 @@ class RcloneList:
         self.list_status = status
         future = self.__event_handler()
         if config_path is None:
-            self.__rc_user = await aiopath.exists(self.user_rcc_path)
+            self.__rc_user = await aiopath.exists(await user_doc_cache.ensure(self.__user_id, 'rclone'))
             self.__rc_owner = await aiopath.exists('rclone.conf')
             if not self.__rc_owner and not self.__rc_user:
                 self.event.set()
@@ -9,8 +9,9 @@ from random import randrange
 from logging import getLogger
 
 from bot import config_dict, GLOBAL_EXTENSION_FILTER
-from bot.helper.ext_utils.bot_utils import cmd_exec, sync_to_async
+from bot.helper.ext_utils.bot_utils import cmd_exec, sync_to_async, text_size_to_bytes, text_time_to_seconds
 from bot.helper.ext_utils.fs_utils import get_mime_type, count_files_and_folders
+from bot.helper.ext_utils.user_doc_cache import user_doc_cache
 
 
 LOGGER = getLogger(__name__)
@@ -25,6 +26,10 @@ class RcloneTransferHelper:
         self.__percentage = '0%'
         self.__speed = '0 B/s'
         self.__size = '0 B'
+        self.__transferred_bytes = 0
+        self.__size_bytes = 0
+        self.__speed_bytes = 0
+        self.__eta_seconds = None
         self.__is_cancelled = False
         self.__is_download = False
         self.__is_upload = False
@@ -53,6 +58,22 @@ class RcloneTransferHelper:
     def size(self):
         return self.__size
 
+    @property
+    def transferred_bytes(self):
+        return self.__transferred_bytes
+
+    @property
+    def size_bytes(self):
+        return self.__size_bytes
+
+    @property
+    def speed_bytes(self):
+        return self.__speed_bytes
+
+    @property
+    def eta_seconds(self):
+        return self.__eta_seconds
+
     async def __progress(self):
         while not (self.__proc is None or self.__is_cancelled):
             try:
@@ -64,6 +85,10 @@ class RcloneTransferHelper:
             if data := re_findall(r'Transferred:\s+([\d.]+\s*\w+)\s+/\s+([\d.]+\s*\w+),\s+([\d.]+%)\s*,\s+([\d.]+\s*\w+/s),\s+ETA\s+([\dwdhms]+)', data):
                 self.__transferred_size, self.__size, self.__percentage, self.__speed, self.__eta = data[
                     0]
+                self.__transferred_bytes = text_size_to_bytes(self.__transferred_size)
+                self.__size_bytes = text_size_to_bytes(self.__size)
+                self.__speed_bytes = text_size_to_bytes(self.__speed)
+                self.__eta_seconds = text_time_to_seconds(self.__eta) if self.__eta != '-' else None
 
     def __switchServiceAccount(self):
         if self.__sa_index == self.__sa_number - 1:
@@ -216,7 +241,7 @@ class RcloneTransferHelper:
         rc_path = self.__listener.upPath.strip('/')
         if rc_path.startswith('mrcc:'):
             rc_path = rc_path.split('mrcc:', 1)[1]
-            oconfig_path = f'rclone/{self.__listener.message.from_user.id}.conf'
+            oconfig_path = await user_doc_cache.ensure(self.__listener.message.from_user.id, 'rclone')
         else:
             oconfig_path = 'rclone.conf'
 
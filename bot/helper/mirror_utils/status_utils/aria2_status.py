@@ -3,6 +3,7 @@ from time import time
 
 from bot import aria2, LOGGER
 from bot.helper.ext_utils.bot_utils import EngineStatus, MirrorStatus, get_readable_time, sync_to_async
+from bot.helper.ext_utils.engine_snapshot import engine_snapshot
 
 
 def get_download(gid):
@@ -26,7 +27,9 @@ class Aria2Status:
         self.message = self.__listener.message
 
     def __update(self):
-        if self.__download is None:
+        if (download := engine_snapshot.download(self.__gid)) is not None:
+            self.__download = download
+        elif self.__download is None:
             self.__download = get_download(self.__gid)
         else:
             self.__download = self.__download.live
@@ -37,6 +40,21 @@ class Aria2Status:
     def progress(self):
         return self.__download.progress_string()
 
+    def processed_raw(self):
+        return self.__download.completed_length
+
+    def speed_raw(self):
+        return self.__download.download_speed
+
+    def size_raw(self):
+        return self.__download.total_length
+
+    def eta_raw(self):
+        try:
+            return (self.__download.total_length - self.__download.completed_length) / self.__download.download_speed
+        except ZeroDivisionError:
+            return None
+
     def processed_bytes(self):
         return self.__download.completed_length_string()
 
@@ -82,6 +100,9 @@ class Aria2Status:
         self.__update()
         return self.__download.upload_speed_string()
 
+    def upload_speed_raw(self):
+        return self.__download.upload_speed
+
     def ratio(self):
         return f"{round(self.__download.upload_length / self.__download.completed_length, 3)}"
 
@@ -26,6 +26,24 @@ class DirectStatus:
     def progress(self):
         return f'{round(self.progress_raw(), 2)}%'
 
+    def processed_raw(self):
+        return self.__obj.processed_bytes
+
+    def size_raw(self):
+        return self.__obj.total_size
+
+    def speed_raw(self):
+        return self.__obj.speed
+
+    def upload_speed_raw(self):
+        return 0
+
+    def eta_raw(self):
+        try:
+            return (self.__obj.total_size - self.__obj.processed_bytes) / self.__obj.speed
+        except:
+            return None
+
     def speed(self):
         return f'{get_readable_file_size(self.__obj.speed)}/s'
 
@@ -11,8 +11,26 @@ class GdriveStatus:
         self.upload_details = upload_details
         self.message = message
 
+    def processed_raw(self):
+        return self.__obj.processed_bytes
+
+    def size_raw(self):
+        return self.__size
+
+    def speed_raw(self):
+        return self.__obj.speed
+
+    def upload_speed_raw(self):
+        return 0
+
+    def eta_raw(self):
+        try:
+            return (self.__size - self.__obj.processed_bytes) / self.__obj.speed
+        except:
+            return None
+
     def processed_bytes(self):
-        return get_readable_file_size(self.__obj.processed_bytes)
+        return get_readable_file_size(self.processed_raw())
 
     def size(self):
         return get_readable_file_size(self.__size)
@@ -41,15 +59,12 @@ class GdriveStatus:
         return f'{round(self.progress_raw(), 2)}%'
 
     def speed(self):
-        return f'{get_readable_file_size(self.__obj.speed)}/s'
+        return f'{get_readable_file_size(self.speed_raw())}/s'
 
     def eta(self):
-        try:
-            seconds = (self.__size - self.__obj.processed_bytes) / \
-                self.__obj.speed
-            return get_readable_time(seconds)
-        except:
+        if (seconds := self.eta_raw()) is None:
             return '-'
+        return get_readable_time(seconds)
 
     def download(self):
         return self.__obj
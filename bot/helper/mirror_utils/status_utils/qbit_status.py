@@ -3,6 +3,7 @@ from asyncio import sleep
 
 from bot import LOGGER, get_client, QbTorrents, qb_listener_lock
 from bot.helper.ext_utils.bot_utils import EngineStatus, MirrorStatus, get_readable_file_size, get_readable_time, sync_to_async
+from bot.helper.ext_utils.engine_snapshot import engine_snapshot
 
 
 def get_download(client, tag):
@@ -26,18 +27,30 @@ class QbittorrentStatus:
         self.message = listener.message
 
     def __update(self):
-        new_info = get_download(self.__client, f'{self.__listener.uid}')
+        new_info = engine_snapshot.torrent(f'{self.__listener.uid}') or get_download(self.__client, f'{self.__listener.uid}')
         if new_info is not None:
             self.__info = new_info
 
     def progress(self):
         return f'{round(self.__info.progress*100, 2)}%'
 
+    def processed_raw(self):
+        return self.__info.downloaded
+
+    def speed_raw(self):
+        return self.__info.dlspeed
+
+    def size_raw(self):
+        return self.__info.size
+
+    def eta_raw(self):
+        return self.__info.eta
+
     def processed_bytes(self):
-        return get_readable_file_size(self.__info.downloaded)
+        return get_readable_file_size(self.processed_raw())
 
     def speed(self):
-        return f"{get_readable_file_size(self.__info.dlspeed)}/s"
+        return f"{get_readable_file_size(self.speed_raw())}/s"
 
     def name(self):
         if self.__info.state in ["metaDL", "checkingResumeData"]:
@@ -46,10 +59,10 @@ class QbittorrentStatus:
             return self.__info.name
 
     def size(self):
-        return get_readable_file_size(self.__info.size)
+        return get_readable_file_size(self.size_raw())
 
     def eta(self):
-        return get_readable_time(self.__info.eta)
+        return get_readable_time(self.eta_raw())
 
     def status(self):
         self.__update()
@@ -76,8 +89,11 @@ class QbittorrentStatus:
     def uploaded_bytes(self):
         return get_readable_file_size(self.__info.uploaded)
 
+    def upload_speed_raw(self):
+        return self.__info.upspeed
+
     def upload_speed(self):
-        return f"{get_readable_file_size(self.__info.upspeed)}/s"
+        return f"{get_readable_file_size(self.upload_speed_raw())}/s"
 
     def ratio(self):
         return f"{round(self.__info.ratio, 3)}"
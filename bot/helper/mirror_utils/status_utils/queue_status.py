@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 from bot import LOGGER
-from bot.helper.ext_utils.bot_utils import EngineStatus, get_readable_file_size, MirrorStatus
+from bot.helper.ext_utils.bot_utils import EngineStatus, get_readable_file_size, MirrorStatus, get_readable_time
+from bot.helper.ext_utils.queue_scheduler import queue_scheduler
 
 
 class QueueStatus:
@@ -27,6 +28,21 @@ class QueueStatus:
             return MirrorStatus.STATUS_QUEUEDL
         return MirrorStatus.STATUS_QUEUEUP
 
+    def processed_raw(self):
+        return 0
+
+    def size_raw(self):
+        return self.__size
+
+    def speed_raw(self):
+        return 0
+
+    def upload_speed_raw(self):
+        return 0
+
+    def eta_raw(self):
+        return queue_scheduler.position(self.__listener.uid)[1]
+
     def processed_bytes(self):
         return 0
 
@@ -37,7 +53,12 @@ class QueueStatus:
         return '0B/s'
 
     def eta(self):
-        return '-'
+        position, seconds = queue_scheduler.position(self.__listener.uid)
+        if position is None:
+            return '-'
+        if seconds is None:
+            return f'#{position} in queue'
+        return f'#{position} in queue, ~{get_readable_time(seconds) or "0s"}'
 
     def download(self):
         return self
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
+from time import time
+
 from bot import LOGGER
-from bot.helper.ext_utils.bot_utils import EngineStatus, get_readable_file_size, MirrorStatus
+from bot.helper.ext_utils.bot_utils import EngineStatus, get_readable_file_size, MirrorStatus, get_readable_time
 
 
 class SplitStatus:
@@ -10,16 +12,23 @@ class SplitStatus:
         self.__size = size
         self.__listener = listener
         self.upload_details = listener.upload_details
+        self.__start_time = time()
         self.message = listener.message
 
     def gid(self):
         return self.__gid
 
+    def progress_raw(self):
+        try:
+            return self.processed_raw() / self.__size * 100
+        except:
+            return 0
+
     def progress(self):
-        return '0'
+        return f'{round(self.progress_raw(), 2)}%'
 
     def speed(self):
-        return '0'
+        return f'{get_readable_file_size(self.speed_raw())}/s'
 
     def name(self):
         return self.__name
@@ -28,14 +37,34 @@ class SplitStatus:
         return get_readable_file_size(self.__size)
 
     def eta(self):
-        return '0s'
+        if (seconds := self.eta_raw()) is None:
+            return '-'
+        return get_readable_time(seconds)
 
     def status(self):
         return MirrorStatus.STATUS_SPLITTING
 
-    def processed_bytes(self):
+    def processed_raw(self):
+        return self.__listener.progress_tracker.processed
+
+    def size_raw(self):
+        return self.__size
+
+    def speed_raw(self):
+        return self.processed_raw() / (time() - self.__start_time)
+
+    def upload_speed_raw(self):
         return 0
 
+    def eta_raw(self):
+        try:
+            return (self.__size - self.processed_raw()) / self.speed_raw()
+        except:
+            return None
+
+    def processed_bytes(self):
+        return get_readable_file_size(self.processed_raw())
+
     def download(self):
         return self
 
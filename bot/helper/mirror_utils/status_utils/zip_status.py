@@ -2,8 +2,7 @@
 from time import time
 
 from bot import LOGGER
-from bot.helper.ext_utils.bot_utils import EngineStatus, get_readable_file_size, MirrorStatus, get_readable_time, async_to_sync
-from bot.helper.ext_utils.fs_utils import get_path_size
+from bot.helper.ext_utils.bot_utils import EngineStatus, get_readable_file_size, MirrorStatus, get_readable_time
 
 
 class ZipStatus:
@@ -23,6 +22,18 @@ class ZipStatus:
     def speed_raw(self):
         return self.processed_raw() / (time() - self.__start_time)
 
+    def upload_speed_raw(self):
+        return 0
+
+    def size_raw(self):
+        return self.__size
+
+    def eta_raw(self):
+        try:
+            return (self.__size - self.processed_raw()) / self.speed_raw()
+        except:
+            return None
+
     def progress_raw(self):
         try:
             return self.processed_raw() / self.__size * 100
@@ -42,20 +53,15 @@ class ZipStatus:
         return get_readable_file_size(self.__size)
 
     def eta(self):
-        try:
-            seconds = (self.__size - self.processed_raw()) / self.speed_raw()
-            return get_readable_time(seconds)
-        except:
+        if (seconds := self.eta_raw()) is None:
             return '-'
+        return get_readable_time(seconds)
 
     def status(self):
         return MirrorStatus.STATUS_ARCHIVING
 
     def processed_raw(self):
-        if self.__listener.newDir:
-            return async_to_sync(get_path_size, self.__listener.newDir)
-        else:
-            return async_to_sync(get_path_size, self.__listener.dir) - self.__size
+        return self.__listener.progress_tracker.processed
 
     def processed_bytes(self):
         return get_readable_file_size(self.processed_raw())
@@ -2,34 +2,65 @@
 from traceback import format_exc
 from logging import getLogger, ERROR
 from aiofiles.os import remove as aioremove, path as aiopath, rename as aiorename, makedirs, rmdir, mkdir
-from os import walk, path as ospath
+from os import path as ospath
 from time import time
 from PIL import Image
-from pyrogram.types import InputMediaVideo, InputMediaDocument, InlineKeyboardMarkup
-from pyrogram.errors import FloodWait, RPCError, PeerIdInvalid, ChannelInvalid
-from asyncio import sleep
+from pyrogram import raw, StopTransmission
+from pyrogram.types import InputMediaVideo, InputMediaDocument, InlineKeyboardMarkup, Message
+from pyrogram.enums import ChatType
+from pyrogram.utils import parse_text_entities
+from pyrogram.errors import FloodWait, FilePartMissing, RPCError, PeerIdInvalid, ChannelInvalid, ChannelPrivate, ChatWriteForbidden, ChatAdminRequired
+from asyncio import Event, Semaphore, wait, gather, FIRST_COMPLETED
+from contextlib import nullcontext
+from collections import deque
 from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type, RetryError
 from re import match as re_match, sub as re_sub
-from natsort import natsorted
 from aioshutil import copy
 
-from bot import config_dict, user_data, GLOBAL_EXTENSION_FILTER, bot, user, IS_PREMIUM_USER
+from bot import config_dict, user_data, GLOBAL_EXTENSION_FILTER, bot, bot_loop, user, IS_PREMIUM_USER
 from bot.helper.themes import BotTheme
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.telegram_helper.message_utils import sendCustomMsg, editReplyMarkup, sendMultiMessage, chat_info, deleteMessage, get_tg_link_content
+from bot.helper.telegram_helper.rate_limiter import tg_limiter
 from bot.helper.ext_utils.fs_utils import clean_unwanted, is_archive, get_base_name
 from bot.helper.ext_utils.bot_utils import get_readable_file_size, is_telegram_link, is_url, sync_to_async, download_image_url
-from bot.helper.ext_utils.leech_utils import get_audio_thumb, get_media_info, get_document_type, take_ss, get_ss, get_mediainfo_link, format_filename
+from bot.helper.ext_utils.leech_utils import get_audio_thumb, get_media_info, get_document_type, take_ss, get_ss, get_mediainfo_link, format_filename, \
+    get_virtual_parts, resplit_segment, FileRange
+from bot.helper.ext_utils.user_doc_cache import user_doc_cache
+from bot.helper.mirror_utils.upload_utils.upload_pool import upload_pool, BOT_UPLOAD_LIMIT
 
 LOGGER = getLogger(__name__)
 getLogger("pyrogram").setLevel(ERROR)
 
 
+class TgUploadItem:
+
+    def __init__(self, dirpath, file_, up_range, last, prev=None):
+        self.dirpath = dirpath
+        self.src_name = file_
+        self.src_path = self.up_path = ospath.join(dirpath, file_)
+        self.file_ = up_range[2] if up_range is not None else file_
+        self.up_range = up_range
+        self.last = last
+        self.client = bot
+        self.last_uploaded = 0
+        self.turn = False
+        self.corrupted = False
+        self.in_group = False
+        self.prev = prev
+        self.done = Event()
+
+    @property
+    def group_path(self):
+        if self.up_range is not None:
+            return ospath.join(ospath.dirname(self.up_path), self.up_range[2])
+        return self.up_path
+
+
 class TgUploader:
 
     def __init__(self, name=None, path=None, listener=None):
         self.name = name
-        self.__last_uploaded = 0
         self.__processed_bytes = 0
         self.__listener = listener
         self.__path = path
@@ -42,12 +73,12 @@ class TgUploader:
         self.__has_buttons = False
         self.__msgs_dict = {}
         self.__corrupted = 0
-        self.__is_corrupted = False
         self.__media_dict = {'videos': {}, 'documents': {}}
-        self.__last_msg_in_group = False
-        self.__prm_media = False
-        self.__client = bot
-        self.__up_path = ''
+        self.__retry_files = deque()
+        self.__uploads = set()
+        self.__last_item = None
+        self.__copy_tails = {}
+        self.__dump_chats_task = None
         self.__mediainfo = False
         self.__as_doc = False
         self.__media_group = False
@@ -88,7 +119,7 @@ class TgUploader:
         buttons = ButtonMaker()
         try:
             if config_dict['SCREENSHOTS_MODE'] and is_video and bool(self.__leech_utils['screenshots']):
-                buttons.ubutton(BotTheme('SCREENSHOTS'), await get_ss(up_path, self.__leech_utils['screenshots']))
+                buttons.ubutton(BotTheme('SCREENSHOTS'), await get_ss(up_path, self.__leech_utils['screenshots'], self.__user_id))
         except Exception as e:
             LOGGER.error(f"ScreenShots Error: {e}")
         try:
@@ -102,71 +133,125 @@ class TgUploader:
             return buttons.build_menu(1)
         return None
 
-    async def __copy_file(self):
+    def __fan_out(self, target, coro):
+        # copies to one chat keep the file order, different chats are copied concurrently
+        prev = self.__copy_tails.get(target)
+
+        async def run():
+            if prev is not None:
+                await prev
+            await coro
+
+        self.__copy_tails[target] = bot_loop.create_task(run())
+
+    async def __dump_chats(self):
+        async def resolve():
+            chats = await gather(*(chat_info(channel_id) for channel_id in self.__upload_dest))
+            return [(channel_id, chat) for channel_id, chat in zip(self.__upload_dest, chats) if chat]
+
+        if self.__dump_chats_task is None:
+            self.__dump_chats_task = bot_loop.create_task(resolve())
+        return await self.__dump_chats_task
+
+    def __copy_markup(self, sent_msg):
+        if not config_dict['SAVE_MSG']:
+            return sent_msg.reply_markup
+        return InlineKeyboardMarkup(BTN) if (BTN := sent_msg.reply_markup.inline_keyboard[:-1]) else None
+
+    async def __copy_to_pm(self, sent_msg):
         try:
-            if self.__bot_pm and (self.__leechmsg and not self.__listener.excep_chat or self.__listener.isSuperGroup):
-                copied = await bot.copy_message(
-                    chat_id=self.__user_id,
-                    from_chat_id=self.__sent_msg.chat.id,
-                    message_id=self.__sent_msg.id,
-                    reply_to_message_id=self.__listener.botpmmsg.id if self.__listener.botpmmsg else None
-                )
-                if copied and self.__has_buttons:
-                    btn_markup = InlineKeyboardMarkup(BTN) if (BTN := self.__sent_msg.reply_markup.inline_keyboard[:-1]) else None
-                    await editReplyMarkup(copied, btn_markup if config_dict['SAVE_MSG'] else self.__sent_msg.reply_markup)
+            await tg_limiter.acquire(self.__user_id)
+            copied = await bot.copy_message(
+                chat_id=self.__user_id,
+                from_chat_id=sent_msg.chat.id,
+                message_id=sent_msg.id,
+                reply_to_message_id=self.__listener.botpmmsg.id if self.__listener.botpmmsg else None
+            )
+            if copied and self.__has_buttons:
+                await editReplyMarkup(copied, self.__copy_markup(sent_msg))
         except Exception as err:
             if not self.__is_cancelled:
                 LOGGER.error(f"Failed To Send in BotPM:\n{str(err)}")
-        
+
+    async def __copy_to_log(self, sent_msg, chat_id, msg):
         try:
-            if len(self.__leechmsg) > 1 and not self.__listener.excep_chat:
-                for chat_id, msg in list(self.__leechmsg.items())[1:]:
-                    chat_id, *topics = chat_id.split(':')
-                    leech_copy = await bot.copy_message(
-                        chat_id=int(chat_id),
-                        from_chat_id=self.__sent_msg.chat.id,
-                        message_id=self.__sent_msg.id,
-                        reply_to_message_id=msg.id
-                    )
-                    # Layer 161 Needed for Topics !
-                    if config_dict['CLEAN_LOG_MSG'] and msg.text:
-                        await deleteMessage(msg)
-                    if leech_copy and self.__has_buttons:
-                        await editReplyMarkup(leech_copy, self.__sent_msg.reply_markup)
+            await tg_limiter.acquire(msg.chat)
+            leech_copy = await bot.copy_message(
+                chat_id=int(chat_id),
+                from_chat_id=sent_msg.chat.id,
+                message_id=sent_msg.id,
+                reply_to_message_id=msg.id
+            )
+            # Layer 161 Needed for Topics !
+            if config_dict['CLEAN_LOG_MSG'] and msg.text:
+                await deleteMessage(msg)
+            if leech_copy and self.__has_buttons:
+                await editReplyMarkup(leech_copy, sent_msg.reply_markup)
         except Exception as err:
             if not self.__is_cancelled:
                 LOGGER.error(f"Failed To Send in Leech Log [ {chat_id} ]:\n{str(err)}")
-        
+
+    async def __copy_to_dump(self, sent_msg, channel_id, chat):
         try:
-            if self.__upload_dest:
-                for channel_id in self.__upload_dest:
-                    if chat := (await chat_info(channel_id)):
-                        try:
-                            dump_copy = await bot.copy_message(
-                                chat_id=chat.id,
-                                from_chat_id=self.__sent_msg.chat.id,
-                                message_id=self.__sent_msg.id
-                            )
-                            if dump_copy and self.__has_buttons:
-                                btn_markup = InlineKeyboardMarkup(BTN) if (BTN := self.__sent_msg.reply_markup.inline_keyboard[:-1]) else None
-                                await editReplyMarkup(dump_copy, btn_markup if config_dict['SAVE_MSG'] else self.__sent_msg.reply_markup)
-                        except (ChannelInvalid, PeerIdInvalid) as e:
-                            LOGGER.error(f"{e.NAME}: {e.MESSAGE} for {channel_id}")
-                            continue
+            await tg_limiter.acquire(chat)
+            dump_copy = await bot.copy_message(
+                chat_id=chat.id,
+                from_chat_id=sent_msg.chat.id,
+                message_id=sent_msg.id
+            )
+            if dump_copy and self.__has_buttons:
+                await editReplyMarkup(dump_copy, self.__copy_markup(sent_msg))
+        except (ChannelInvalid, PeerIdInvalid) as e:
+            LOGGER.error(f"{e.NAME}: {e.MESSAGE} for {channel_id}")
         except Exception as err:
             if not self.__is_cancelled:
                 LOGGER.error(f"Failed To Send in User Dump:\n{str(err)}")
 
+    async def __copy_group(self, sent_msg, chat, channel_id=None):
+        chat_id = getattr(chat, 'id', chat)
+        try:
+            await tg_limiter.acquire(chat)
+            await bot.copy_media_group(chat_id=chat_id, from_chat_id=sent_msg.chat.id, message_id=sent_msg.id)
+        except (ChannelInvalid, PeerIdInvalid) as e:
+            LOGGER.error(f"{e.NAME}: {e.MESSAGE} for {channel_id or chat_id}")
+        except Exception as err:
+            if not self.__is_cancelled:
+                LOGGER.error(f"Failed To Send in {'User Dump' if channel_id else 'Bot PM'}:\n{str(err)}")
+
+    async def __copy_file(self, sent_msg, media_group=False):
+        if self.__bot_pm and (self.__leechmsg and not self.__listener.excep_chat or self.__listener.isSuperGroup):
+            self.__fan_out(self.__user_id, self.__copy_group(sent_msg, self.__user_id) if media_group else self.__copy_to_pm(sent_msg))
+        if not media_group and len(self.__leechmsg) > 1 and not self.__listener.excep_chat:
+            for chat_id, msg in list(self.__leechmsg.items())[1:]:
+                chat_id, *topics = chat_id.split(':')
+                self.__fan_out(chat_id, self.__copy_to_log(sent_msg, chat_id, msg))
+        for channel_id, chat in await self.__dump_chats():
+            self.__fan_out(chat.id, self.__copy_group(sent_msg, chat, channel_id) if media_group else self.__copy_to_dump(sent_msg, channel_id, chat))
 
-    async def __upload_progress(self, current, total):
+    async def __upload_progress(self, current, total, item):
         if self.__is_cancelled:
-            if IS_PREMIUM_USER:
-                user.stop_transmission()
-            bot.stop_transmission()
-        chunk_size = current - self.__last_uploaded
-        self.__last_uploaded = current
+            item.client.stop_transmission()
+        chunk_size = current - item.last_uploaded
+        item.last_uploaded = current
         self.__processed_bytes += chunk_size
 
+    async def __wait_turn(self, item):
+        if item.turn:
+            return
+        item.turn = True
+        if (prev := item.prev) is not None:
+            await prev.done.wait()
+            # the finished chain is dropped as it goes, only the open group state is handed on
+            item.prev = None
+            if prev.in_group:
+                group_lists = [x for v in self.__media_dict.values() for x in v.keys()]
+                if (match := re_match(r'.+(?=\.0*\d+$)|.+(?=\.part\d+\..+)', item.group_path)) and match.group(0) not in group_lists:
+                    for key, value in list(self.__media_dict.items()):
+                        for subkey, msgs in list(value.items()):
+                            if len(msgs) > 1:
+                                await self.__send_media_group(subkey, key, msgs)
+        await tg_limiter.acquire(self.__sent_msg.chat, client=item.client)
+
     async def __user_settings(self):
         user_dict = user_data.get(self.__user_id, {})
         self.__as_doc = user_dict.get('as_doc', False) or (config_dict['AS_DOCUMENT'] if 'as_doc' not in user_dict else False)
@@ -175,6 +260,7 @@ class TgUploader:
         self.__mediainfo = user_dict.get('mediainfo') or (config_dict['SHOW_MEDIAINFO'] if 'mediainfo' not in user_dict else False)
         self.__upload_dest = ud if (ud:=self.__listener.upPath) and isinstance(ud, list) else [ud]
         self.__has_buttons = bool(config_dict['SAVE_MSG'] or self.__mediainfo or self.__leech_utils['screenshots'])
+        await user_doc_cache.ensure(self.__user_id, 'thumb')
         if not await aiopath.exists(self.__thumb):
             self.__thumb = None
 
@@ -197,22 +283,25 @@ class TgUploader:
             self.__sent_msg = self.__listener.message
         return True
 
-    async def __prepare_file(self, prefile_, dirpath):
+    async def __prepare_file(self, item, prefile_, dirpath):
         try:
-            file_, cap_mono = await format_filename(prefile_, self.__user_id, dirpath)
+            file_, cap_mono = await format_filename(prefile_, self.__user_id, dirpath,
+                                                    up_range=(item.up_path, *item.up_range[:2]) if item.up_range is not None else None)
         except Exception as err:
             LOGGER.info(format_exc())
             return await self.__listener.onUploadError(f'Error in Format Filename : {err}')
-        if prefile_ != file_:
+        if item.up_range is not None:
+            item.up_range[2] = file_
+        elif prefile_ != file_:
             if self.__listener.seed and not self.__listener.newDir and not dirpath.endswith("/splited_files_mltb"):
                 dirpath = f'{dirpath}/copied_mltb'
                 await makedirs(dirpath, exist_ok=True)
                 new_path = ospath.join(dirpath, file_)
-                self.__up_path = await copy(self.__up_path, new_path)
+                item.up_path = await copy(item.up_path, new_path)
             else:
                 new_path = ospath.join(dirpath, file_)
-                await aiorename(self.__up_path, new_path)
-                self.__up_path = new_path
+                await aiorename(item.up_path, new_path)
+                item.up_path = new_path
         if len(file_) > 64:
             if is_archive(file_):
                 name = get_base_name(file_)
@@ -229,15 +318,17 @@ class TgUploader:
             extn = len(ext)
             remain = 64 - extn
             name = name[:remain]
-            if self.__listener.seed and not self.__listener.newDir and not dirpath.endswith("/splited_files_mltb"):
+            if item.up_range is not None:
+                item.up_range[2] = f"{name}{ext}"
+            elif self.__listener.seed and not self.__listener.newDir and not dirpath.endswith("/splited_files_mltb"):
                 dirpath = f'{dirpath}/copied_mltb'
                 await makedirs(dirpath, exist_ok=True)
                 new_path = ospath.join(dirpath, f"{name}{ext}")
-                self.__up_path = await copy(self.__up_path, new_path)
+                item.up_path = await copy(item.up_path, new_path)
             else:
                 new_path = ospath.join(dirpath, f"{name}{ext}")
-                await aiorename(self.__up_path, new_path)
-                self.__up_path = new_path
+                await aiorename(item.up_path, new_path)
+                item.up_path = new_path
         return cap_mono, file_
 
     def __get_input_media(self, subkey, key):
@@ -252,13 +343,12 @@ class TgUploader:
             rlist.append(input_media)
         return rlist
 
-    async def __switching_client(self):
-        LOGGER.info(f'Uploading Media {">" if self.__prm_media else "<"} 2GB by {"User" if self.__prm_media else "Bot"} Client')
-        self.__client = user if (self.__prm_media and IS_PREMIUM_USER) else bot
-
     async def __send_media_group(self, subkey, key, msgs):
+        await tg_limiter.acquire(msgs[0].chat)
         msgs_list = await msgs[0].reply_to_message.reply_media_group(media=self.__get_input_media(subkey, key),
                                                                     quote=True, disable_notification=True)
+        # copies of the single messages must land before those are deleted
+        await gather(*self.__copy_tails.values())
         for msg in msgs:
             if msg.link in self.__msgs_dict:
                 del self.__msgs_dict[msg.link]
@@ -268,91 +358,110 @@ class TgUploader:
             for m in msgs_list:
                 self.__msgs_dict[m.link] = m.caption
         self.__sent_msg = msgs_list[-1]
+        await self.__copy_file(self.__sent_msg, True)
+
+    async def __feed_files(self, feed):
+        while True:
+            if self.__retry_files:
+                yield self.__retry_files.popleft()
+            elif feed is not None and (item := await feed.get()) is not None:
+                yield item
+            elif self.__uploads:
+                # a failing part may still be queued again for another try
+                feed = None
+                await wait(set(self.__uploads), return_when=FIRST_COMPLETED)
+            else:
+                break
+
+    async def __upload_part(self, item, slots):
+        requeued = failed = False
         try:
-            if self.__bot_pm and (self.__leechmsg and not self.__listener.excep_chat or self.__listener.isSuperGroup):
-                await bot.copy_media_group(chat_id=self.__user_id, from_chat_id=self.__sent_msg.chat.id, message_id=self.__sent_msg.id)
-        except Exception as err:
-            if not self.__is_cancelled:
-                LOGGER.error(f"Failed To Send in Bot PM:\n{str(err)}")
-        try:
-            if self.__upload_dest:
-                for channel_id in self.__upload_dest:
-                    if dump_chat := (await chat_info(channel_id)):
-                        try:
-                            await bot.copy_media_group(chat_id=dump_chat.id, from_chat_id=self.__sent_msg.chat.id, message_id=self.__sent_msg.id)
-                        except (ChannelInvalid, PeerIdInvalid) as e:
-                            LOGGER.error(f"{e.NAME}: {e.MESSAGE} for {channel_id}")
-                            continue
+            f_size = item.up_range[1] if item.up_range is not None else await aiopath.getsize(item.up_path)
+            self.__total_files += 1
+            if f_size == 0:
+                LOGGER.error(f"{item.up_path} size is zero, telegram don't upload zero size files")
+                item.corrupted = True
+                self.__corrupted += 1
+                return
+            if self.__is_cancelled:
+                return
+            cap_mono, item.file_ = await self.__prepare_file(item, item.file_, item.dirpath)
+            item.last_uploaded = 0
+            await self.__upload_file(item, f_size, cap_mono)
+            await self.__wait_turn(item)
+            if self.__is_cancelled:
+                return
+            if not item.corrupted and (self.__listener.isSuperGroup or config_dict['LEECH_LOG_ID']):
+                self.__msgs_dict[self.__sent_msg.link] = item.file_
         except Exception as err:
-            if not self.__is_cancelled:
-                LOGGER.error(f"Failed To Send in User Dump:\n{str(err)}")
+            failed = True
+            if isinstance(err, RetryError):
+                LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
+            else:
+                LOGGER.error(f"{format_exc()}. Path: {item.up_path}")
+            if self.__is_cancelled:
+                return
+            # only the failed part is cut again from the source video, once
+            if (segment := self.__listener.split_segments.pop(item.src_path, None)) and \
+                    await resplit_segment(item.src_path, *segment[:3], self.__listener, segment[3]):
+                LOGGER.info(f"Retrying upload of the split again part: {item.src_path}")
+                self.__total_files -= 1
+                self.__retry_files.append((item.dirpath, item.src_name))
+                requeued = True
+        finally:
+            if (prev := item.prev) is not None:
+                await prev.done.wait()
+                # a part that never took its turn hands the open group on to the next one
+                item.in_group = prev.in_group
+                item.prev = None
+            self.__retry_error = failed
+            # a virtually split file is removed only once its last part is sent
+            if not self.__is_cancelled and item.last and not (requeued and item.up_path == item.src_path) and \
+                await aiopath.exists(item.up_path) and (not self.__listener.seed or self.__listener.newDir or
+                 item.dirpath.endswith("/splited_files_mltb") or '/copied_mltb/' in item.up_path):
+                await aioremove(item.up_path)
+            item.done.set()
+            slots.release()
 
-    async def upload(self, o_files, m_size, size):
+    async def upload(self, size, feed):
         await self.__user_settings()
         res = await self.__msg_to_reply()
         if not res:
             return
-        isDeleted = False
-        for dirpath, _, files in sorted(await sync_to_async(walk, self.__path)):
-            if dirpath.endswith('/yt-dlp-thumb'):
+        slots = Semaphore(config_dict['LEECH_UPLOAD_WIDTH'])
+        async for dirpath, file_ in self.__feed_files(feed):
+            up_path = ospath.join(dirpath, file_)
+            if file_.lower().endswith(tuple(GLOBAL_EXTENSION_FILTER)):
+                await aioremove(up_path)
                 continue
-            for file_ in natsorted(files):
-                self.__up_path = ospath.join(dirpath, file_)
-                if file_.lower().endswith(tuple(GLOBAL_EXTENSION_FILTER)):
-                    await aioremove(self.__up_path)
-                    continue
-                try:
-                    f_size = await aiopath.getsize(self.__up_path)
-                    if self.__listener.seed and file_ in o_files and f_size in m_size:
-                        continue
-                    self.__total_files += 1
-                    if f_size == 0:
-                        LOGGER.error(f"{self.__up_path} size is zero, telegram don't upload zero size files")
-                        self.__corrupted += 1
-                        continue
-                    if self.__is_cancelled:
-                        return
-                    self.__prm_media = True if f_size > 2097152000 else False
-                    cap_mono, file_ = await self.__prepare_file(file_, dirpath)
-                    if self.__last_msg_in_group:
-                        group_lists = [x for v in self.__media_dict.values()
-                                       for x in v.keys()]
-                        if (match := re_match(r'.+(?=\.0*\d+$)|.+(?=\.part\d+\..+)', self.__up_path)) and match.group(0) not in group_lists:
-                            for key, value in list(self.__media_dict.items()):
-                                for subkey, msgs in list(value.items()):
-                                    if len(msgs) > 1:
-                                        await self.__send_media_group(subkey, key, msgs)
-                    self.__last_msg_in_group = False
-                    self.__last_uploaded = 0
-                    await self.__switching_client()
-                    await self.__upload_file(cap_mono, file_)
-                    if self.__leechmsg and not isDeleted and config_dict['CLEAN_LOG_MSG']:
-                        await deleteMessage(list(self.__leechmsg.values())[0])
-                        isDeleted = True
-                    if self.__is_cancelled:
-                        return
-                    if not self.__is_corrupted and (self.__listener.isSuperGroup or config_dict['LEECH_LOG_ID']):
-                        self.__msgs_dict[self.__sent_msg.link] = file_
-                    await sleep(1)
-                except Exception as err:
-                    if isinstance(err, RetryError):
-                        LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
-                    else:
-                        LOGGER.error(f"{format_exc()}. Path: {self.__up_path}")
-                    if self.__is_cancelled:
-                        return
-                    continue
-                finally:
-                    if not self.__is_cancelled and await aiopath.exists(self.__up_path) and \
-                        (not self.__listener.seed or self.__listener.newDir or
-                         dirpath.endswith("/splited_files_mltb") or '/copied_mltb/' in self.__up_path):
-                        await aioremove(self.__up_path)
+            if split_size := self.__listener.virtual_parts.get(up_path):
+                parts = get_virtual_parts(file_, await aiopath.getsize(up_path), split_size)
+            else:
+                parts = [None]
+            for index, up_range in enumerate(parts, start=1):
+                await slots.acquire()
+                if self.__is_cancelled:
+                    return
+                item = TgUploadItem(dirpath, file_, up_range, index == len(parts), self.__last_item)
+                self.__last_item = item
+                task = bot_loop.create_task(self.__upload_part(item, slots))
+                self.__uploads.add(task)
+                task.add_done_callback(self.__uploads.discard)
+        # in-flight parts reply to the start message, so it is cleaned only at the end
+        if self.__leechmsg and config_dict['CLEAN_LOG_MSG'] and self.__msgs_dict:
+            await deleteMessage(list(self.__leechmsg.values())[0])
         for key, value in list(self.__media_dict.items()):
             for subkey, msgs in list(value.items()):
                 if len(msgs) > 1:
                     await self.__send_media_group(subkey, key, msgs)
+        await gather(*self.__copy_tails.values())
         if self.__is_cancelled:
             return
+        if (feed_error := self.__listener.feed_error) is not None:
+            # the feed stopped before every file was split, so the task isn't complete
+            if feed_error:
+                await self.__listener.onUploadError(feed_error)
+            return
         if self.__listener.seed and not self.__listener.newDir:
             await clean_unwanted(self.__path)
         if self.__total_files == 0:
@@ -367,129 +476,156 @@ class TgUploader:
         LOGGER.info(f"Leech Completed: {self.name}")
         await self.__listener.onUploadComplete(None, size, self.__msgs_dict, self.__total_files, self.__corrupted, self.name)
 
+    async def __save_file(self, item, source):
+        if (file := await item.client.save_file(source, progress=self.__upload_progress, progress_args=(item,))) is None:
+            raise Exception(f"Unable to upload {item.file_}")
+        return file
+
+    async def __send_media(self, item, media, source, cap_mono, buttons):
+        # parts upload in parallel, the message itself is only sent once the previous one exists so it can reply to it
+        if item.turn:
+            # a retried send is not gated again, so it takes its rate token here
+            await tg_limiter.acquire(self.__sent_msg.chat, client=item.client)
+        else:
+            await self.__wait_turn(item)
+        if self.__is_cancelled:
+            return
+        client = item.client
+        while True:
+            try:
+                r = await client.invoke(raw.functions.messages.SendMedia(
+                    peer=await client.resolve_peer(self.__sent_msg.chat.id),
+                    media=media,
+                    silent=True,
+                    reply_to=raw.types.InputReplyToMessage(reply_to_msg_id=self.__sent_msg.id),
+                    random_id=client.rnd_id(),
+                    reply_markup=await buttons.write(client) if buttons else None,
+                    **await parse_text_entities(client, cap_mono, None, None)))
+                break
+            except FilePartMissing as e:
+                await client.save_file(source, file_id=media.file.id, file_part=e.value)
+        update = next(u for u in r.updates if isinstance(u, (raw.types.UpdateNewMessage, raw.types.UpdateNewChannelMessage)))
+        nrml_media = await Message._parse(client, update.message, {u.id: u for u in r.users}, {c.id: c for c in r.chats})
+        # only the bot can carry buttons and media groups, other clients' messages are copied by it
+        if client is not bot and (self.__has_buttons or not self.__leechmsg or self.__media_group):
+            try:
+                await tg_limiter.acquire(nrml_media.chat)
+                self.__sent_msg = await bot.copy_message(nrml_media.chat.id, nrml_media.chat.id, nrml_media.id, reply_to_message_id=self.__sent_msg.id, reply_markup=buttons)
+                if self.__sent_msg: await deleteMessage(nrml_media)
+            except:
+                self.__sent_msg = nrml_media
+        else:
+            self.__sent_msg = nrml_media
+
+    async def __remove_thumb(self, thumb):
+        if self.__thumb is None and thumb is not None and await aiopath.exists(thumb):
+            await aioremove(thumb)
+            if (dir_name := ospath.dirname(thumb)) and dir_name != "Thumbnails" and await aiopath.exists(dir_name):
+                await rmdir(dir_name)
+
     @retry(wait=wait_exponential(multiplier=2, min=4, max=8), stop=stop_after_attempt(3),
            retry=retry_if_exception_type(Exception))
-    async def __upload_file(self, cap_mono, file, force_document=False):
+    async def __upload_file(self, item, f_size, cap_mono, force_document=False):
         if self.__thumb is not None and not await aiopath.exists(self.__thumb):
             self.__thumb = None
         thumb = self.__thumb
-        self.__is_corrupted = False
+        as_document = False
+        chat_id = self.__sent_msg.chat.id
+        item.client = upload_pool.acquire(chat_id, f_size, self.__sent_msg.chat.type == ChatType.PRIVATE)
+        if item.client is not bot:
+            LOGGER.info(f'Uploading Media {">" if f_size > BOT_UPLOAD_LIMIT else "<"} 2GB by {item.client.name} Client: {item.file_}')
         try:
-            is_video, is_audio, is_image = await get_document_type(self.__up_path)
+            if item.up_range is not None:
+                is_video, is_audio, is_image = False, False, False
+            else:
+                is_video, is_audio, is_image = await get_document_type(item.up_path)
 
             if self.__leech_utils['thumb']:
                 thumb = await self.get_custom_thumb(self.__leech_utils['thumb'])
             
             if not is_image and thumb is None:
-                file_name = ospath.splitext(file)[0]
+                file_name = ospath.splitext(item.file_)[0]
                 thumb_path = f"{self.__path}/yt-dlp-thumb/{file_name}.jpg"
                 if await aiopath.isfile(thumb_path):
                     thumb = thumb_path
                 elif is_audio and not is_video:
-                    thumb = await get_audio_thumb(self.__up_path)
+                    thumb = await get_audio_thumb(item.up_path)
 
             if self.__as_doc or force_document or (not is_video and not is_audio and not is_image):
                 key = 'documents'
                 if is_video and thumb is None:
-                    thumb = await take_ss(self.__up_path, None)
+                    thumb = await take_ss(item.up_path, self.__user_id)
                 if self.__is_cancelled:
                     return
-                buttons = await self.__buttons(self.__up_path, is_video)
-                nrml_media = await self.__client.send_document(chat_id=self.__sent_msg.chat.id,
-                                                                       reply_to_message_id=self.__sent_msg.id,
-                                                                       document=self.__up_path,
-                                                                       thumb=thumb,
-                                                                       caption=cap_mono,
-                                                                       force_document=True,
-                                                                       disable_notification=True,
-                                                                       progress=self.__upload_progress,
-                                                                       reply_markup=buttons)
-                
-                if self.__prm_media and (self.__has_buttons or not self.__leechmsg):
-                    try:
-                        self.__sent_msg = await bot.copy_message(nrml_media.chat.id, nrml_media.chat.id, nrml_media.id, reply_to_message_id=self.__sent_msg.id, reply_markup=buttons)
-                        if self.__sent_msg: await deleteMessage(nrml_media)
-                    except:
-                        self.__sent_msg = nrml_media
-                else:
-                    self.__sent_msg = nrml_media
+                buttons = await self.__buttons(item.up_path, is_video)
+                file_name = item.up_range[2] if item.up_range is not None else ospath.basename(item.up_path)
+                with FileRange(item.up_path, *item.up_range) if item.up_range is not None else nullcontext(item.up_path) as document:
+                    media = raw.types.InputMediaUploadedDocument(mime_type=item.client.guess_mime_type(file_name) or "application/zip",
+                                                                 file=await self.__save_file(item, document),
+                                                                 force_file=True,
+                                                                 thumb=await item.client.save_file(thumb),
+                                                                 attributes=[raw.types.DocumentAttributeFilename(file_name=file_name)])
+                    await self.__send_media(item, media, document, cap_mono, buttons)
             elif is_video:
                 key = 'videos'
-                duration = (await get_media_info(self.__up_path))[0]
+                duration = (await get_media_info(item.up_path))[0]
                 if thumb is None:
-                    thumb = await take_ss(self.__up_path, duration)
+                    thumb = await take_ss(item.up_path, self.__user_id, duration)
                 if thumb is not None:
                     with Image.open(thumb) as img:
                         width, height = img.size
                 else:
                     width = 480
                     height = 320
-                if not self.__up_path.upper().endswith(("MKV", "MP4")):
-                    dirpath, file_ = self.__up_path.rsplit('/', 1)
+                if not item.up_path.upper().endswith(("MKV", "MP4")):
+                    dirpath, file_ = item.up_path.rsplit('/', 1)
                     if self.__listener.seed and not self.__listener.newDir and not dirpath.endswith("/splited_files_mltb"):
                         dirpath = f"{dirpath}/copied_mltb"
                         await makedirs(dirpath, exist_ok=True)
                         new_path = ospath.join(
                             dirpath, f"{ospath.splitext(file_)[0]}.mp4")
-                        self.__up_path = await copy(self.__up_path, new_path)
+                        item.up_path = await copy(item.up_path, new_path)
                     else:
-                        new_path = f"{ospath.splitext(self.__up_path)[0]}.mp4"
-                        await aiorename(self.__up_path, new_path)
-                        self.__up_path = new_path
+                        new_path = f"{ospath.splitext(item.up_path)[0]}.mp4"
+                        await aiorename(item.up_path, new_path)
+                        item.up_path = new_path
                 if self.__is_cancelled:
                     return
-                buttons = await self.__buttons(self.__up_path, is_video)
-                nrml_media = await self.__client.send_video(chat_id=self.__sent_msg.chat.id,
-                                                                    reply_to_message_id=self.__sent_msg.id,
-                                                                    video=self.__up_path,
-                                                                    caption=cap_mono,
-                                                                    duration=duration,
-                                                                    width=width,
-                                                                    height=height,
-                                                                    thumb=thumb,
-                                                                    supports_streaming=True,
-                                                                    disable_notification=True,
-                                                                    progress=self.__upload_progress,
-                                                                    reply_markup=buttons)
-                if self.__prm_media and (self.__has_buttons or not self.__leechmsg):
-                    try:
-                        self.__sent_msg = await bot.copy_message(nrml_media.chat.id, nrml_media.chat.id, nrml_media.id, reply_to_message_id=self.__sent_msg.id, reply_markup=buttons)
-                        if self.__sent_msg: await deleteMessage(nrml_media)
-                    except:
-                        self.__sent_msg = nrml_media
-                else:
-                    self.__sent_msg = nrml_media
+                buttons = await self.__buttons(item.up_path, is_video)
+                media = raw.types.InputMediaUploadedDocument(mime_type=item.client.guess_mime_type(item.up_path) or "video/mp4",
+                                                             file=await self.__save_file(item, item.up_path),
+                                                             thumb=await item.client.save_file(thumb),
+                                                             attributes=[raw.types.DocumentAttributeVideo(supports_streaming=True,
+                                                                                                          duration=duration,
+                                                                                                          w=width,
+                                                                                                          h=height),
+                                                                         raw.types.DocumentAttributeFilename(file_name=ospath.basename(item.up_path))])
+                await self.__send_media(item, media, item.up_path, cap_mono, buttons)
             elif is_audio:
                 key = 'audios'
-                duration, artist, title = await get_media_info(self.__up_path)
+                duration, artist, title = await get_media_info(item.up_path)
                 if self.__is_cancelled:
                     return
-                self.__sent_msg = await self.__client.send_audio(chat_id=self.__sent_msg.chat.id,
-                                                                    reply_to_message_id=self.__sent_msg.id,
-                                                                    audio=self.__up_path,
-                                                                    caption=cap_mono,
-                                                                    duration=duration,
-                                                                    performer=artist,
-                                                                    title=title,
-                                                                    thumb=thumb,
-                                                                    disable_notification=True,
-                                                                    progress=self.__upload_progress,
-                                                                    reply_markup=await self.__buttons(self.__up_path))
+                buttons = await self.__buttons(item.up_path)
+                media = raw.types.InputMediaUploadedDocument(mime_type=item.client.guess_mime_type(item.up_path) or "audio/mpeg",
+                                                             file=await self.__save_file(item, item.up_path),
+                                                             thumb=await item.client.save_file(thumb),
+                                                             attributes=[raw.types.DocumentAttributeAudio(duration=duration,
+                                                                                                          performer=artist,
+                                                                                                          title=title),
+                                                                         raw.types.DocumentAttributeFilename(file_name=ospath.basename(item.up_path))])
+                await self.__send_media(item, media, item.up_path, cap_mono, buttons)
             else:
                 key = 'photos'
                 if self.__is_cancelled:
                     return
-                self.__sent_msg = await self.__client.send_photo(chat_id=self.__sent_msg.chat.id,
-                                                                    reply_to_message_id=self.__sent_msg.id,
-                                                                    photo=self.__up_path,
-                                                                    caption=cap_mono,
-                                                                    disable_notification=True,
-                                                                    progress=self.__upload_progress,
-                                                                    reply_markup=await self.__buttons(self.__up_path))
+                buttons = await self.__buttons(item.up_path)
+                media = raw.types.InputMediaUploadedPhoto(file=await self.__save_file(item, item.up_path))
+                await self.__send_media(item, media, item.up_path, cap_mono, buttons)
 
             if not self.__is_cancelled and self.__media_group and (self.__sent_msg.video or self.__sent_msg.document):
                 key = 'documents' if self.__sent_msg.document else 'videos'
-                if match := re_match(r'.+(?=\.0*\d+$)|.+(?=\.part\d+\..+)', self.__up_path):
+                if match := re_match(r'.+(?=\.0*\d+$)|.+(?=\.part\d+\..+)', item.group_path):
                     pname = match.group(0)
                     if pname in self.__media_dict[key].keys():
                         self.__media_dict[key][pname].append(self.__sent_msg)
@@ -499,29 +635,32 @@ class TgUploader:
                     if len(msgs) == 10:
                         await self.__send_media_group(pname, key, msgs)
                     else:
-                        self.__last_msg_in_group = True
-            if self.__sent_msg:
-                await self.__copy_file()
-
-            if self.__thumb is None and thumb is not None and await aiopath.exists(thumb):
-                await aioremove(thumb)
-                if (dir_name := ospath.dirname(thumb)) and dir_name != "Thumbnails" and await aiopath.exists(dir_name):
-                    await rmdir(dir_name)
-            self.__retry_error = False
+                        item.in_group = True
+            if not self.__is_cancelled and self.__sent_msg:
+                await self.__copy_file(self.__sent_msg)
+            await self.__remove_thumb(thumb)
+        except StopTransmission:
+            await self.__remove_thumb(thumb)
         except FloodWait as f:
             LOGGER.warning(str(f))
-            await sleep(f.value)
+            tg_limiter.on_flood(self.__sent_msg.chat, f.value, client=item.client)
+            raise f
         except Exception as err:
-            self.__retry_error = True
-            if self.__thumb is None and thumb is not None and await aiopath.exists(thumb):
-                await aioremove(thumb)
-                if (dir_name := ospath.dirname(thumb)) and dir_name != "Thumbnails" and await aiopath.exists(dir_name):
-                    await rmdir(dir_name)
-            LOGGER.error(f"{format_exc()}. Path: {self.__up_path}")
-            if 'Telegram says: [400' in str(err) and key != 'documents':
-                LOGGER.error(f"Retrying As Document. Path: {self.__up_path}")
-                return await self.__upload_file(cap_mono, file, True)
-            raise err
+            await self.__remove_thumb(thumb)
+            LOGGER.error(f"{format_exc()}. Path: {item.up_path}")
+            if isinstance(err, (PeerIdInvalid, ChannelInvalid, ChannelPrivate, ChatWriteForbidden, ChatAdminRequired)):
+                # next attempt goes through a client that can post here
+                upload_pool.deny(item.client, chat_id)
+            elif 'Telegram says: [400' in str(err) and key != 'documents':
+                LOGGER.error(f"Retrying As Document. Path: {item.up_path}")
+                as_document = True
+            if not as_document:
+                raise err
+        finally:
+            upload_pool.release(item.client)
+        if as_document:
+            # the client is back in the pool, the retry acquires its own
+            await self.__upload_file(item, f_size, cap_mono, True)
 
     @property
     def speed(self):
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+from bot import bot, user, leech_bots, IS_PREMIUM_USER
+
+# files above this size can only be sent by a premium account
+BOT_UPLOAD_LIMIT = 2097152000
+
+
+class UploadPool:
+    def __init__(self):
+        self.__busy = {}
+        self.__denied = set()
+
+    @property
+    def clients(self):
+        clients = [bot, *leech_bots]
+        if IS_PREMIUM_USER:
+            clients.append(user)
+        return clients
+
+    def acquire(self, chat_id, size, private=False):
+        if size > BOT_UPLOAD_LIMIT and IS_PREMIUM_USER:
+            clients = [user]
+        elif private:
+            # other accounts can't message a user that never started them
+            clients = [bot]
+        else:
+            clients = [client for client in self.clients if (client.name, chat_id) not in self.__denied] or [bot]
+        client = min(clients, key=lambda c: self.__busy.get(c.name, 0))
+        self.__busy[client.name] = self.__busy.get(client.name, 0) + 1
+        return client
+
+    def release(self, client):
+        self.__busy[client.name] -= 1
+
+    def deny(self, client, chat_id):
+        if client is not bot:
+            self.__denied.add((client.name, chat_id))
+
+
+upload_pool = UploadPool()
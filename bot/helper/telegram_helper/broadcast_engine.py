@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+from time import time
+from asyncio import Lock, Queue, gather, create_task
+from pyrogram.errors import FloodWait, UserIsBlocked, InputUserDeactivated
+
+from bot import bot, LOGGER
+from bot.helper.ext_utils.db_handler import DbManger
+from bot.helper.telegram_helper.rate_limiter import tg_limiter
+
+BROADCAST_WORKERS = 10
+MAX_RETRIES = 3
+SAVE_BATCH = 200
+
+
+class BroadcastEngine:
+    def __init__(self, bc_id, total=0, prev_stats=None):
+        self.bc_id = bc_id
+        self.total_users = total
+        self.total = self.success = self.blocked = self.deleted = self.failed = 0
+        self.start_time = time()
+        self.__mode = 'send'
+        self.__lock = Lock()
+        self.__sent = []
+        self.__removed = []
+        self.__checkpoints = set()
+        # a resumed broadcast adds its counts to those of the interrupted run
+        self.__prev_stats = prev_stats
+
+    @property
+    def rate(self):
+        return self.total / max(time() - self.start_time, 1)
+
+    @property
+    def eta(self):
+        if not self.total_users or not (rate := self.rate):
+            return None
+        return max(self.total_users - self.total, 0) / rate
+
+    def stats(self):
+        return {'total': self.total, 'success': self.success, 'blocked': self.blocked, 'deleted': self.deleted, 'failed': self.failed}
+
+    async def __attempt(self, item, action):
+        uid = item[0]
+        for _ in range(MAX_RETRIES):
+            # every user gets a single message, so only the global budget applies
+            await tg_limiter.acquire()
+            try:
+                result = await action(*item)
+                self.success += 1
+                return result
+            except FloodWait as e:
+                tg_limiter.on_flood(None, e.value)
+            except UserIsBlocked:
+                await DbManger().rm_pm_user(uid)
+                self.blocked += 1
+                return
+            except InputUserDeactivated:
+                await DbManger().rm_pm_user(uid)
+                self.deleted += 1
+                return
+            except Exception as e:
+                LOGGER.debug(f'{e}: while broadcasting to {uid}')
+                break
+        self.failed += 1
+
+    async def __run(self, items, action, on_done):
+        queue = Queue(BROADCAST_WORKERS * 2)
+
+        async def worker():
+            while (item := await queue.get()) is not None:
+                result = await self.__attempt(item, action)
+                self.total += 1
+                if result is not None:
+                    on_done(item, result)
+
+        workers = [create_task(worker()) for _ in range(BROADCAST_WORKERS)]
+        try:
+            async for item in items:
+                await queue.put(item)
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await gather(*workers)
+
+    async def checkpoint(self, status=None):
+        async with self.__lock:
+            if self.__sent:
+                sent, self.__sent = self.__sent, []
+                await DbManger().add_broadcast_msgs(self.bc_id, sent)
+            if self.__removed:
+                removed, self.__removed = self.__removed, []
+                await DbManger().rm_broadcast_msgs(self.bc_id, removed)
+            stats = self.stats()
+            if self.__prev_stats:
+                stats = {key: count + self.__prev_stats.get(key, 0) for key, count in stats.items()}
+            data = {f'{self.__mode}_stats': stats}
+            if status is not None:
+                data['status'] = status
+            await DbManger().update_broadcast(self.bc_id, data)
+
+    def __on_sent(self, item, msg):
+        self.__sent.append((item[0], msg.id))
+        if len(self.__sent) >= SAVE_BATCH:
+            task = create_task(self.checkpoint())
+            self.__checkpoints.add(task)
+            task.add_done_callback(self.__checkpoints.discard)
+
+    def __on_removed(self, item, _):
+        self.__removed.append(item[0])
+
+    async def send(self, from_chat_id, message_id, forwarded=False, quietly=False, skip=()):
+        async def pm_users():
+            async for uid in DbManger().iter_pm_uids():
+                if uid not in skip:
+                    yield (uid,)
+
+        async def send_msg(uid):
+            if forwarded:
+                return await bot.forward_messages(uid, from_chat_id, message_id, disable_notification=quietly)
+            return await bot.copy_message(uid, from_chat_id, message_id, disable_notification=quietly)
+
+        data = {'chat_id': from_chat_id, 'message_id': message_id, 'forwarded': forwarded, 'quietly': quietly, 'status': 'running'}
+        if self.__prev_stats is None:
+            data['time'] = self.start_time
+        await DbManger().update_broadcast(self.bc_id, data)
+        await self.__run(pm_users(), send_msg, self.__on_sent)
+        await self.checkpoint('done')
+
+    async def edit(self, rply):
+        self.__mode = 'edit'
+
+        async def edit_msg(uid, msg_id):
+            return await bot.edit_message_text(uid, msg_id, rply.text, entities=rply.entities, reply_markup=rply.reply_markup)
+
+        await self.__run(DbManger().iter_broadcast_msgs(self.bc_id), edit_msg, lambda *_: None)
+        await self.checkpoint()
+
+    async def delete(self):
+        self.__mode = 'delete'
+
+        async def delete_msg(uid, msg_id):
+            return await bot.delete_messages(uid, msg_id)
+
+        await self.__run(DbManger().iter_broadcast_msgs(self.bc_id), delete_msg, self.__on_removed)
+        await self.checkpoint('deleted')
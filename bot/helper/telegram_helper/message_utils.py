@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 from traceback import format_exc
-from asyncio import sleep
+from asyncio import sleep, gather
 from aiofiles.os import remove as aioremove
 from random import choice as rchoice
 from time import time
@@ -15,11 +15,14 @@ from pyrogram.errors import ReplyMarkupInvalid, FloodWait, PeerIdInvalid, Channe
 from bot import config_dict, user_data, categories_dict, bot_cache, LOGGER, bot_name, status_reply_dict, status_reply_dict_lock, Interval, bot, user, download_dict_lock
 from bot.helper.ext_utils.bot_utils import get_readable_message, setInterval, sync_to_async, download_image_url, fetch_user_tds, fetch_user_dumps, new_thread
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.status_scheduler import status_scheduler
+from bot.helper.telegram_helper.rate_limiter import tg_limiter
 from bot.helper.ext_utils.exceptions import TgLinkException
 
 
 async def sendMessage(message, text, buttons=None, photo=None, **kwargs):
     try:
+        await tg_limiter.acquire(message.chat)
         if photo:
             try:
                 if photo == 'IMAGES':
@@ -40,7 +43,7 @@ async def sendMessage(message, text, buttons=None, photo=None, **kwargs):
                                     **kwargs)
     except FloodWait as f:
         LOGGER.warning(str(f))
-        await sleep(f.value * 1.2)
+        tg_limiter.on_flood(message.chat, f.value)
         return await sendMessage(message, text, buttons, photo)
     except ReplyMarkupInvalid:
         return await sendMessage(message, text, None, photo)
@@ -53,6 +56,7 @@ async def sendMessage(message, text, buttons=None, photo=None, **kwargs):
 
 async def sendCustomMsg(chat_id, text, buttons=None, photo=None, debug=False):
     try:
+        await tg_limiter.acquire(chat_id)
         if photo:
             try:
                 if photo == 'IMAGES':
@@ -72,7 +76,7 @@ async def sendCustomMsg(chat_id, text, buttons=None, photo=None, debug=False):
                                                   disable_notification=True, reply_markup=buttons)
     except FloodWait as f:
         LOGGER.warning(str(f))
-        await sleep(f.value * 1.2)
+        tg_limiter.on_flood(chat_id, f.value)
         return await sendCustomMsg(chat_id, text, buttons, photo)
     except ReplyMarkupInvalid:
         return await sendCustomMsg(chat_id, text, None, photo)
@@ -103,6 +107,7 @@ async def sendMultiMessage(chat_ids, text, buttons=None, photo=None):
         topic_id = int(topic_id[0]) if len(topic_id) else None
         chat = await chat_info(channel_id)
         try:
+            await tg_limiter.acquire(chat)
             if photo:
                 try:
                     if photo == 'IMAGES':
@@ -126,15 +131,16 @@ async def sendMultiMessage(chat_ids, text, buttons=None, photo=None):
             msg_dict[f"{chat.id}:{topic_id}"] = sent
         except FloodWait as f:
             LOGGER.warning(str(f))
-            await sleep(f.value * 1.2)
+            tg_limiter.on_flood(chat, f.value)
             return await sendMultiMessage(chat_ids, text, buttons, photo)
         except Exception as e:
             LOGGER.error(str(e))
     return msg_dict
 
 
-async def editMessage(message, text, buttons=None, photo=None):
+async def editMessage(message, text, buttons=None, photo=None, wait_flood=True):
     try:
+        await tg_limiter.acquire(message.chat, edit=True)
         if message.media:
             if photo:
                 photo = rchoice(config_dict['IMAGES']) if photo == 'IMAGES' else photo
@@ -143,12 +149,14 @@ async def editMessage(message, text, buttons=None, photo=None):
         await message.edit(text=text, disable_web_page_preview=True, reply_markup=buttons)
     except FloodWait as f:
         LOGGER.warning(str(f))
-        await sleep(f.value * 1.2)
-        return await editMessage(message, text, buttons, photo)
+        tg_limiter.on_flood(message.chat, f.value, edit=True)
+        if not wait_flood:
+            return f
+        return await editMessage(message, text, buttons, photo, wait_flood)
     except (MessageNotModified, MessageEmpty):
         pass
     except ReplyMarkupInvalid:
-        return await editMessage(message, text, None, photo)
+        return await editMessage(message, text, None, photo, wait_flood)
     except Exception as e:
         LOGGER.error(str(e))
         return str(e)
@@ -156,6 +164,7 @@ async def editMessage(message, text, buttons=None, photo=None):
 
 async def editReplyMarkup(message, reply_markup):
     try:
+        await tg_limiter.acquire(message.chat, edit=True)
         return await message.edit_reply_markup(reply_markup=reply_markup)
     except MessageNotModified:
         pass
@@ -166,10 +175,11 @@ async def editReplyMarkup(message, reply_markup):
 
 async def sendFile(message, file, caption=None, buttons=None):
     try:
+        await tg_limiter.acquire(message.chat)
         return await message.reply_document(document=file, quote=True, caption=caption, disable_notification=True, reply_markup=buttons)
     except FloodWait as f:
         LOGGER.warning(str(f))
-        await sleep(f.value * 1.2)
+        tg_limiter.on_flood(message.chat, f.value)
         return await sendFile(message, file, caption)
     except Exception as e:
         LOGGER.error(str(e))
@@ -178,6 +188,7 @@ async def sendFile(message, file, caption=None, buttons=None):
 
 async def sendRss(text):
     try:
+        await tg_limiter.acquire(config_dict['RSS_CHAT'], client=user)
         if user:
             return await user.send_message(chat_id=config_dict['RSS_CHAT'], text=text, disable_web_page_preview=True,
                                            disable_notification=True)
@@ -186,7 +197,7 @@ async def sendRss(text):
                                           disable_notification=True)
     except FloodWait as f:
         LOGGER.warning(str(f))
-        await sleep(f.value * 1.2)
+        tg_limiter.on_flood(config_dict['RSS_CHAT'], f.value, client=user)
         return await sendRss(text)
     except Exception as e:
         LOGGER.error(str(e))
@@ -221,6 +232,7 @@ async def delete_all_messages():
         for key, data in list(status_reply_dict.items()):
             try:
                 del status_reply_dict[key]
+                status_scheduler.discard(key)
                 await deleteMessage(data[0])
             except Exception as e:
                 LOGGER.error(str(e))
@@ -282,30 +294,42 @@ async def get_tg_link_content(link, user_id, decrypter=None):
         raise TgLinkException("Bot can't download from GROUPS without joining!, Set your Own Session to get access !")
 
 
+async def update_status_message(chat_id, data, msg, buttons):
+    if msg is None or msg == data[0].text:
+        status_scheduler.on_edit(chat_id)
+        return
+    rmsg = await editMessage(data[0], msg, buttons, 'IMAGES', wait_flood=False)
+    if isinstance(rmsg, FloodWait):
+        status_scheduler.on_flood(chat_id, rmsg.value)
+        return
+    if isinstance(rmsg, str) and rmsg.startswith('Telegram says: [400'):
+        async with status_reply_dict_lock:
+            if status_reply_dict.get(chat_id) is data:
+                del status_reply_dict[chat_id]
+                status_scheduler.discard(chat_id)
+        return
+    data[0].text = msg
+    data[1] = time()
+    status_scheduler.on_edit(chat_id)
+
+
 async def update_all_messages(force=False):
     async with status_reply_dict_lock:
-        if not status_reply_dict or not Interval or (not force and time() - list(status_reply_dict.values())[0][1] < 3):
+        if not status_reply_dict or not Interval:
             return
-        for chat_id in list(status_reply_dict.keys()):
-            status_reply_dict[chat_id][1] = time()
-    async with download_dict_lock:
-        msg, buttons = await sync_to_async(get_readable_message)
-    if msg is None:
+        due = {chat_id: data for chat_id, data in status_reply_dict.items() if data and status_scheduler.is_due(chat_id, force)}
+    if not due:
         return
-    async with status_reply_dict_lock:
-        for chat_id in list(status_reply_dict.keys()):
-            if status_reply_dict[chat_id] and msg != status_reply_dict[chat_id][0].text:
-                rmsg = await editMessage(status_reply_dict[chat_id][0], msg, buttons, 'IMAGES')
-                if isinstance(rmsg, str) and rmsg.startswith('Telegram says: [400'):
-                    del status_reply_dict[chat_id]
-                    continue
-                status_reply_dict[chat_id][0].text = msg
-                status_reply_dict[chat_id][1] = time()
+    rendered = {}
+    async with download_dict_lock:
+        for page_key in {tuple(data[2:4]) for data in due.values()}:
+            rendered[page_key] = await sync_to_async(get_readable_message, *page_key)
+    await gather(*(update_status_message(chat_id, data, *rendered[tuple(data[2:4])]) for chat_id, data in due.items()))
 
 
-async def sendStatusMessage(msg):
+async def sendStatusMessage(msg, user_id=None):
     async with download_dict_lock:
-        progress, buttons = await sync_to_async(get_readable_message)
+        progress, buttons = await sync_to_async(get_readable_message, 1, user_id)
     if progress is None:
         return
     async with status_reply_dict_lock:
@@ -319,7 +343,8 @@ async def sendStatusMessage(msg):
                 message.caption = progress
             else:
                 message.text = progress
-        status_reply_dict[chat_id] = [message, time()]
+        status_reply_dict[chat_id] = [message, time(), 1, user_id]
+        status_scheduler.on_edit(chat_id)
         if not Interval:
             Interval.append(setInterval(config_dict['STATUS_UPDATE_INTERVAL'], update_all_messages))
     
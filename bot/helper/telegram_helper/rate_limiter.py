@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+from time import monotonic
+from asyncio import Lock, sleep
+from collections import OrderedDict
+from pyrogram.enums import ChatType
+
+from bot import bot
+
+# Telegram's published budgets for a bot: ~30 messages/s overall, ~1/s in a chat and 20 new messages/min in a group
+GLOBAL_RATE = 25
+PRIVATE_RATE = 1
+PRIVATE_BURST = 5
+GROUP_RATE = 20 / 60
+GROUP_BURST = 20
+CHANNEL_RATE = 1
+CHANNEL_BURST = 10
+# edits don't count against a group's message budget, they only need to stay clear of FloodWaits
+EDIT_RATE = 1
+EDIT_BURST = 5
+MAX_CHATS = 1024
+# share of the base rate won back with every call, and how far above the base a bucket may probe without FloodWaits
+RECOVERY = 0.05
+CEILING = 2
+GLOBAL_CEILING = 30 / GLOBAL_RATE
+# a bucket only probes above its base once it went this long without a FloodWait
+QUIET_PERIOD = 60
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, ceiling=CEILING):
+        self.base_rate = self.rate = rate
+        self.max_rate = rate * ceiling
+        self.burst = burst
+        self.__tokens = burst
+        self.__updated = monotonic()
+        self.__paused_until = 0
+        self.__flooded_at = None
+        self.__lock = Lock()
+
+    def pause(self, seconds):
+        self.__paused_until = max(self.__paused_until, monotonic() + seconds)
+
+    def penalize(self, seconds):
+        self.pause(seconds * 1.2)
+        # the rate that flooded is no longer worth probing
+        self.max_rate = max(min(self.max_rate, self.rate), self.base_rate)
+        self.rate = max(self.rate / 2, self.base_rate / 16)
+        self.__flooded_at = monotonic()
+
+    def __recover(self, now):
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY)
+        elif self.__flooded_at is None or now - self.__flooded_at > QUIET_PERIOD:
+            self.rate = min(self.max_rate, self.rate + self.base_rate * RECOVERY)
+
+    async def acquire(self):
+        waited = 0
+        async with self.__lock:
+            while True:
+                now = monotonic()
+                if (wait := self.__paused_until - now) > 0:
+                    waited += wait
+                    await sleep(wait)
+                    continue
+                self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+                self.__updated = now
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    self.__recover(now)
+                    return waited
+                wait = (1 - self.__tokens) / self.rate
+                waited += wait
+                await sleep(wait)
+
+
+class RateLimiter:
+    def __init__(self):
+        self.__globals = {}
+        self.__chats = OrderedDict()
+        self.__channels = set()
+        self.calls = self.waits = self.floods = 0
+        self.waited = 0
+
+    def __chat_id(self, chat):
+        # a Chat tells channels apart from groups, bare ids reuse what was learnt from earlier Chats
+        if (chat_type := getattr(chat, 'type', None)) is None:
+            return chat
+        if chat_type == ChatType.CHANNEL:
+            self.__channels.add(chat.id)
+        return chat.id
+
+    @staticmethod
+    def __client(client):
+        # every account has its own budget, so parallel upload clients don't share one
+        return None if client is None or client is bot else client.name
+
+    def __global(self, client):
+        name = self.__client(client)
+        if (bucket := self.__globals.get(name)) is None:
+            bucket = self.__globals[name] = TokenBucket(GLOBAL_RATE, GLOBAL_RATE, GLOBAL_CEILING)
+        return bucket
+
+    def __bucket(self, chat_id, edit, client):
+        key = (self.__client(client), chat_id, edit)
+        if (bucket := self.__chats.get(key)) is not None:
+            self.__chats.move_to_end(key)
+            return bucket
+        if edit:
+            bucket = TokenBucket(EDIT_RATE, EDIT_BURST)
+        elif isinstance(chat_id, int) and chat_id > 0:
+            bucket = TokenBucket(PRIVATE_RATE, PRIVATE_BURST)
+        elif chat_id in self.__channels:
+            bucket = TokenBucket(CHANNEL_RATE, CHANNEL_BURST)
+        else:
+            bucket = TokenBucket(GROUP_RATE, GROUP_BURST)
+        self.__chats[key] = bucket
+        while len(self.__chats) > MAX_CHATS:
+            self.__chats.popitem(last=False)
+        return bucket
+
+    async def acquire(self, chat=None, edit=False, client=None):
+        self.calls += 1
+        chat_id = self.__chat_id(chat)
+        waited = await self.__bucket(chat_id, edit, client).acquire() if chat_id is not None else 0
+        waited += await self.__global(client).acquire()
+        if waited:
+            self.waits += 1
+            self.waited += waited
+
+    def on_flood(self, chat, seconds, edit=False, client=None):
+        self.floods += 1
+        chat_id = self.__chat_id(chat)
+        (self.__bucket(chat_id, edit, client) if chat_id is not None else self.__global(client)).penalize(seconds)
+
+    def stats(self):
+        return {'calls': self.calls, 'waits': self.waits, 'waited': self.waited, 'floods': self.floods}
+
+
+tg_limiter = RateLimiter()
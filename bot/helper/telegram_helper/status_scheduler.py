@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+from time import time
+
+from bot import config_dict
+
+MAX_BACKOFF = 16
+CALM_PERIOD = 120
+
+
+class StatusScheduler:
+    def __init__(self):
+        self.__chats = {}
+
+    def __state(self, chat_id):
+        base = config_dict['STATUS_UPDATE_INTERVAL']
+        if (state := self.__chats.get(chat_id)) is None:
+            state = self.__chats[chat_id] = {'interval': base, 'next_at': 0, 'blocked_until': 0, 'last_flood': 0, 'floods': 0}
+        state['interval'] = min(max(state['interval'], base), base * MAX_BACKOFF)
+        return state
+
+    def is_due(self, chat_id, force=False):
+        state = self.__state(chat_id)
+        now = time()
+        if now < state['blocked_until']:
+            return False
+        return force or now >= state['next_at'] - 1
+
+    def on_edit(self, chat_id):
+        state = self.__state(chat_id)
+        now = time()
+        if now - state['last_flood'] > CALM_PERIOD:
+            state['interval'] = max(state['interval'] / 2, config_dict['STATUS_UPDATE_INTERVAL'])
+        state['next_at'] = now + state['interval']
+
+    def on_flood(self, chat_id, wait):
+        state = self.__state(chat_id)
+        now = time()
+        state['interval'] = min(max(state['interval'] * 2, wait), config_dict['STATUS_UPDATE_INTERVAL'] * MAX_BACKOFF)
+        state['blocked_until'] = now + wait
+        state['next_at'] = now + max(wait, state['interval'])
+        state['last_flood'] = now
+        state['floods'] += 1
+
+    def discard(self, chat_id):
+        self.__chats.pop(chat_id, None)
+
+    def intervals(self):
+        return {chat_id: (self.__state(chat_id)['interval'], state['floods']) for chat_id, state in list(self.__chats.items())}
+
+
+status_scheduler = StatusScheduler()
@@ -10,20 +10,42 @@ for theme in listdir('bot/helper/themes'):
     if theme.startswith('wzml_') and theme.endswith('.py'):
         AVL_THEMES[theme[5:-3]] = import_module(f'bot.helper.themes.{theme[:-3]}')
 
-def BotTheme(var_name, **format_vars):
-    text = None
-    theme_ = config_dict['BOT_THEME']
+THEME_CACHE = {}
+BLOCK_CACHE = {}
+
+
+def __theme_vars(style):
+    return {var_name: text for var_name, text in vars(style).items() if not var_name.startswith('__') and isinstance(text, str)}
 
-    if theme_ in AVL_THEMES:
-        text = getattr(AVL_THEMES[theme_].WZMLStyle(), var_name, None)
-        if text is None:
+
+def compile_themes():
+    THEME_CACHE.clear()
+    BLOCK_CACHE.clear()
+    default_vars = __theme_vars(wzml_minimal.WZMLStyle)
+    for theme_, module in AVL_THEMES.items():
+        theme_vars = __theme_vars(module.WZMLStyle)
+        for var_name in default_vars.keys() - theme_vars.keys():
             LOGGER.error(f"{var_name} not Found in {theme_}. Please recheck with Official Repo")
-    elif theme_ == 'random':
-        rantheme = rchoice(list(AVL_THEMES.values()))
-        LOGGER.info(f"Random Theme Chosen: {rantheme}")
-        text = getattr(rantheme.WZMLStyle(), var_name, None)
-        
-    if text is None:
-        text = getattr(wzml_minimal.WZMLStyle(), var_name)
-
-    return text.format_map(format_vars)
+        THEME_CACHE[theme_] = {**default_vars, **theme_vars}
+
+
+def __current_theme():
+    theme_ = config_dict['BOT_THEME']
+    if theme_ == 'random':
+        return rchoice(list(THEME_CACHE.keys()))
+    return theme_ if theme_ in THEME_CACHE else 'minimal'
+
+
+def BotTheme(var_name, **format_vars):
+    return THEME_CACHE[__current_theme()][var_name].format_map(format_vars)
+
+
+def BotThemeBlock(var_names, **format_vars):
+    theme_ = __current_theme()
+    key = (theme_, var_names)
+    if (template := BLOCK_CACHE.get(key)) is None:
+        template = BLOCK_CACHE[key] = ''.join(THEME_CACHE[theme_][var_name] for var_name in var_names)
+    return template.format_map(format_vars)
+
+
+compile_themes()
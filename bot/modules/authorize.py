@@ -6,7 +6,7 @@ from bot import user_data, DATABASE_URL, bot, LOGGER
 from bot.helper.telegram_helper.message_utils import sendMessage
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.bot_commands import BotCommands
-from bot.helper.ext_utils.db_handler import DbManger
+from bot.helper.ext_utils.user_data_writer import user_data_writer
 from bot.helper.ext_utils.bot_utils import update_user_ldata
 
 
@@ -32,7 +32,7 @@ async def authorize(client, message):
                 tids_.append(tid_)
                 update_user_ldata(id_, 'topic_ids', tids_)
                 if DATABASE_URL:
-                    await DbManger().update_user_data(id_)
+                    await user_data_writer.update(id_)
                 msg = 'Topic Authorized!'
             else:
                 msg = 'Topic Already Authorized!'
@@ -44,7 +44,7 @@ async def authorize(client, message):
         else:
             msg = 'Authorized'
         if DATABASE_URL:
-            await DbManger().update_user_data(id_)
+            await user_data_writer.update(id_)
     await sendMessage(message, msg)
 
 
@@ -71,7 +71,7 @@ async def unauthorize(client, message):
         if not tids_:
             update_user_ldata(id_, 'is_auth', False)
         if DATABASE_URL:
-            await DbManger().update_user_data(id_)
+            await user_data_writer.update(id_)
         msg = 'Unauthorized'
     else:
         msg = 'Already Unauthorized!'
@@ -91,7 +91,7 @@ async def addSudo(client, message):
         else:
             update_user_ldata(id_, 'is_sudo', True)
             if DATABASE_URL:
-                await DbManger().update_user_data(id_)
+                await user_data_writer.update(id_)
             msg = 'Promoted as Sudo'
     else:
         msg = "<i>Give User's ID or Reply to User's message of whom you want to Promote as Sudo</i>"
@@ -111,7 +111,7 @@ async def removeSudo(client, message):
         else:
             update_user_ldata(id_, 'is_sudo', False)
             if DATABASE_URL:
-                await DbManger().update_user_data(id_)
+                await user_data_writer.update(id_)
             msg = 'Demoted'
     else:
         msg = "<i>Give User's ID or Reply to User's message of whom you want to Demote</i>"
@@ -131,7 +131,7 @@ async def addBlackList(_, message):
         else:
             update_user_ldata(id_, 'is_blacklist', True)
             if DATABASE_URL:
-                await DbManger().update_user_data(id_)
+                await user_data_writer.update(id_)
             msg = 'User BlackListed'
     else:
         msg = "Give ID or Reply To message of whom you want to blacklist."
@@ -151,7 +151,7 @@ async def rmBlackList(_, message):
         else:
             update_user_ldata(id_, 'is_blacklist', False)
             if DATABASE_URL:
-                await DbManger().update_user_data(id_)
+                await user_data_writer.update(id_)
             msg = '<i>User Set Free as Bird!</i>'
     else:
         msg = "Give ID or Reply To message of whom you want to remove from blacklisted"
@@ -35,6 +35,7 @@ default_values = {'AUTO_DELETE_MESSAGE_DURATION': 30,
                   'DEFAULT_UPLOAD': 'gd',
                   'DOWNLOAD_DIR': '/usr/src/app/downloads/',
                   'LEECH_SPLIT_SIZE': MAX_SPLIT_SIZE,
+                  'LEECH_UPLOAD_WIDTH': 3,
                   'RSS_DELAY': 600,
                   'STATUS_UPDATE_INTERVAL': 10,
                   'SEARCH_LIMIT': 0,
@@ -244,6 +245,11 @@ async def load_config():
 
     USER_SESSION_STRING = environ.get('USER_SESSION_STRING', '')
 
+    LEECH_BOT_TOKENS = environ.get('LEECH_BOT_TOKENS', '')
+
+    LEECH_UPLOAD_WIDTH = environ.get('LEECH_UPLOAD_WIDTH', '')
+    LEECH_UPLOAD_WIDTH = 3 if len(LEECH_UPLOAD_WIDTH) == 0 else int(LEECH_UPLOAD_WIDTH)
+
     TORRENT_TIMEOUT = environ.get('TORRENT_TIMEOUT', '')
     downloads = aria2.get_downloads()
     if len(TORRENT_TIMEOUT) == 0:
@@ -278,6 +284,18 @@ async def load_config():
     QUEUE_UPLOAD = environ.get('QUEUE_UPLOAD', '')
     QUEUE_UPLOAD = '' if len(QUEUE_UPLOAD) == 0 else int(QUEUE_UPLOAD)
 
+    QUEUE_SJF_SIZE = environ.get('QUEUE_SJF_SIZE', '')
+    QUEUE_SJF_SIZE = '' if len(QUEUE_SJF_SIZE) == 0 else float(QUEUE_SJF_SIZE)
+
+    QUEUE_DOWNLOAD_MAX = environ.get('QUEUE_DOWNLOAD_MAX', '')
+    QUEUE_DOWNLOAD_MAX = '' if len(QUEUE_DOWNLOAD_MAX) == 0 else int(QUEUE_DOWNLOAD_MAX)
+
+    QUEUE_LINK_SPEED = environ.get('QUEUE_LINK_SPEED', '')
+    QUEUE_LINK_SPEED = '' if len(QUEUE_LINK_SPEED) == 0 else float(QUEUE_LINK_SPEED)
+
+    QUEUE_UPLINK_SPEED = environ.get('QUEUE_UPLINK_SPEED', '')
+    QUEUE_UPLINK_SPEED = '' if len(QUEUE_UPLINK_SPEED) == 0 else float(QUEUE_UPLINK_SPEED)
+
     INCOMPLETE_TASK_NOTIFIER = environ.get('INCOMPLETE_TASK_NOTIFIER', '')
     INCOMPLETE_TASK_NOTIFIER = INCOMPLETE_TASK_NOTIFIER.lower() == 'true'
     if not INCOMPLETE_TASK_NOTIFIER and DATABASE_URL:
@@ -650,6 +668,8 @@ async def load_config():
                         'MIRROR_FILENAME_SUFFIX': MIRROR_FILENAME_SUFFIX,
                         'MIRROR_FILENAME_REMNAME': MIRROR_FILENAME_REMNAME,
                         'LEECH_SPLIT_SIZE': LEECH_SPLIT_SIZE,
+                        'LEECH_BOT_TOKENS': LEECH_BOT_TOKENS,
+                        'LEECH_UPLOAD_WIDTH': LEECH_UPLOAD_WIDTH,
                         'LOGIN_PASS': LOGIN_PASS,
                         'TOKEN_TIMEOUT': TOKEN_TIMEOUT,
                         'MEDIA_GROUP': MEDIA_GROUP,
@@ -660,6 +680,10 @@ async def load_config():
                         'QUEUE_ALL': QUEUE_ALL,
                         'QUEUE_DOWNLOAD': QUEUE_DOWNLOAD,
                         'QUEUE_UPLOAD': QUEUE_UPLOAD,
+                        'QUEUE_SJF_SIZE': QUEUE_SJF_SIZE,
+                        'QUEUE_DOWNLOAD_MAX': QUEUE_DOWNLOAD_MAX,
+                        'QUEUE_LINK_SPEED': QUEUE_LINK_SPEED,
+                        'QUEUE_UPLINK_SPEED': QUEUE_UPLINK_SPEED,
                         'RCLONE_FLAGS': RCLONE_FLAGS,
                         'RCLONE_PATH': RCLONE_PATH,
                         'RCLONE_SERVE_URL': RCLONE_SERVE_URL,
@@ -773,7 +797,7 @@ async def get_buttons(key=None, edit_type=None, edit_mode=None, mess=None):
         if key not in ['TELEGRAM_HASH', 'TELEGRAM_API', 'OWNER_ID', 'BOT_TOKEN'] and key not in bool_vars:
             buttons.ibutton('Reset', f"botset resetvar {key}")
         buttons.ibutton('Close', "botset close", position="footer")
-        if edit_mode and key in ['SUDO_USERS', 'CMD_SUFFIX', 'OWNER_ID', 'USER_SESSION_STRING', 'TELEGRAM_HASH',
+        if edit_mode and key in ['SUDO_USERS', 'CMD_SUFFIX', 'OWNER_ID', 'USER_SESSION_STRING', 'LEECH_BOT_TOKENS', 'TELEGRAM_HASH',
                                  'TELEGRAM_API', 'AUTHORIZED_CHATS', 'DATABASE_URL', 'BOT_TOKEN', 'DOWNLOAD_DIR']:
             msg += '<b>Note:</b> Restart required for this edit to take effect!\n\n'
         if edit_mode and key not in bool_vars:
@@ -837,6 +861,8 @@ async def edit_variable(_, message, pre_message, key):
         aria2_options['bt-stop-timeout'] = f'{value}'
     elif key == 'LEECH_SPLIT_SIZE':
         value = min(int(value), MAX_SPLIT_SIZE)
+    elif key == 'LEECH_UPLOAD_WIDTH':
+        value = max(int(value), 1)
     elif key == 'BOT_THEME':
         if not value.strip() in AVL_THEMES.keys():
             value = 'minimal'
@@ -872,7 +898,7 @@ async def edit_variable(_, message, pre_message, key):
         await DbManger().update_config({key: value})
     if key in ['SEARCH_PLUGINS', 'SEARCH_API_LINK']:
         await initiate_search_tools()
-    elif key in ['QUEUE_ALL', 'QUEUE_DOWNLOAD', 'QUEUE_UPLOAD']:
+    elif key in ['QUEUE_ALL', 'QUEUE_DOWNLOAD', 'QUEUE_UPLOAD', 'QUEUE_SJF_SIZE', 'QUEUE_DOWNLOAD_MAX', 'QUEUE_LINK_SPEED', 'QUEUE_UPLINK_SPEED']:
         await start_from_queued()
     elif key in ['RCLONE_SERVE_URL', 'RCLONE_SERVE_PORT', 'RCLONE_SERVE_USER', 'RCLONE_SERVE_PASS']:
         await rclone_serve_booter()
@@ -1127,7 +1153,7 @@ async def edit_bot_settings(client, query):
             await DbManger().update_config({data[2]: value})
         if data[2] in ['SEARCH_PLUGINS', 'SEARCH_API_LINK']:
             await initiate_search_tools()
-        elif data[2] in ['QUEUE_ALL', 'QUEUE_DOWNLOAD', 'QUEUE_UPLOAD']:
+        elif data[2] in ['QUEUE_ALL', 'QUEUE_DOWNLOAD', 'QUEUE_UPLOAD', 'QUEUE_SJF_SIZE', 'QUEUE_DOWNLOAD_MAX', 'QUEUE_LINK_SPEED', 'QUEUE_UPLINK_SPEED']:
             await start_from_queued()
         elif data[2] in ['RCLONE_SERVE_URL', 'RCLONE_SERVE_PORT', 'RCLONE_SERVE_USER', 'RCLONE_SERVE_PASS']:
             await rclone_serve_booter()
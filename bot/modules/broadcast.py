@@ -1,32 +1,51 @@
 #!/usr/bin/env python3
 from time import time
 from uuid import uuid4
-from asyncio import sleep
+from asyncio import wait, create_task
 from pyrogram.handlers import MessageHandler
 from pyrogram.filters import command
-from pyrogram.errors import FloodWait, UserIsBlocked, InputUserDeactivated
 
-from bot import bot, LOGGER, DATABASE_URL
+from bot import bot, DATABASE_URL
 from bot.helper.ext_utils.db_handler import DbManger
 from bot.helper.telegram_helper.message_utils import sendMessage, editMessage
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.bot_commands import BotCommands
-from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.broadcast_engine import BroadcastEngine
 from bot.helper.ext_utils.bot_utils import new_task, get_readable_time
 
-bc_cache = {}
+STATUS_INTERVAL = 10
+running_broadcasts = set()
+
+
+async def run_with_status(engine, coro, status_msg, status):
+    task = create_task(coro)
+    while True:
+        done, _ = await wait({task}, timeout=STATUS_INTERVAL)
+        if done:
+            break
+        await editMessage(status_msg, status(engine))
+        await engine.checkpoint()
+    task.result()
+
+
+def progress_status(engine):
+    eta = engine.eta
+    return f"<b>Speed:</b> <code>{engine.rate:.1f} msgs/s</code> | <b>ETA:</b> <code>{get_readable_time(eta) if eta is not None else '-'}</code>"
+
 
 @new_task
 async def broadcast(_, message):
-    bc_id, forwarded, quietly, deleted, edited = '', False, False, False, False
+    bc_id, forwarded, quietly, deleted, edited, resumed = '', False, False, False, False, False
     if not DATABASE_URL:
         return await sendMessage(message, 'DATABASE_URL not provided!')
     rply = message.reply_to_message
+    bc_data = None
     if len(message.command) > 1:
         if not message.command[1].startswith('-'):
-            bc_id = message.command[1] if bc_cache.get(message.command[1], False) else ''
+            bc_data = await DbManger().get_broadcast(message.command[1])
+            bc_id = message.command[1] if bc_data else ''
             if not bc_id:
-                return await sendMessage(message, "<i>Broadcast ID not found! After Restart, you can't edit or delete broadcasted messages...</i>")
+                return await sendMessage(message, "<i>Broadcast ID not found!</i>")
         for arg in message.command:
             if arg in ['-f', '-forward'] and rply:
                 forwarded = True
@@ -36,9 +55,11 @@ async def broadcast(_, message):
                 deleted = True
             elif arg in ['-e', '-edit'] and bc_id and rply:
                 edited = True
+            elif arg in ['-r', '-resume'] and bc_id:
+                resumed = True
     if not bc_id and not rply:
         return await sendMessage(message, '''<b>By replying to msg to Broadcast:</b>
-/broadcast bc_id -d -e -f -q
+/broadcast bc_id -d -e -f -q -r
 
 <b>Forward Broadcast with Tag:</b> -f or -forward
 /cmd [reply_msg] -f
@@ -52,91 +73,66 @@ async def broadcast(_, message):
 <b>Delete Broadcast msg:</b> -d or -delete
 /bc broadcast_id -d
 
+<b>Resume Interrupted Broadcast:</b> -r or -resume
+/bc broadcast_id -r
+
 <b>Notes:</b>
-1. Broadcast msgs can be only edited or deleted until restart.
+1. Broadcast msgs are saved in Database, so they can be edited or deleted even after restart.
 2. Forwarded msgs can't be Edited''')
-    t, s, b, d, u = 0, 0, 0, 0, 0
-    if deleted:
-        temp_wait = await sendMessage(message, '<i>Deleting the Broadcasted Message! Please Wait ...</i>')
-        for msg in (msgs:=bc_cache[bc_id]):
-            try:
-                await msg.delete()
-                await sleep(0.5)
-                msgs.pop(msgs.index(msg))
-                s += 1
-            except:
-                u += 1
-            t += 1
-        return await editMessage(temp_wait, f'''⌬  <b><i>Broadcast Deleted Stats :</i></b>
-┠ <b>Total Users:</b> <code>{t}</code>
-┠ <b>Success:</b> <code>{s}</code>
-┖ <b>Unsuccess Attempt:</b> <code>{u}</code>
+    if deleted or edited:
+        if edited and bc_data.get('forwarded'):
+            return await sendMessage(message, "<i>Forwarded Messages can't be Edited, Only can be Deleted !</i>")
+        action = 'Deleted' if deleted else 'Edited'
+        engine = BroadcastEngine(bc_id, bc_data.get('send_stats', {}).get('success', 0))
 
-<b>Broadcast ID:</b> <code>{bc_id}</code>''')
-    elif edited:
-        temp_wait = await sendMessage(message, '<i>Editing the Broadcasted Message! Please Wait ...</i>')
-        for msg in bc_cache[bc_id]:
-            if hasattr(msg, "forward_from"):
-                return await editMessage(temp_wait, "<i>Forwarded Messages can't be Edited, Only can be Deleted !</i>")
-            try:
-                await msg.edit(text=rply.text, entities=rply.entities, reply_markup=rply.reply_markup)
-                await sleep(0.5)
-                s += 1
-            except FloodWait as e:
-                await sleep(e.value)
-                await msg.edit(text=rply.text, entities=rply.entities, reply_markup=rply.reply_markup)
-            except Exception:
-                u += 1
-            t += 1
-        return await editMessage(temp_wait, f'''⌬  <b><i>Broadcast Edited Stats :</i></b>
-┠ <b>Total Users:</b> <code>{t}</code>
-┠ <b>Success:</b> <code>{s}</code>
-┖ <b>Unsuccess Attempt:</b> <code>{u}</code>
+        def status(engine):
+            return f'''⌬  <b><i>Broadcast {action} Stats :</i></b>
+┠ <b>Total Users:</b> <code>{engine.total}</code>
+┠ <b>Success:</b> <code>{engine.success}</code>
+┖ <b>Unsuccess Attempt:</b> <code>{engine.failed + engine.blocked + engine.deleted}</code>'''
+
+        temp_wait = await sendMessage(message, f'<i>{"Deleting" if deleted else "Editing"} the Broadcasted Message! Please Wait ...</i>')
+        await run_with_status(engine, engine.delete() if deleted else engine.edit(rply), temp_wait, lambda engine: f"{status(engine)}\n{progress_status(engine)}")
+        return await editMessage(temp_wait, f'''{status(engine)}
 
+<b>Elapsed Time:</b> <code>{get_readable_time(time() - engine.start_time)}</code>
 <b>Broadcast ID:</b> <code>{bc_id}</code>''')
-    start_time = time()
-    status = '''⌬  <b><i>Broadcast Stats :</i></b>
-┠ <b>Total Users:</b> <code>{t}</code>
-┠ <b>Success:</b> <code>{s}</code>
-┠ <b>Blocked Users:</b> <code>{b}</code>
-┠ <b>Deleted Accounts:</b> <code>{d}</code>
-┖ <b>Unsuccess Attempt:</b> <code>{u}</code>'''
-    updater = time()
-    bc_hash, bc_msgs = str(uuid4()), []
-    pls_wait = await sendMessage(message, status.format(**locals()))
-    for uid in (await DbManger().get_pm_uids()):
-        try:
-            if forwarded:
-                bc_msg = await rply.forward(uid, disable_notification=quietly)
-            else:
-                bc_msg = await rply.copy(uid, disable_notification=quietly)
-            s += 1
-        except FloodWait as e:
-            await sleep(e.value)
-            if forwarded:
-                bc_msg = await rply.forward(uid, disable_notification=quietly)
-            else:
-                bc_msg = await rply.copy(uid, disable_notification=quietly)
-            s += 1
-        except UserIsBlocked:
-            await DbManger().rm_pm_user(uid)
-            b += 1
-        except InputUserDeactivated:
-            await DbManger().rm_pm_user(uid)
-            d += 1
-        except Exception:
-            u += 1
-        if bc_msg:
-            bc_msgs.append(bc_msg)
-        t += 1
-        if (time() - updater) > 10:
-            await editMessage(pls_wait, status.format(**locals()))
-            updater = time()
-    bc_cache[bc_hash] = bc_msgs
+
+    def status(engine):
+        return f'''⌬  <b><i>Broadcast Stats :</i></b>
+┠ <b>Total Users:</b> <code>{engine.total}</code>
+┠ <b>Success:</b> <code>{engine.success}</code>
+┠ <b>Blocked Users:</b> <code>{engine.blocked}</code>
+┠ <b>Deleted Accounts:</b> <code>{engine.deleted}</code>
+┖ <b>Unsuccess Attempt:</b> <code>{engine.failed}</code>'''
+
+    if resumed:
+        if bc_data.get('status') != 'running':
+            return await sendMessage(message, '<i>Broadcast already Completed!</i>')
+        # a crashed run also stays 'running' in the database, only this process knows which ones are still sending
+        if bc_id in running_broadcasts:
+            return await sendMessage(message, '<i>Broadcast is still Running!</i>')
+    else:
+        bc_id = str(uuid4())
+    running_broadcasts.add(bc_id)
+    try:
+        if resumed:
+            skip = {uid async for uid, _ in DbManger().iter_broadcast_msgs(bc_id)}
+            from_chat_id, message_id = bc_data['chat_id'], bc_data['message_id']
+            forwarded, quietly = bc_data.get('forwarded', False), bc_data.get('quietly', False)
+        else:
+            skip = set()
+            from_chat_id, message_id = rply.chat.id, rply.id
+        engine = BroadcastEngine(bc_id, max(await DbManger().pm_users_count() - len(skip), 0), bc_data.get('send_stats', {}) if resumed else None)
+        pls_wait = await sendMessage(message, status(engine))
+        await run_with_status(engine, engine.send(from_chat_id, message_id, forwarded, quietly, skip), pls_wait,
+                              lambda engine: f"{status(engine)}\n{progress_status(engine)}\n<b>Broadcast ID:</b> <code>{bc_id}</code>")
+    finally:
+        running_broadcasts.discard(bc_id)
     await editMessage(
         pls_wait,
-        f"{status.format(**locals())}\n\n<b>Elapsed Time:</b> <code>{get_readable_time(time() - start_time)}</code>\n<b>Broadcast ID:</b> <code>{bc_hash}</code>",
+        f"{status(engine)}\n\n<b>Elapsed Time:</b> <code>{get_readable_time(time() - engine.start_time)}</code>\n<b>Broadcast ID:</b> <code>{bc_id}</code>",
     )
-        
-        
-bot.add_handler(MessageHandler(broadcast, filters=command(BotCommands.BroadcastCommand) & CustomFilters.sudo))
\ No newline at end of file
+
+
+bot.add_handler(MessageHandler(broadcast, filters=command(BotCommands.BroadcastCommand) & CustomFilters.sudo))
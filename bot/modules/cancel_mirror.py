@@ -1,5 +1,4 @@
 #!/usr/bin/env python3
-from asyncio import sleep
 from pyrogram.handlers import MessageHandler, CallbackQueryHandler
 from pyrogram.filters import command, regex
 
@@ -8,6 +7,7 @@ from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.message_utils import sendMessage, deleteMessage, auto_delete_message
 from bot.helper.ext_utils.bot_utils import getDownloadByGid, getAllDownload, MirrorStatus, new_task
+from bot.helper.ext_utils.task_registry import task_registry
 from bot.helper.telegram_helper import button_build
 
 
@@ -49,7 +49,6 @@ async def cancel_all(status):
     for dl in matches:
         obj = dl.download()
         await obj.cancel_download()
-        await sleep(1)
     return True
 
 
@@ -59,17 +58,15 @@ async def cancell_all_buttons(_, message):
     if count == 0:
         await sendMessage(message, "No active tasks!")
         return
+    counts = task_registry.status_counts()
     buttons = button_build.ButtonMaker()
-    buttons.ibutton("Downloading", f"canall {MirrorStatus.STATUS_DOWNLOADING}")
-    buttons.ibutton("Uploading", f"canall {MirrorStatus.STATUS_UPLOADING}")
-    buttons.ibutton("Seeding", f"canall {MirrorStatus.STATUS_SEEDING}")
-    buttons.ibutton("Cloning", f"canall {MirrorStatus.STATUS_CLONING}")
-    buttons.ibutton("Extracting", f"canall {MirrorStatus.STATUS_EXTRACTING}")
-    buttons.ibutton("Archiving", f"canall {MirrorStatus.STATUS_ARCHIVING}")
-    buttons.ibutton("QueuedDl", f"canall {MirrorStatus.STATUS_QUEUEDL}")
-    buttons.ibutton("QueuedUp", f"canall {MirrorStatus.STATUS_QUEUEUP}")
-    buttons.ibutton("Paused", f"canall {MirrorStatus.STATUS_PAUSED}")
-    buttons.ibutton("All", "canall all")
+    for name, status in (("Downloading", MirrorStatus.STATUS_DOWNLOADING), ("Uploading", MirrorStatus.STATUS_UPLOADING),
+                         ("Seeding", MirrorStatus.STATUS_SEEDING), ("Cloning", MirrorStatus.STATUS_CLONING),
+                         ("Extracting", MirrorStatus.STATUS_EXTRACTING), ("Archiving", MirrorStatus.STATUS_ARCHIVING),
+                         ("QueuedDl", MirrorStatus.STATUS_QUEUEDL), ("QueuedUp", MirrorStatus.STATUS_QUEUEUP),
+                         ("Paused", MirrorStatus.STATUS_PAUSED)):
+        buttons.ibutton(f"{name} ({counts.get(status, 0)})", f"canall {status}")
+    buttons.ibutton(f"All ({count})", "canall all")
     buttons.ibutton("Close", "canall close")
     button = buttons.build_menu(2)
     can_msg = await sendMessage(message, 'Choose tasks to cancel.', button)
@@ -1,31 +1,35 @@
 #!/usr/bin/env python3
 from pyrogram.handlers import MessageHandler, CallbackQueryHandler
 from pyrogram.filters import command, regex
-from psutil import cpu_percent, virtual_memory, disk_usage
 from time import time
 from asyncio import sleep
 
-from bot import bot_cache, status_reply_dict_lock, download_dict, download_dict_lock, botStartTime, Interval, config_dict, bot
+from bot import bot_cache, status_reply_dict, status_reply_dict_lock, download_dict, download_dict_lock, botStartTime, Interval, config_dict, bot
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.message_utils import sendMessage, editMessage, deleteMessage, auto_delete_message, sendStatusMessage, user_info, update_all_messages, delete_all_messages
 from bot.helper.ext_utils.bot_utils import get_readable_file_size, get_readable_time, turn_page, setInterval, new_task
+from bot.helper.ext_utils.sys_metrics import sys_metrics
+from bot.helper.ext_utils.task_registry import task_registry
 from bot.helper.themes import BotTheme
 
 
 @new_task
 async def mirror_status(_, message):
+    cmd_data = message.text.split()
+    user_id = message.from_user.id if len(cmd_data) > 1 and cmd_data[1].lower() == 'me' else None
     async with download_dict_lock:
-        count = len(download_dict)
+        count = task_registry.user_count(user_id) if user_id else len(download_dict)
     if count == 0:
         currentTime = get_readable_time(time() - botStartTime)
-        free = get_readable_file_size(disk_usage(config_dict['DOWNLOAD_DIR']).free)
-        msg = BotTheme('NO_ACTIVE_DL', cpu=cpu_percent(), free=free, free_p=round(100-disk_usage(config_dict['DOWNLOAD_DIR']).percent, 1),
-                       ram=virtual_memory().percent, uptime=currentTime)
+        metrics = sys_metrics.snapshot
+        free = get_readable_file_size(metrics.dl_disk.free)
+        msg = BotTheme('NO_ACTIVE_DL', cpu=metrics.cpu, free=free, free_p=round(100-metrics.dl_disk.percent, 1),
+                       ram=metrics.memory.percent, uptime=currentTime)
         reply_message = await sendMessage(message, msg)
         await auto_delete_message(message, reply_message)
     else:
-        await sendStatusMessage(message)
+        await sendStatusMessage(message, user_id)
         await deleteMessage(message)
         async with status_reply_dict_lock:
             if Interval:
@@ -48,7 +52,9 @@ async def status_pages(_, query):
         await sleep(1.5)
         await update_all_messages(True)
     elif data[1] in ['nex', 'pre']:
-        await turn_page(data)
+        async with status_reply_dict_lock:
+            if status_data := status_reply_dict.get(query.message.chat.id):
+                status_data[2] = turn_page(data, status_data[2], status_data[3])
         await update_all_messages(True)
     elif data[1] == 'close':
         await delete_all_messages()
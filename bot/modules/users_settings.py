@@ -21,7 +21,10 @@ from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.mirror_utils.upload_utils.gdriveTools import GoogleDriveHelper
 from bot.helper.ext_utils.db_handler import DbManger
-from bot.helper.ext_utils.bot_utils import getdailytasks, update_user_ldata, get_readable_file_size, sync_to_async, new_thread, is_gdrive_link
+from bot.helper.ext_utils.bot_utils import update_user_ldata, get_readable_file_size, sync_to_async, new_thread, is_gdrive_link
+from bot.helper.ext_utils.quota_engine import quota_engine
+from bot.helper.ext_utils.user_data_writer import user_data_writer
+from bot.helper.ext_utils.user_doc_cache import user_doc_cache
 from bot.helper.mirror_utils.upload_utils.ddlserver.gofile import Gofile
 from bot.helper.themes import BotTheme
 
@@ -70,6 +73,7 @@ async def get_user_settings(from_user, key=None, edit_type=None, edit_mode=None)
     thumbpath = f"Thumbnails/{user_id}.jpg"
     rclone_path = f'rclone/{user_id}.conf'
     user_dict = user_data.get(user_id, {})
+    await user_doc_cache.ensure_all(user_id)
     if key is None:
         buttons.ibutton("Universal Settings", f"userset {user_id} universal")
         buttons.ibutton("Mirror Settings", f"userset {user_id} mirror")
@@ -97,7 +101,7 @@ async def get_user_settings(from_user, key=None, edit_type=None, edit_mode=None)
         save_mode = "Save As Dump" if user_dict.get('save_mode') else "Save As BotPM"
         buttons.ibutton('Save As BotPM' if save_mode == 'Save As Dump' else 'Save As Dump', f"userset {user_id} save_mode")
         dailytl = config_dict['DAILY_TASK_LIMIT'] or "∞"
-        dailytas = user_dict.get('dly_tasks')[1] if user_dict and user_dict.get('dly_tasks') and user_id != OWNER_ID and config_dict['DAILY_TASK_LIMIT'] else config_dict['DAILY_TASK_LIMIT'] or "️∞" if user_id != OWNER_ID else "∞"
+        dailytas = quota_engine.usage(user_id)['tasks'] if user_dict and user_dict.get('dly_tasks') and user_id != OWNER_ID and config_dict['DAILY_TASK_LIMIT'] else config_dict['DAILY_TASK_LIMIT'] or "️∞" if user_id != OWNER_ID else "∞"
         if user_dict.get('dly_tasks', False):
             t = str(datetime.now() - user_dict['dly_tasks'][0]).split(':')
             lastused = f"{t[0]}h {t[1]}m {t[2].split('.')[0]}s ago"
@@ -111,7 +115,7 @@ async def get_user_settings(from_user, key=None, edit_type=None, edit_mode=None)
         buttons.ibutton("RClone", f"userset {user_id} rcc")
         rccmsg = "Exists" if await aiopath.exists(rclone_path) else "Not Exists"
         dailytlup = get_readable_file_size(config_dict['DAILY_MIRROR_LIMIT'] * 1024**3) if config_dict['DAILY_MIRROR_LIMIT'] else "∞"
-        dailyup = get_readable_file_size(await getdailytasks(user_id, check_mirror=True)) if config_dict['DAILY_MIRROR_LIMIT'] and user_id != OWNER_ID else "️∞"
+        dailyup = get_readable_file_size(quota_engine.usage(user_id)['mirror']) if config_dict['DAILY_MIRROR_LIMIT'] and user_id != OWNER_ID else "️∞"
         buttons.ibutton("Mirror Prefix", f"userset {user_id} mprefix")
         mprefix = 'Not Exists' if (val:=user_dict.get('mprefix', config_dict.get('MIRROR_FILENAME_PREFIX', ''))) == '' else val
 
@@ -146,7 +150,7 @@ async def get_user_settings(from_user, key=None, edit_type=None, edit_mode=None)
             buttons.ibutton("Send As Document", f"userset {user_id} doc")
 
         dailytlle = get_readable_file_size(config_dict['DAILY_LEECH_LIMIT'] * 1024**3) if config_dict['DAILY_LEECH_LIMIT'] else "️∞"
-        dailyll = get_readable_file_size(await getdailytasks(user_id, check_leech=True)) if config_dict['DAILY_LEECH_LIMIT'] and user_id != OWNER_ID else "∞"
+        dailyll = get_readable_file_size(quota_engine.usage(user_id)['leech']) if config_dict['DAILY_LEECH_LIMIT'] and user_id != OWNER_ID else "∞"
 
         thumbmsg = "Exists" if await aiopath.exists(thumbpath) else "Not Exists"
         buttons.ibutton(f"{'✅️' if thumbmsg == 'Exists' else ''} Thumbnail", f"userset {user_id} thumb")
@@ -365,7 +369,7 @@ async def set_custom(client, message, pre_event, key, direct=False):
     await deleteMessage(message)
     await update_user_settings(pre_event, key, return_key, msg=message, sdirect=direct)
     if DATABASE_URL:
-        await DbManger().update_user_data(user_id)
+        await user_data_writer.update(user_id)
 
 
 async def set_thumb(client, message, pre_event, key, direct=False):
@@ -379,6 +383,7 @@ async def set_thumb(client, message, pre_event, key, direct=False):
     await sync_to_async(Image.open(photo_dir).convert("RGB").save, des_dir, "JPEG")
     await aioremove(photo_dir)
     update_user_ldata(user_id, 'thumb', des_dir)
+    user_doc_cache.touch(user_id, 'thumb')
     await deleteMessage(message)
     await update_user_settings(pre_event, key, 'leech', msg=message, sdirect=direct)
     if DATABASE_URL:
@@ -394,6 +399,7 @@ async def add_rclone(client, message, pre_event):
     des_dir = ospath.join(path, f'{user_id}.conf')
     await message.download(file_name=des_dir)
     update_user_ldata(user_id, 'rclone', f'rclone/{user_id}.conf')
+    user_doc_cache.touch(user_id, 'rclone')
     await deleteMessage(message)
     await update_user_settings(pre_event, 'rcc', 'mirror')
     if DATABASE_URL:
@@ -413,7 +419,7 @@ async def leech_split_size(client, message, pre_event):
     await deleteMessage(message)
     await update_user_settings(pre_event, 'split_size', 'leech')
     if DATABASE_URL:
-        await DbManger().update_user_data(user_id)
+        await user_data_writer.update(user_id)
 
 
 async def event_handler(client, query, pfunc, rfunc, photo=False, document=False):
@@ -451,8 +457,9 @@ async def edit_user_settings(client, query):
     rclone_path = f'rclone/{user_id}.conf'
     user_dict = user_data.get(user_id, {})
     if user_id != int(data[1]):
-        await query.answer("Not Yours!", show_alert=True)
-    elif data[2] in ['universal', 'mirror', 'leech']:
+        return await query.answer("Not Yours!", show_alert=True)
+    await user_doc_cache.ensure_all(user_id)
+    if data[2] in ['universal', 'mirror', 'leech']:
         await query.answer()
         await update_user_settings(query, data[2])
     elif data[2] == "doc":
@@ -460,7 +467,7 @@ async def edit_user_settings(client, query):
         await query.answer()
         await update_user_settings(query, 'leech')
         if DATABASE_URL:
-            await DbManger().update_user_data(user_id)
+            await user_data_writer.update(user_id)
     elif data[2] == 'vthumb':
         handler_dict[user_id] = False
         await query.answer()
@@ -488,6 +495,7 @@ async def edit_user_settings(client, query):
             await query.answer()
             await aioremove(thumb_path)
             update_user_ldata(user_id, 'thumb', '')
+            user_doc_cache.discard(user_id, 'thumb')
             await update_user_settings(query, 'thumb', 'leech')
             if DATABASE_URL:
                 await DbManger().update_user_doc(user_id, 'thumb')
@@ -516,7 +524,7 @@ async def edit_user_settings(client, query):
         update_user_ldata(user_id, data[2][1:], '')
         await update_user_settings(query, data[2][1:], 'universal')
         if DATABASE_URL:
-            await DbManger().update_user_data(user_id)
+            await user_data_writer.update(user_id)
     elif data[2] in ['bot_pm', 'mediainfo', 'save_mode', 'td_mode']:
         handler_dict[user_id] = False
         if data[2] == 'save_mode' and not user_dict.get(data[2], False) and not user_dict.get('ldump'):
@@ -533,7 +541,7 @@ async def edit_user_settings(client, query):
         else:
             await update_user_settings(query, 'universal')
         if DATABASE_URL:
-            await DbManger().update_user_data(user_id)
+            await user_data_writer.update(user_id)
     elif data[2] == 'split_size':
         await query.answer()
         edit_mode = len(data) == 4
@@ -548,21 +556,21 @@ async def edit_user_settings(client, query):
         update_user_ldata(user_id, 'split_size', '')
         await update_user_settings(query, 'split_size', 'leech')
         if DATABASE_URL:
-            await DbManger().update_user_data(user_id)
+            await user_data_writer.update(user_id)
     elif data[2] == 'esplits':
         handler_dict[user_id] = False
         await query.answer()
         update_user_ldata(user_id, 'equal_splits', not user_dict.get('equal_splits', False))
         await update_user_settings(query, 'leech')
         if DATABASE_URL:
-            await DbManger().update_user_data(user_id)
+            await user_data_writer.update(user_id)
     elif data[2] == 'mgroup':
         handler_dict[user_id] = False
         await query.answer()
         update_user_ldata(user_id, 'media_group', not user_dict.get('media_group', False))
         await update_user_settings(query, 'leech')
         if DATABASE_URL:
-            await DbManger().update_user_data(user_id)
+            await user_data_writer.update(user_id)
     elif data[2] in ['sgofile', 'sstreamtape', 'dgofile', 'dstreamtape']:
         handler_dict[user_id] = False
         ddl_dict = user_dict.get('ddl_servers', {})
@@ -578,7 +586,7 @@ async def edit_user_settings(client, query):
         update_user_ldata(user_id, 'ddl_servers', ddl_dict)
         await update_user_settings(query, key, 'ddl_servers')
         if DATABASE_URL:
-            await DbManger().update_user_data(user_id)
+            await user_data_writer.update(user_id)
     elif data[2] == 'rcc':
         await query.answer()
         edit_mode = len(data) == 4
@@ -593,6 +601,7 @@ async def edit_user_settings(client, query):
             await query.answer()
             await aioremove(rclone_path)
             update_user_ldata(user_id, 'rclone', '')
+            user_doc_cache.discard(user_id, 'rclone')
             await update_user_settings(query, 'rcc', 'mirror')
             if DATABASE_URL:
                 await DbManger().update_user_doc(user_id, 'rclone')
@@ -624,7 +633,7 @@ async def edit_user_settings(client, query):
         update_user_ldata(user_id, data[2][1:], {} if data[2] == 'dldump' else '')
         await update_user_settings(query, data[2][1:], 'leech')
         if DATABASE_URL:
-            await DbManger().update_user_data(user_id)
+            await user_data_writer.update(user_id)
     elif data[2] in ['dmprefix', 'dmsuffix', 'dmremname', 'duser_tds']:
         handler_dict[user_id] = False
         await query.answer()
@@ -633,7 +642,7 @@ async def edit_user_settings(client, query):
             update_user_ldata(user_id, 'td_mode', False)
         await update_user_settings(query, data[2][1:], 'mirror')
         if DATABASE_URL:
-            await DbManger().update_user_data(user_id)
+            await user_data_writer.update(user_id)
     elif data[2] == 'back':
         handler_dict[user_id] = False
         await query.answer()
@@ -659,7 +668,7 @@ async def edit_user_settings(client, query):
         update_user_ldata(user_id, None, None)
         await update_user_settings(query)
         if DATABASE_URL:
-            await DbManger().update_user_data(user_id)
+            await user_data_writer.update(user_id)
             await DbManger().update_user_doc(user_id, 'thumb')
             await DbManger().update_user_doc(user_id, 'rclone')
     elif data[2] == 'user_del':
@@ -673,7 +682,7 @@ async def edit_user_settings(client, query):
             await aioremove(rclone_path)
         update_user_ldata(user_id, None, None)
         if DATABASE_URL:
-            await DbManger().update_user_data(user_id)
+            await user_data_writer.update(user_id)
             await DbManger().update_user_doc(user_id, 'thumb')
             await DbManger().update_user_doc(user_id, 'rclone')
         await editMessage(message, f'Data Reset for {user_id}')
@@ -21,6 +21,7 @@ from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.listeners.tasks_listener import MirrorLeechListener
 from bot.helper.ext_utils.help_messages import YT_HELP_MESSAGE
 from bot.helper.ext_utils.bulk_links import extract_bulk_links
+from bot.helper.ext_utils.user_doc_cache import user_doc_cache
 
 
 @new_task
@@ -428,7 +429,7 @@ async def _ytdl(client, message, isLeech=False, sameDir=None, bulk=[]):
             return
         elif up not in ['rcl', 'gd', 'ddl']:
             if up.startswith('mrcc:'):
-                config_path = f'rclone/{message.from_user.id}.conf'
+                config_path = await user_doc_cache.ensure(message.from_user.id, 'rclone')
             else:
                 config_path = 'rclone.conf'
             if not await aiopath.exists(config_path):